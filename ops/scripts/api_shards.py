@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/api_shards.py
+"""
+API estática particionada para docs/api
+
+En vez de un único lae_historico.json, los sorteos se publican en shards
+por juego y año:
+
+  docs/api/shards/<GAME>/<YYYY>.json   (JSON minificado, ordenado por fecha)
+  docs/api/index.json                  (hash, nº de sorteos y rango de fechas por shard;
+                                        se escribe siempre, vacío si no hay sorteos)
+
+Un shard sólo se reescribe si su contenido cambia, así que un cliente
+(Apps Script, HB, Pages) compara el sha256 del índice con el que tiene en
+caché y descarga únicamente los años que han cambiado.
+
+Los fetchers llaman a write_shards() tras generar el histórico. Los shards
+de juegos/años que no vienen en la ejecución actual se conservan (un año
+bloqueado por el WAF no borra datos buenos); usa --prune para reconstruir
+desde cero.
+
+Uso:
+  python ops/scripts/api_shards.py [docs/api/lae_historico.json] [--prune]
+"""
+
+import os, re, sys, json, hashlib, argparse
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+OUT_DIR = os.path.join("docs", "api")
+SHARDS_SUBDIR = "shards"
+INDEX_NAME = "index.json"
+INDEX_VERSION = 1
+
+def _minify(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def canonical_date(s: str) -> Optional[str]:
+    """'06/09/2025', '2025-09-06', '2025-09-06T00:00:00' -> '2025-09-06' (None si no se reconoce)."""
+    s = (s or "").strip()
+    m = re.match(r"^(\d{4})-(\d{1,2})-(\d{1,2})", s)
+    if m:
+        y, mo, d = m.groups()
+    else:
+        m = re.match(r"^(\d{1,2})[/-](\d{1,2})[/-](\d{4})", s)
+        if not m:
+            return None
+        d, mo, y = m.groups()
+    try:
+        return datetime(int(y), int(mo), int(d)).strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+def group_by_shard(results: List[Dict[str, Any]]) -> Dict[Tuple[str, int], List[Dict[str, Any]]]:
+    """Agrupa sorteos por (juego, año) y los ordena por fecha canónica."""
+    groups: Dict[Tuple[str, int], List[Tuple[str, Dict[str, Any]]]] = {}
+    for r in results or []:
+        game = str(r.get("game") or "").upper()
+        iso = canonical_date(str(r.get("date") or ""))
+        if not game or not iso:
+            continue
+        groups.setdefault((game, int(iso[:4])), []).append((iso, r))
+    return {k: [r for _, r in sorted(v, key=lambda t: t[0])] for k, v in groups.items()}
+
+def shard_relpath(game: str, year: int) -> str:
+    return f"{SHARDS_SUBDIR}/{game}/{year}.json"
+
+def _write_if_changed(path: str, data: bytes) -> bool:
+    """Escribe (atómicamente) sólo si el contenido difiere. Devuelve True si escribió."""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+def load_index(out_dir: str = OUT_DIR) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(out_dir, INDEX_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"version": INDEX_VERSION, "updated_at": None, "shards": []}
+
+def write_shards(results: List[Dict[str, Any]], out_dir: str = OUT_DIR, prune: bool = False) -> Dict[str, Any]:
+    """
+    Escribe los shards que han cambiado y actualiza index.json.
+    Devuelve el índice resultante (con 'changed': lista de rutas reescritas).
+    """
+    previous = {} if prune else {(s["game"], int(s["year"])): s for s in load_index(out_dir).get("shards", [])}
+    entries = dict(previous)
+    changed: List[str] = []
+
+    for (game, year), draws in sorted(group_by_shard(results).items()):
+        rel = shard_relpath(game, year)
+        data = _minify({"game": game, "year": year, "results": draws})
+        dates = [canonical_date(str(d.get("date"))) for d in draws]
+        entry = {
+            "game": game,
+            "year": year,
+            "path": rel,
+            "sha256": sha256_bytes(data),
+            "bytes": len(data),
+            "records": len(draws),
+            "date_min": dates[0],
+            "date_max": dates[-1],
+        }
+        if _write_if_changed(os.path.join(out_dir, rel), data):
+            changed.append(rel)
+        entries[(game, year)] = entry
+
+    if prune:
+        root = os.path.join(out_dir, SHARDS_SUBDIR)
+        keep = {os.path.normpath(os.path.join(out_dir, e["path"])) for e in entries.values()}
+        for dirpath, _, files in os.walk(root):
+            for name in files:
+                p = os.path.normpath(os.path.join(dirpath, name))
+                if name.endswith(".json") and p not in keep:
+                    os.remove(p)
+                    changed.append(os.path.relpath(p, out_dir))
+
+    shards = [entries[k] for k in sorted(entries)]
+    old = load_index(out_dir)
+    # sin sorteos también se escribe: el índice existe siempre (aunque vacío)
+    if shards != old.get("shards") or not os.path.exists(os.path.join(out_dir, INDEX_NAME)):
+        index = {
+            "version": INDEX_VERSION,
+            "updated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "totals": {g: sum(s["records"] for s in shards if s["game"] == g)
+                       for g in sorted({s["game"] for s in shards})},
+            "shards": shards,
+        }
+        _write_if_changed(os.path.join(out_dir, INDEX_NAME), _minify(index))
+    else:
+        index = old
+
+    print(f"✓ API shards: {len(shards)} en índice · reescritos {len(changed)}")
+    return dict(index, changed=changed)
+
+def main():
+    ap = argparse.ArgumentParser(description="Particiona el histórico LAE en shards por juego/año")
+    ap.add_argument("source", nargs="?", default=os.path.join(OUT_DIR, "lae_historico.json"))
+    ap.add_argument("--out-dir", default=OUT_DIR)
+    ap.add_argument("--prune", action="store_true", help="reconstruye el índice y borra shards huérfanos")
+    args = ap.parse_args()
+
+    with open(args.source, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    write_shards(payload.get("results", []), args.out_dir, prune=args.prune)
+
+if __name__ == "__main__":
+    main()
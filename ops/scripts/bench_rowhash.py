@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/bench_rowhash.py
+"""
+Benchmark de _rowhash (normalize_loterias.add_hash)
+
+Compara, sobre los fixtures de ops/loterias/data escalados N veces:
+  - rowwise : implementación original (df.apply por fila)
+  - md5     : vectorizado, mismos valores que rowwise
+  - fast    : hash de 64 bits de pandas (valores distintos)
+
+Uso:
+  python ops/scripts/bench_rowhash.py [--scale 100] [--data ops/loterias/data]
+"""
+
+import os, sys, glob, json, time, argparse
+
+import pandas as pd
+
+import normalize_loterias as nl
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+FIXTURES = os.path.join(BASE_DIR, "ops", "loterias", "data")
+
+def load_frames(data_dir: str, scale: int):
+    frames = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.csv"))):
+        df = nl.clean_df(nl.robust_read_csv(path))
+        if not df.empty:
+            frames.append((os.path.basename(path), pd.concat([df] * scale, ignore_index=True)))
+    return frames
+
+def timed(fn, frames):
+    t0 = time.perf_counter()
+    out = [fn(df.copy())["_rowhash"] for _, df in frames]
+    return time.perf_counter() - t0, out
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de add_hash")
+    ap.add_argument("--scale", type=int, default=100)
+    ap.add_argument("--data", default=FIXTURES)
+    args = ap.parse_args()
+
+    frames = load_frames(args.data, args.scale)
+    rows = sum(len(df) for _, df in frames)
+
+    t_row, ref = timed(nl.add_hash_rowwise, frames)
+    t_md5, md5 = timed(lambda df: nl.add_hash(df, "md5"), frames)
+    t_fast, _ = timed(lambda df: nl.add_hash(df, "fast"), frames)
+
+    same = all((a.values == b.values).all() for a, b in zip(ref, md5))
+    print(json.dumps({
+        "files": len(frames), "scale": args.scale, "rows": rows,
+        "rowwise_s": round(t_row, 3),
+        "md5_vectorised_s": round(t_md5, 3),
+        "fast64_s": round(t_fast, 3),
+        "speedup_md5": round(t_row / t_md5, 1) if t_md5 else None,
+        "speedup_fast": round(t_row / t_fast, 1) if t_fast else None,
+        "md5_matches_rowwise": same,
+    }, indent=2))
+    if not same:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/bench_suite.py
+"""
+Benchmarks de los puntos calientes del pipeline
+
+Datos:
+  - ops/loterias/data (último snapshot de cada hoja) escalado ×N repitiendo
+    las filas de cada CSV (mismo dialecto, cabecera una vez)
+  - ops/loterias/lae_fixtures: páginas de resultados LAE (HTML), texto visible
+    de las páginas de juego y sorteos crudos de buscadorSorteos (JSON). Hechos a
+    mano sobre la maquetación que buscan los parsers; si se capturan páginas
+    reales basta con sustituir los ficheros (mismos nombres)
+  En los parsers LAE, N = nº de páginas/sorteos procesados (N por juego).
+
+Casos (nombre@N):
+  read_csv         normalize_loterias.robust_read_csv
+  normalize        normalize_loterias.normalize_generic (lee ya hecho)
+  add_hash         normalize_loterias.add_hash
+  master_csv       normalize_loterias.build_master_csv (completo, no incremental)
+  dq               dq_loterias.main --full
+  parse_draw       fetch_lae_by_dates.parse_draw           (necesita 'requests')
+  parse_results    fetch_lae_results.parse_*
+  normalize_draw   fetch_lae_historic.normalize_draw        (necesita 'requests')
+  normalize_draw_browser  fetch_lae_historic_browser.normalize_draw
+Un caso cuyo módulo no se puede importar se apunta como "skipped" con el motivo.
+
+Todo lo que escriben las etapas (dist/, cachés, dq_state, manifest) va a un
+directorio temporal: el benchmark no pisa dist/ ni loterias/data (en dist/
+sólo deja el JSON de resultados).
+
+Resultado JSON (dist/bench/bench_{fecha}.json):
+  {"meta": {git, python, pandas, numpy, platform, cpus, scales, repeat},
+   "results": {"dq@100": {"median_s", "min_s", "runs", "rows", "rows_per_s"}, ...}}
+
+Variables:
+  BENCH_DIR        -> carpeta de resultados (dist/bench)
+  BENCH_THRESHOLD  -> % de empeoramiento de la mediana que cuenta como regresión (15)
+
+Uso:
+  python ops/scripts/bench_suite.py run [--scales 10,100,1000] [--only dq,master_csv] [--repeat 3]
+  python ops/scripts/bench_suite.py compare dist/bench/base.json dist/bench/nuevo.json [--threshold 15]
+"""
+
+import os, io, sys, json, time, shutil, platform, argparse, tempfile, statistics, subprocess
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+FIXTURES = os.path.join(BASE_DIR, "ops", "loterias", "data")
+LAE_FIXTURES = os.path.join(BASE_DIR, "ops", "loterias", "lae_fixtures")
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+BENCH_DIR = os.environ.get("BENCH_DIR", os.path.join(os.environ.get("DIST_DIR", os.path.join(BASE_DIR, "dist")), "bench"))
+THRESHOLD = _env_int("BENCH_THRESHOLD", 15)
+DEFAULT_SCALES = (10, 100)
+# por debajo de esto la mediana es ruido de reloj: no se compara
+MIN_COMPARE_S = 0.005
+
+LAE_GAMES = ("PRIMITIVA", "BONOLOTO", "EURO", "GORDO")
+
+# --- Entorno aislado --------------------------------------------------------------
+def isolate(tmp: str) -> None:
+    """
+    Apunta las rutas de salida de las etapas a 'tmp'. Tiene que ir antes de
+    importar los módulos del pipeline (leen DIST_DIR & co. al importarse).
+    """
+    dist = os.path.join(tmp, "dist")
+    os.makedirs(dist, exist_ok=True)
+    os.environ.update({"DIST_DIR": dist, "LOT_SQLITE": os.path.join(dist, "loterias.sqlite"),
+                       "STAGE_METRICS": os.path.join(dist, "stage_metrics.jsonl"),
+                       "RUN_METRICS": os.path.join(dist, "runs.ndjson")})
+    os.environ.pop("OPS_PROFILE", None)
+
+def scale_fixtures(out_dir: str, scale: int, data_dir: str = FIXTURES) -> List[str]:
+    """Copia el último snapshot de cada hoja con las filas repetidas 'scale' veces."""
+    from snapshot_catalog import select_paths
+    os.makedirs(out_dir, exist_ok=True)
+    out = []
+    for src in select_paths(data_dir, "latest"):
+        with open(src, "r", encoding="utf-8", newline="") as f:
+            lines = f.read().splitlines(keepends=True)
+        if lines and not lines[-1].endswith("\n"):
+            lines[-1] += "\n"
+        dst = os.path.join(out_dir, os.path.basename(src))
+        with open(dst, "w", encoding="utf-8", newline="") as f:
+            f.write(lines[0] if lines else "")
+            body = "".join(lines[1:])
+            for _ in range(scale):
+                f.write(body)
+        out.append(dst)
+    return out
+
+def read_lae_fixtures(fixtures_dir: str = LAE_FIXTURES) -> Dict[str, Dict]:
+    def read(name):
+        with open(os.path.join(fixtures_dir, name), "r", encoding="utf-8") as f:
+            return f.read()
+    return {"html": {g: read(f"by_dates_{g}.html") for g in LAE_GAMES},
+            "text": {g: read(f"results_{g}.txt") for g in LAE_GAMES},
+            "raw": json.loads(read("buscador_sorteos.json"))}
+
+# --- Casos ------------------------------------------------------------------------
+# Cada caso: setup(ctx) -> run() que devuelve filas/elementos procesados.
+# ctx = {"scale", "tmp", "paths" (CSV escalados), "lae" (fixtures LAE)}
+
+def case_read_csv(ctx):
+    import normalize_loterias as nl
+    paths = ctx["paths"]
+    return lambda: sum(len(nl.robust_read_csv(p)) for p in paths)
+
+def _frames(ctx):
+    import normalize_loterias as nl
+    if "frames" not in ctx:
+        ctx["frames"] = [(p, nl.robust_read_csv(p)) for p in ctx["paths"]]
+    return ctx["frames"]
+
+def case_normalize(ctx):
+    import normalize_loterias as nl
+    frames = _frames(ctx)
+    return lambda: sum(len(nl.normalize_generic(p, df)) for p, df in frames)
+
+def case_add_hash(ctx):
+    import normalize_loterias as nl
+    clean = [nl.clean_df(df.copy()) for _, df in _frames(ctx)]
+    return lambda: sum(len(nl.add_hash(df.copy())) for df in clean)
+
+def case_master_csv(ctx):
+    import normalize_loterias as nl
+    norm_dir = os.path.join(ctx["tmp"], f"norm_{ctx['scale']}")
+    os.makedirs(norm_dir, exist_ok=True)
+    nl.DIST_DIR = os.environ["DIST_DIR"]
+    outputs = []
+    with redirect_stdout(io.StringIO()):
+        for p in ctx["paths"]:
+            meta = nl.normalize_file(p, norm_dir)
+            if meta.get("ok"):
+                outputs.append(os.path.join(norm_dir, meta["file"]))
+    rows = 0
+    for p in outputs:
+        with open(p, "rb") as f:
+            rows += sum(1 for _ in f) - 1
+
+    def run():
+        with redirect_stdout(io.StringIO()):
+            nl.build_master_csv(norm_dir, incremental=False, paths=outputs)
+        return rows
+    return run
+
+def case_dq(ctx):
+    import dq_loterias
+    data_dir = os.path.dirname(ctx["paths"][0])
+    rows = sum(len(df) for _, df in _frames(ctx))
+
+    def run():
+        dq_loterias.DATA_DIR = data_dir
+        argv, sys.argv = sys.argv, ["dq_loterias.py", "--full"]
+        try:
+            with redirect_stdout(io.StringIO()):
+                dq_loterias.main()
+        except SystemExit:
+            pass
+        finally:
+            sys.argv = argv
+        return rows
+    return run
+
+def case_parse_draw(ctx):
+    import fetch_lae_by_dates as fb
+    html, n = ctx["lae"]["html"], ctx["scale"]
+    ymd = "2025-10-14"
+
+    def run():
+        done = 0
+        for _ in range(n):
+            for g in LAE_GAMES:
+                done += fb.parse_draw(g, html[g], ymd, fb.GAMES[g]) is not None
+        return done
+    return run
+
+def case_parse_results(ctx):
+    import fetch_lae_results as fr
+    text, n = ctx["lae"]["text"], ctx["scale"]
+
+    def run():
+        done = 0
+        for _ in range(n):
+            for g in LAE_GAMES:
+                done += fr.PARSERS[g][1](text[g]) is not None
+        return done
+    return run
+
+def _normalize_draw_case(module: str):
+    def case(ctx):
+        mod = __import__(module)
+        raw, n = ctx["lae"]["raw"], ctx["scale"]
+
+        def run():
+            done = 0
+            for _ in range(n):
+                for g, draws in raw.items():
+                    for d in draws:
+                        done += mod.normalize_draw(g, d) is not None
+            return done
+        return run
+    return case
+
+CASES: Dict[str, Callable] = {
+    "read_csv": case_read_csv,
+    "normalize": case_normalize,
+    "add_hash": case_add_hash,
+    "master_csv": case_master_csv,
+    "dq": case_dq,
+    "parse_draw": case_parse_draw,
+    "parse_results": case_parse_results,
+    "normalize_draw": _normalize_draw_case("fetch_lae_historic"),
+    "normalize_draw_browser": _normalize_draw_case("fetch_lae_historic_browser"),
+}
+
+# --- Ejecución --------------------------------------------------------------------
+def timeit(fn: Callable[[], int], repeat: int) -> Dict:
+    times, rows = [], 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = fn()
+        times.append(time.perf_counter() - t0)
+    med = statistics.median(times)
+    return {"median_s": round(med, 6), "min_s": round(min(times), 6), "runs": repeat,
+            "rows": int(rows), "rows_per_s": round(rows / med) if med else None}
+
+def meta(scales, repeat) -> Dict:
+    import numpy as np
+    import pandas as pd
+    try:
+        git = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                             text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        git = ""
+    return {"created_utc": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"), "git": git,
+            "python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+            "platform": platform.platform(), "cpus": os.cpu_count(), "scales": list(scales), "repeat": repeat}
+
+def run_suite(scales, only: Optional[List[str]] = None, repeat: int = 3, keep: bool = False) -> Dict:
+    tmp = tempfile.mkdtemp(prefix="bench_")
+    isolate(tmp)
+    names = [n for n in CASES if not only or n in only]
+    results: Dict[str, Dict] = {}
+    try:
+        lae = read_lae_fixtures()
+        for scale in scales:
+            ctx = {"scale": scale, "tmp": tmp, "lae": lae,
+                   "paths": scale_fixtures(os.path.join(tmp, f"data_{scale}"), scale)}
+            # a ×1000 una repetición ya tarda lo suyo
+            reps = 1 if scale >= 1000 else repeat
+            for name in names:
+                key = f"{name}@{scale}"
+                try:
+                    run = CASES[name](ctx)
+                except ImportError as e:
+                    results[key] = {"skipped": f"{e.__class__.__name__}: {e}"}
+                    print(f"· {key:<30} omitido ({e})")
+                    continue
+                results[key] = timeit(run, reps)
+                r = results[key]
+                print(f"✓ {key:<30} {r['median_s']:>9.3f}s (min {r['min_s']:.3f}s) · "
+                      f"{r['rows']} filas · {r['rows_per_s'] or '-'} filas/s")
+            ctx.pop("frames", None)
+    finally:
+        if not keep:
+            shutil.rmtree(tmp, ignore_errors=True)
+    return {"meta": meta(scales, repeat), "results": results}
+
+def save(doc: Dict, path: Optional[str] = None) -> str:
+    path = path or os.path.join(BENCH_DIR, f"bench_{datetime.now(timezone.utc):%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, indent=2)
+    return path
+
+# --- Comparación ------------------------------------------------------------------
+def compare(base: Dict, new: Dict, threshold: float = THRESHOLD) -> Tuple[List[str], List[str]]:
+    """
+    Compara medianas caso a caso. Devuelve (líneas, regresiones): regresión =
+    la mediana empeora más de 'threshold' % (y la base no es ruido de reloj).
+    """
+    lines = [f"{'caso':<30} {'base':>9} {'nuevo':>9} {'Δ%':>8}"]
+    regressions = []
+    b_res, n_res = base.get("results", {}), new.get("results", {})
+    for key in sorted(set(b_res) | set(n_res)):
+        b, n = b_res.get(key) or {}, n_res.get(key) or {}
+        if "median_s" not in b or "median_s" not in n:
+            why = "sólo en base" if key not in n_res else "sólo en nuevo" if key not in b_res else "omitido"
+            lines.append(f"{key:<30} {'-':>9} {'-':>9} {'':>8}  ({why})")
+            continue
+        pct = (n["median_s"] - b["median_s"]) * 100 / b["median_s"] if b["median_s"] else 0.0
+        flag = ""
+        if b["median_s"] < MIN_COMPARE_S:
+            flag = "  (ruido)"
+        elif pct > threshold:
+            flag = "  ❌ regresión"
+            regressions.append(f"{key}: {b['median_s']:.3f}s → {n['median_s']:.3f}s (+{pct:.0f}%)")
+        elif pct < -threshold:
+            flag = "  ✓ mejora"
+        lines.append(f"{key:<30} {b['median_s']:>9.3f} {n['median_s']:>9.3f} {pct:>+7.1f}%{flag}")
+    return lines, regressions
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmarks del pipeline (fixtures escalados)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="ejecuta los casos y guarda el JSON")
+    r.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)), help="p. ej. 10,100,1000")
+    r.add_argument("--only", help=f"casos separados por comas ({', '.join(CASES)})")
+    r.add_argument("--repeat", type=int, default=3)
+    r.add_argument("--out", help="ruta del JSON (defecto dist/bench/bench_{fecha}.json)")
+    r.add_argument("--keep", action="store_true", help="no borra el directorio temporal")
+    c = sub.add_parser("compare", help="compara dos resultados y falla si hay regresiones")
+    c.add_argument("base")
+    c.add_argument("new")
+    c.add_argument("--threshold", type=float, default=THRESHOLD, help="% de empeoramiento tolerado")
+    args = ap.parse_args()
+
+    if args.cmd == "run":
+        only = [s.strip() for s in args.only.split(",")] if args.only else None
+        unknown = [s for s in only or [] if s not in CASES]
+        if unknown:
+            ap.error(f"casos desconocidos: {', '.join(unknown)}")
+        scales = [int(s) for s in args.scales.split(",") if s.strip()]
+        path = save(run_suite(scales, only, args.repeat, args.keep), args.out)
+        print(f"✓ Resultados: {path}")
+    else:
+        with open(args.base, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.new, "r", encoding="utf-8") as f:
+            new = json.load(f)
+        lines, regressions = compare(base, new, args.threshold)
+        print("\n".join(lines))
+        if regressions:
+            print(f"❌ {len(regressions)} regresiones (>{args.threshold:g}%):")
+            for x in regressions:
+                print(f"   - {x}")
+            sys.exit(1)
+        print(f"✓ Sin regresiones por encima del {args.threshold:g}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/csv_reader.py
+"""
+Lector CSV compartido (normalize_loterias + dq_loterias)
+
+- Detecta el dialecto (separador, comillas, encoding) una sola vez leyendo el
+  primer KB del fichero
+- Lo cachea por hoja + firma de cabecera ("Historico" + hash de la 1ª línea):
+  los snapshots siguientes de la misma hoja no vuelven a olfatearse.
+  La caché se persiste en dist/.csv_dialects.json
+- Parsea con el motor C de pandas (o pyarrow si se pide y está instalado)
+- Sólo si ese parseo falla se usa la ruta tolerante (engine='python',
+  reintentos por separador, líneas rotas saltadas, latin-1)
+
+Variables:
+  CSV_ENGINE         -> c (defecto) | pyarrow | auto (pyarrow si está instalado)
+  CSV_DIALECT_CACHE  -> ruta de la caché (vacío = sólo en memoria)
+
+Uso:
+  python ops/scripts/csv_reader.py fichero.csv [...]   # muestra dialecto y filas
+"""
+
+import os, re, csv, sys, json, hashlib
+from typing import Dict, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (opcional)
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DIST_DIR = os.environ.get("DIST_DIR", os.path.join(BASE_DIR, "dist"))
+CACHE_PATH = os.environ.get("CSV_DIALECT_CACHE", os.path.join(DIST_DIR, ".csv_dialects.json"))
+ENGINE = os.environ.get("CSV_ENGINE", "c").strip().lower()
+
+SNIFF_BYTES = 1024
+DELIMITERS = ",;\t|"
+
+_cache: Optional[Dict[str, Dict]] = None
+_dirty = False
+
+def engine() -> str:
+    if ENGINE in ("pyarrow", "auto") and HAS_PYARROW:
+        return "pyarrow"
+    return "c"
+
+# --- Dialecto -------------------------------------------------------------------
+def sheet_name(path: str) -> str:
+    """'Historico_20250921_1456.csv' -> 'Historico'."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return re.sub(r"_\d{8}_\d{4}$", "", stem)
+
+def _head(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read(SNIFF_BYTES)
+
+def _decode(raw: bytes):
+    if raw.startswith(b"\xef\xbb\xbf"):
+        return raw[3:].decode("utf-8", errors="ignore"), "utf-8-sig"
+    try:
+        return raw.decode("utf-8"), "utf-8"
+    except UnicodeDecodeError as e:
+        if e.start > len(raw) - 4:  # carácter multibyte cortado al final del KB
+            return raw[:e.start].decode("utf-8"), "utf-8"
+        return raw.decode("latin-1"), "latin-1"
+
+def cache_key(path: str, raw: Optional[bytes] = None) -> str:
+    raw = _head(path) if raw is None else raw
+    first = raw.split(b"\n", 1)[0].rstrip(b"\r")
+    return f"{sheet_name(path)}|{hashlib.sha1(first).hexdigest()[:12]}"
+
+def sniff(raw: bytes) -> Dict[str, str]:
+    text, encoding = _decode(raw)
+    sample = text if len(raw) < SNIFF_BYTES else text.rsplit("\n", 1)[0]  # sin la última línea cortada
+    sep, quote = ",", '"'
+    try:
+        d = csv.Sniffer().sniff(sample or text, delimiters=DELIMITERS)
+        sep, quote = d.delimiter, d.quotechar or '"'
+    except csv.Error:
+        first = text.split("\n", 1)[0]
+        counts = {c: first.count(c) for c in DELIMITERS}
+        if max(counts.values()):
+            sep = max(counts, key=counts.get)
+    return {"sep": sep, "quotechar": quote, "encoding": encoding}
+
+def _load_cache() -> Dict[str, Dict]:
+    global _cache
+    if _cache is None:
+        _cache = {}
+        if CACHE_PATH:
+            try:
+                with open(CACHE_PATH, "r", encoding="utf-8") as f:
+                    _cache = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+    return _cache
+
+def save_cache() -> None:
+    global _dirty
+    if not (_dirty and CACHE_PATH and _cache is not None):
+        return
+    os.makedirs(os.path.dirname(CACHE_PATH) or ".", exist_ok=True)
+    tmp = CACHE_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_cache, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, CACHE_PATH)
+    _dirty = False
+
+def dialect_for(path: str, refresh: bool = False) -> Dict[str, str]:
+    global _dirty
+    raw = _head(path)
+    key = cache_key(path, raw)
+    cache = _load_cache()
+    if refresh or key not in cache:
+        cache[key] = sniff(raw)
+        _dirty = True
+    return cache[key]
+
+# --- Lectura --------------------------------------------------------------------
+def read_fast(path: str, dialect: Dict[str, str]) -> pd.DataFrame:
+    return pd.read_csv(path, dtype=str, sep=dialect["sep"], quotechar=dialect["quotechar"],
+                       encoding=dialect["encoding"], engine=engine())
+
+def read_tolerant(path: str) -> pd.DataFrame:
+    """
+    Ruta lenta y tolerante (la de siempre):
+      1) Autodetección con engine='python', sep=None
+      2) Reintentos con separadores comunes
+      3) Sin encabezado + on_bad_lines='skip' -> columnas col_1..col_n
+    """
+    for encoding in ("utf-8", "latin-1"):
+        kw = dict(encoding=encoding, dtype=str, engine="python")
+        try:
+            return pd.read_csv(path, sep=None, on_bad_lines="warn", **kw)
+        except Exception:
+            pass
+        for sep in [",", ";", "\t", "|"]:
+            try:
+                return pd.read_csv(path, sep=sep, on_bad_lines="warn", **kw)
+            except Exception:
+                continue
+        try:
+            df = pd.read_csv(path, header=None, on_bad_lines="skip", **kw)
+            df.columns = [f"col_{i+1}" for i in range(df.shape[1])]
+            return df
+        except Exception as e:
+            err = e
+    raise RuntimeError(f"No se pudo leer {path}: {err}")
+
+def read_csv(path: str) -> pd.DataFrame:
+    """
+    Lee un CSV como texto (dtype=str) con el dialecto cacheado y el motor rápido.
+    Si falla: re-olfatea una vez (el cacheado puede no valer) y, si vuelve a
+    fallar, recurre a read_tolerant.
+    """
+    try:
+        return read_fast(path, dialect_for(path))
+    except Exception:
+        pass
+    try:
+        return read_fast(path, dialect_for(path, refresh=True))
+    except Exception:
+        print(f"ℹ️  {os.path.basename(path)}: lectura rápida fallida, se usa la ruta tolerante")
+    return read_tolerant(path)
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    for p in sys.argv[1:]:
+        d = dialect_for(p)
+        df = read_csv(p)
+        print(f"{os.path.basename(p)}: sep={d['sep']!r} enc={d['encoding']} engine={engine()} "
+              f"filas={len(df)} cols={df.shape[1]}")
+    save_cache()
+
+if __name__ == "__main__":
+    main()
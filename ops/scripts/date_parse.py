@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/date_parse.py
+"""
+Parseo de fechas compartido (normalize_loterias, sheet_schema, dq_loterias)
+
+pd.to_datetime(..., dayfirst=True) sin 'format' infiere el formato elemento a
+elemento (lento) y además lee '2025-09-07' como 9 de julio. Aquí:
+
+1) Se trabaja sobre los valores únicos de la columna (las fechas se repiten
+   mucho: Pagos_* tiene 7-13 filas por sorteo) y se expande al final
+2) El formato se detecta una vez con una muestra de esos únicos
+3) El resto se parsea con ese formato explícito (vectorizado)
+4) Los que no encajan prueban los otros formatos conocidos y, en último caso,
+   un parseo por elemento (día primero salvo que empiece por el año)
+
+Formatos vistos en las hojas: 18/08/2025, 6/09/2025, 2025-09-06 11:39:05,
+8/09/2025 10:05:00.
+
+Uso:
+  python ops/scripts/date_parse.py fichero.csv columna
+"""
+
+import re, sys
+from functools import lru_cache
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+FORMATS = (
+    "%d/%m/%Y",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%d-%m-%Y",
+    "%d/%m/%y",
+)
+SAMPLE_SIZE = 200
+_YEAR_FIRST = re.compile(r"^\d{4}[-/]")
+
+def _clean(values) -> pd.Series:
+    s = pd.Series(values, dtype=object) if not isinstance(values, pd.Series) else values
+    t = s.astype("string").str.strip()
+    return t.mask(t.isin(["", "nan", "NaT", "None"]))
+
+def detect_format(sample: Iterable[str], formats: Iterable[str] = FORMATS) -> Optional[str]:
+    """Formato que parsea más valores de la muestra (el primero en caso de empate)."""
+    s = pd.Series(list(sample), dtype=object)
+    if s.empty:
+        return None
+    best, best_ok = None, 0
+    for fmt in formats:
+        ok = int(pd.to_datetime(s, format=fmt, errors="coerce").notna().sum())
+        if ok > best_ok:
+            best, best_ok = fmt, ok
+            if ok == len(s):
+                break
+    return best
+
+@lru_cache(maxsize=4096)
+def parse_one(value: str):
+    """Último recurso, por elemento (cacheado entre columnas)."""
+    try:
+        ts = pd.to_datetime(value, errors="coerce", dayfirst=not _YEAR_FIRST.match(value),
+                            yearfirst=bool(_YEAR_FIRST.match(value)))
+    except (ValueError, OverflowError, TypeError):
+        return pd.NaT
+    return ts
+
+def parse_unique(uniques, fmt: Optional[str] = None) -> np.ndarray:
+    """
+    Textos ya limpios (sin vacíos, normalmente únicos) -> datetime64[ns] (NaT si no es fecha).
+    Para quien ya ha factorizado la columna (dq_rules); parse_dates lo usa por debajo.
+    """
+    vals = np.asarray(uniques, dtype=object)
+    out = np.full(len(vals), np.datetime64("NaT"), dtype="datetime64[ns]")
+    if not len(vals):
+        return out
+    fmt = fmt or detect_format(vals[:SAMPLE_SIZE])
+    order = ([fmt] if fmt else []) + [f for f in FORMATS if f != fmt]
+    for f in order:
+        todo = np.flatnonzero(np.isnat(out))
+        if not todo.size:
+            return out
+        out[todo] = pd.to_datetime(pd.Series(vals[todo], dtype=object), format=f,
+                                   errors="coerce").to_numpy(dtype="datetime64[ns]")
+    for i in np.flatnonzero(np.isnat(out)):
+        ts = parse_one(vals[i])
+        try:
+            out[i] = ts.as_unit("ns").to_datetime64()
+        except (ValueError, OverflowError, AttributeError):  # NaT o fuera de rango (año 5291...)
+            pass
+    return out
+
+def parse_dates(values, fmt: Optional[str] = None) -> pd.Series:
+    """
+    Serie/lista de textos -> Serie datetime64 (NaT si no es fecha).
+    'fmt' fuerza el formato principal en lugar de detectarlo.
+    """
+    t = _clean(values)
+    codes, uniques = pd.factorize(t, use_na_sentinel=True)
+    parsed = parse_unique(uniques.astype(object), fmt)
+    out = np.full(len(t), np.datetime64("NaT"), dtype="datetime64[ns]")
+    hit = codes >= 0
+    out[hit] = parsed[codes[hit]]
+    return pd.Series(out, index=t.index)
+
+def parse_date_column(values, fmt: Optional[str] = None) -> pd.Series:
+    """Igual que parse_dates pero truncado al día (00:00)."""
+    return parse_dates(values, fmt).dt.normalize()
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    from csv_reader import read_csv
+    col = read_csv(sys.argv[1])[sys.argv[2]]
+    uniq = _clean(col).dropna().unique()
+    print(f"formato detectado: {detect_format(uniq[:SAMPLE_SIZE])} · únicos {len(uniq)} / filas {len(col)}")
+    parsed = parse_dates(col)
+    print(f"sin parsear: {int(parsed.isna().sum())}")
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,12 @@
 Data Quality · Loterías
 - Recorre loterias/data/*.csv
 - Imprime filas por fichero
-- Reglas específicas (entradas.csv: duplicados + fechas)
+- Reglas declarativas por familia de hoja (dq_rules.py: Historico*, Pagos_*)
+  en modo incremental: sólo filas nuevas o cambiadas (hash en dist/dq_state);
+  --full revisa todo
+- Reglas específicas en código (Entradas: duplicados con dup_detect + fechas)
+- Reconciliación Historico* ↔ docs/api/{GAME}.json (reconcile.py)
+- Huecos frente al calendario de sorteos (draw_gaps.py)
 - Genera dist/dq_report.txt para el email/resumen
 Nunca rompe el pipeline: devuelve WARN/FAIL y exit code 0
 """
@@ -12,11 +17,24 @@ Nunca rompe el pipeline: devuelve WARN/FAIL y exit code 0
 import os
 import sys
 import glob
+import argparse
 import textwrap
 from typing import Dict, List, Tuple
 
 import pandas as pd
 
+from run_manifest import stage_unchanged, record_stage, stage_extra
+from stage_timing import span, file_bytes
+from profiling import profiled
+from csv_reader import read_csv, save_cache as save_dialect_cache
+from date_parse import parse_dates
+from snapshot_catalog import select_paths, DEFAULT_SELECT
+from dq_rules import evaluate_incremental, failed as failed_rules, format_result, matches, sheet_name
+from draw_array import GAMES, game_from_path
+from dup_detect import frame_duplicates
+from reconcile import reconcile_frames, format_lines as reconcile_lines, issue_counts, api_path, API_DIR
+import draw_gaps
+
 # --- Rutas --------------------------------------------------------------------
 ROOT_DIR  = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 DATA_DIR  = os.environ.get("LOT_DATA_DIR", os.path.join(ROOT_DIR, "loterias", "data"))
@@ -30,78 +48,77 @@ MAX_DATE = pd.Timestamp.today().normalize() + pd.Timedelta(days=1)  # mañana 00
 # --- Utilidades de lectura robusta -------------------------------------------
 def read_csv_robust(path: str) -> pd.DataFrame:
     """
-    Lee un CSV “a prueba de bombas”:
+    Lee un CSV “a prueba de bombas” con el lector compartido (csv_reader):
     - dtype=str para no forzar tipos
-    - on_bad_lines='skip' para saltar filas rotas
-    - engine='python' para tolerar separadores/quotes raros
+    - dialecto cacheado + motor C; engine='python' sólo si eso falla
+    - nunca lanza: DataFrame vacío si no hay forma de leerlo
     """
     if not os.path.exists(path):
         return pd.DataFrame()
     try:
-        return pd.read_csv(
-            path,
-            dtype=str,
-            encoding="utf-8",
-            on_bad_lines="skip",
-            engine="python",
-        )
+        return read_csv(path)
     except Exception:
-        # Último intento con latin-1
-        try:
-            return pd.read_csv(
-                path,
-                dtype=str,
-                encoding="latin-1",
-                on_bad_lines="skip",
-                engine="python",
-            )
-        except Exception:
-            return pd.DataFrame()
+        return pd.DataFrame()
 
-def list_csvs() -> List[str]:
-    files = sorted(glob.glob(os.path.join(DATA_DIR, "*.csv")))
-    return files
+def list_csvs(spec: str = DEFAULT_SELECT) -> List[str]:
+    """Snapshots a revisar (por defecto el último de cada hoja; ver snapshot_catalog.py)."""
+    return select_paths(DATA_DIR, spec)
 
 # --- Reglas de calidad --------------------------------------------------------
+def form_fields(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Hojas tipo formulario (Entradas_*, Salidas_*): "etiqueta,valor,,,," sin
+    cabecera real; la 1ª fila acaba como nombres de columna. Devuelve
+    {etiqueta, valor} con esa fila incluida. Vacío si la hoja es tabular.
+    """
+    if df.shape[1] < 2 or not any(str(c).startswith("Unnamed:") for c in df.columns):
+        return pd.DataFrame(columns=["etiqueta", "valor"])
+    labels = [str(df.columns[0])] + df.iloc[:, 0].tolist()
+    values = [str(df.columns[1])] + df.iloc[:, 1].tolist()
+    return pd.DataFrame({"etiqueta": labels, "valor": values})
+
 def check_entradas(df: pd.DataFrame) -> Tuple[List[str], List[str]]:
-    """Reglas específicas de entradas.csv"""
+    """Reglas específicas de Entradas (tabular o formulario)"""
     warns, fails = [], []
 
     if df.empty:
         return warns, fails
 
-    # Normalizar espacios
-    df = df.copy()
-    for c in df.columns:
-        df[c] = df[c].astype(str).str.strip()
-
-    # Duplicados: considerar duplicada la fila completa
-    dup_mask = df.duplicated(keep="first")
-    dup_count = int(dup_mask.sum())
-    if dup_count > 0:
-        warns.append(f"entradas.csv: {dup_count} filas duplicadas.")
-
-    # Fechas fuera de rango: buscar columnas con 'fecha'
-    date_cols = [c for c in df.columns if "fecha" in c.lower()]
-    # Si existe una preferente
-    prefer = [c for c in date_cols if "ultimo" in c.lower() or "próximo" in c.lower() or "proximo" in c.lower()]
-    cols_to_check = prefer[:1] or date_cols[:1]  # toma 1 si existe, si no la primera con 'fecha'
-
-    for col in cols_to_check:
-        parsed = pd.to_datetime(df[col], errors="coerce", dayfirst=True)
+    # Duplicados: fila completa sin espacios alrededor (hash por fila, sin copiar la hoja)
+    dups = frame_duplicates(df)
+    if dups["duplicates"] > 0:
+        ex = "; ".join("líneas " + ", ".join(map(str, c)) for c in dups["clusters"][:3])
+        warns.append(f"entradas.csv: {dups['duplicates']} filas duplicadas (p. ej. {ex}).")
+
+    form = form_fields(df)
+    if not form.empty:
+        # Formulario: las fechas son los valores de las etiquetas con 'fecha'
+        dated = form[form["etiqueta"].astype(str).str.lower().str.contains("fecha", na=False)]
+        checks = [(f"'{lbl}'", dated.loc[dated["etiqueta"] == lbl, "valor"]) for lbl in dated["etiqueta"]]
+    else:
+        # Fechas fuera de rango: buscar columnas con 'fecha'
+        date_cols = [c for c in df.columns if "fecha" in c.lower()]
+        # Si existe una preferente
+        prefer = [c for c in date_cols if "ultimo" in c.lower() or "próximo" in c.lower() or "proximo" in c.lower()]
+        cols_to_check = prefer[:1] or date_cols[:1]  # toma 1 si existe, si no la primera con 'fecha'
+        checks = [(f"cols ['{col}']", df[col]) for col in cols_to_check]
+
+    for label, values in checks:
+        parsed = parse_dates(values)
         # Comparar SOLO con Timestamp para evitar TypeError
         bad_mask = parsed.isna() | (~parsed.between(MIN_DATE, MAX_DATE))
         bad_count = int(bad_mask.sum())
         if bad_count > 0:
             warns.append(
-                f"entradas.csv: fechas fuera de rango = {bad_count} (cols ['{col}'])."
+                f"entradas.csv: fechas fuera de rango = {bad_count} ({label})."
             )
 
     return warns, fails
 
-# (ganchos para reglas futuras por tipo de CSV)
+# Reglas en código por patrón de hoja (fnmatch sobre el nombre sin marca de snapshot);
+# las reglas por columnas van declaradas en dq_rules.RULESETS
 CHECKS: Dict[str, callable] = {
-    "entradas.csv": check_entradas,
+    "Entradas": check_entradas,
 }
 
 # --- Render del informe -------------------------------------------------------
@@ -109,11 +126,7 @@ def format_header() -> str:
     return "Data Quality · Loterías · inicio"
 
 def format_footer(total_before: int, total_after: int, warn: int, fail: int) -> str:
-    status = "OK"
-    if fail > 0:
-        status = "FAIL"
-    elif warn > 0:
-        status = "WARN"
+    status = dq_status(warn, fail)
     return f"\nTotal filas antes: {total_before}\nTotal filas después: {total_after}\nData Quality → {status} (warn={warn}, fail={fail})"
 
 def write_report(text: str) -> str:
@@ -122,22 +135,72 @@ def write_report(text: str) -> str:
         f.write(text.rstrip() + "\n")
     return path
 
-# --- Main ---------------------------------------------------------------------
-def main() -> None:
+# --- Ejecución -------------------------------------------------------------------
+DQ_MODULES = ("csv_reader.py", "date_parse.py", "snapshot_catalog.py", "dq_rules.py", "lae_calendar.py",
+              "draw_array.py", "prize_parser.py", "reconcile.py", "rowhash_store.py",
+              "dup_detect.py", "draw_gaps.py")
+
+def stage_inputs_for(csv_paths: List[str]) -> List[str]:
+    here = os.path.dirname(os.path.abspath(__file__))
+    # todo docs/api/*.json también es entrada (reconciliación y huecos)
+    api = sorted(set(glob.glob(os.path.join(API_DIR, "*.json")) + [api_path(g) for g in GAMES]))
+    return (list(csv_paths) + api + [os.path.abspath(__file__)]
+            + [os.path.join(here, m) for m in DQ_MODULES])
+
+def stage_params() -> Dict:
+    """El resultado depende del día (MAX_DATE, retraso de draw_gaps): otro día, otra ejecución."""
+    return {"date": pd.Timestamp.today().strftime("%Y-%m-%d")}
+
+def dq_status(warn: int, fail: int) -> str:
+    return "FAIL" if fail > 0 else ("WARN" if warn > 0 else "OK")
+
+def run_dq(csv_paths: List[str], frames: Dict[str, pd.DataFrame] = None, label: str = DEFAULT_SELECT,
+           full: bool = False) -> Dict:
+    """
+    Revisa 'csv_paths' y escribe dist/dq_report.txt.
+    'frames' = {ruta: DataFrame} con las hojas ya leídas (run_pipeline).
+    'full' revisa todas las filas (y el informe) aunque nada haya cambiado.
+    Devuelve {"skipped", "status", "warn", "fail", "rows_before", "rows_after", "text", "report_path",
+    "rules", "reconcile", "gaps"} ("rules" = {fichero: resultados de dq_rules}, "reconcile" y "gaps" =
+    {GAME: resultado}; no están si se reutiliza el informe).
+    """
+    with span("dq") as s:
+        result = _run_dq(csv_paths, frames, label, full)
+        s.skipped = result["skipped"]
+        s.add(rows=result.get("rows_before", 0), bytes=file_bytes(csv_paths))
+    return result
+
+def _run_dq(csv_paths: List[str], frames: Dict[str, pd.DataFrame], label: str, full: bool) -> Dict:
+    report_path = os.path.join(DIST_DIR, "dq_report.txt")
+    stage_inputs = stage_inputs_for(csv_paths)
+    if not full and stage_unchanged("dq", stage_inputs, params=stage_params()):
+        # Mismas entradas que la última vez: el informe anterior sigue siendo válido
+        print("= Entradas sin cambios desde la última ejecución; se reutiliza dq_report.txt")
+        with open(report_path, "r", encoding="utf-8") as f:
+            text = f.read().rstrip()
+        return {**stage_extra("dq"), "skipped": True, "text": text, "report_path": report_path}
+
     lines: List[str] = []
     lines.append(format_header())
-
-    csv_paths = list_csvs()
-    lines.append(f"CSV detectados: {len(csv_paths)}")
+    lines.append(f"CSV detectados: {len(csv_paths)} (snapshots: {label})")
 
     total_before = 0
     total_after  = 0
     warn_count   = 0
     fail_count   = 0
+    rule_results: Dict[str, List[Dict]] = {}
+    rows_checked = rows_carried = 0
+    historicos: Dict[str, pd.DataFrame] = {}
 
     for path in csv_paths:
         name = os.path.basename(path)
-        df = read_csv_robust(path)
+        if frames is not None:
+            try:
+                df = frames[path]
+            except Exception:
+                df = pd.DataFrame()
+        else:
+            df = read_csv_robust(path)
 
         # Totales
         rows = int(df.shape[0])
@@ -146,14 +209,22 @@ def main() -> None:
         # Mostrar conteo
         lines.append(f"✓ {name}: {rows} filas.")
 
-        # Reglas específicas por nombre
-        checker = None
-        for key, fn in CHECKS.items():
-            if name.lower() == key:
-                checker = fn
-                break
-
-        if checker:
+        # Reglas declarativas (dq_rules.py): una incidencia por regla incumplida
+        results, inc = evaluate_incremental(df, name, full=full)
+        rule_results[name] = results
+        rows_checked += inc["checked"]
+        rows_carried += inc["carried"]
+        for r in failed_rules(results):
+            lines.append(format_result(sheet_name(name), r))
+            if r["level"] == "fail":
+                fail_count += 1
+            else:
+                warn_count += 1
+
+        # Reglas específicas por patrón de hoja
+        for key, checker in CHECKS.items():
+            if not matches(key, name):
+                continue
             warns, fails = checker(df)
             for w in warns:
                 lines.append(f"⚠️  {w}")
@@ -162,23 +233,66 @@ def main() -> None:
             warn_count += len(warns)
             fail_count += len(fails)
 
+        if game_from_path(name):
+            historicos[name] = df
+
         # (hook para limpiezas automáticas si hiciera falta)
         total_after += int(df.shape[0])
 
+    save_dialect_cache()
+
     # Si no hay CSV, deja rastro claro (pero sin romper)
     if not csv_paths:
         lines.append("— Sin CSV en loterias/data —")
 
+    if rows_carried:
+        lines.append(f"· Reglas por fila: revisadas {rows_checked} · ya validadas antes {rows_carried} (dist/dq_state)")
+
+    # Hojas Historico* contra los sorteos publicados por los fetchers
+    reconciled = reconcile_frames(historicos)
+    if reconciled:
+        lines.append("— Reconciliación hojas ↔ docs/api —")
+        lines += reconcile_lines(reconciled)
+        w, f = issue_counts(reconciled)
+        warn_count += w
+        fail_count += f
+
+    # Sorteos que faltan (o sobran) frente al calendario, en la hoja y en docs/api
+    gaps = draw_gaps.gaps_frames(historicos)
+    if gaps:
+        lines.append("— Calendario de sorteos —")
+        lines += draw_gaps.format_lines(gaps)
+        w, f = draw_gaps.issue_counts(gaps)
+        warn_count += w
+        fail_count += f
+
     # Cierre
     lines.append(format_footer(total_before, total_after, warn_count, fail_count))
     report_text = "\n".join(lines)
 
-    # Salida consola
-    print(report_text)
-
     # Guardar para el email
     path = write_report(report_text)
-    print(path)
+    summary = {"status": dq_status(warn_count, fail_count), "warn": warn_count, "fail": fail_count,
+               "rows_before": total_before, "rows_after": total_after,
+               "rows_checked": rows_checked, "rows_carried": rows_carried}
+    record_stage("dq", stage_inputs, [path], extra=summary, params=stage_params())
+    return {**summary, "skipped": False, "text": report_text, "report_path": path, "rules": rule_results,
+            "reconcile": reconciled, "gaps": gaps}
+
+# --- Main ---------------------------------------------------------------------
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Data Quality · Loterías")
+    ap.add_argument("--snapshots", default=DEFAULT_SELECT,
+                    help="snapshots a revisar: latest | all | STAMP | FROM..TO (defecto LOT_SNAPSHOTS o latest)")
+    ap.add_argument("--full", action="store_true",
+                    help="revisa todas las filas, no sólo las nuevas o cambiadas (rehace dist/dq_state)")
+    args = ap.parse_args()
+
+    result = run_dq(list_csvs(args.snapshots), label=args.snapshots, full=args.full)
+
+    # Salida consola
+    print(result["text"])
+    print(result["report_path"])
 
     # No reventar el pipeline (exit 0 siempre)
     # Si algún día quieres fallar en FAIL, cambia a:
@@ -186,4 +300,5 @@ def main() -> None:
     sys.exit(0)
 
 if __name__ == "__main__":
-    main()
+    with profiled("dq_loterias"):
+        main()
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/dq_rules.py
+"""
+Reglas declarativas de Data Quality · Loterías
+
+Las reglas se declaran por familia de hoja (RULESETS) y se aplican a las hojas
+cuyo nombre (sin la marca _YYYYMMDD_HHMM) encaja con alguno de sus patrones
+(fnmatch, sin distinguir mayúsculas). Cada regla es una operación por columnas
+(NumPy/pandas) que devuelve la máscara de filas que la incumplen; nada de
+bucles por fila.
+
+Tipos de regla:
+  required    columnas sin valor
+  range       enteros dentro de [min, max] (texto no numérico también cuenta)
+  distinct    sin números repetidos dentro de la misma fila (N1..N6)
+  date        fecha parseable
+  unique      fecha sin repetir en la hoja
+  weekday     fecha en día de sorteo del juego (lae_calendar.py)
+
+Cada resultado lleva el nº de filas afectadas y unas pocas filas de ejemplo
+(línea del CSV, contando la cabecera como línea 1, y valores).
+
+Modo incremental (evaluate_incremental): las reglas por fila sólo se aplican a
+filas nuevas o cambiadas; las que ya pasaron se guardan por hash en
+dist/dq_state (rowhash_store.py). 'unique' siempre mira la hoja entera.
+
+Uso:
+  python ops/scripts/dq_rules.py loterias/data/*.csv
+  python ops/scripts/dq_rules.py --bench [--rows 50000]
+"""
+
+import os, re, sys, json, time, hashlib, argparse
+from fnmatch import fnmatch
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from date_parse import parse_unique
+from draw_array import GAME_BY_SHEET
+from lae_calendar import is_draw_day
+from prize_parser import game_for_sheet as prize_game_for_sheet
+import rowhash_store
+
+SAMPLE_ROWS = 3
+
+# --- Registro -------------------------------------------------------------------------
+def _nums(k: int) -> List[str]:
+    return [f"N{i}" for i in range(1, k + 1)]
+
+def _historico(k: int, top: int, extras: List[Dict]) -> List[Dict]:
+    return [
+        {"id": "fecha_valida", "kind": "date", "col": "FECHA", "level": "fail"},
+        {"id": "fecha_unica", "kind": "unique", "col": "FECHA", "level": "fail"},
+        {"id": "dia_sorteo", "kind": "weekday", "col": "FECHA", "level": "warn"},
+        {"id": "numeros_presentes", "kind": "required", "cols": _nums(k), "level": "fail"},
+        {"id": "numeros_rango", "kind": "range", "cols": _nums(k), "min": 1, "max": top, "level": "fail"},
+        {"id": "numeros_distintos", "kind": "distinct", "cols": _nums(k), "level": "fail"},
+    ] + extras
+
+RULESETS: List[Dict] = [
+    {"sheets": ["Historico", "HistoricoBono"], "rules": _historico(6, 49, [
+        {"id": "complementario_rango", "kind": "range", "cols": ["Complementario"], "min": 1, "max": 49, "level": "fail"},
+        {"id": "reintegro_rango", "kind": "range", "cols": ["Reintegro"], "min": 0, "max": 9, "level": "fail"},
+    ])},
+    {"sheets": ["HistoricoEuro"], "rules": _historico(5, 50, [
+        {"id": "estrellas_presentes", "kind": "required", "cols": ["E1", "E2"], "level": "fail"},
+        {"id": "estrellas_rango", "kind": "range", "cols": ["E1", "E2"], "min": 1, "max": 12, "level": "fail"},
+        {"id": "estrellas_distintas", "kind": "distinct", "cols": ["E1", "E2"], "level": "fail"},
+    ])},
+    {"sheets": ["HistoricoGordo"], "rules": _historico(5, 54, [
+        {"id": "clave_rango", "kind": "range", "cols": ["Reintegro"], "min": 0, "max": 9, "level": "fail"},
+    ])},
+    {"sheets": ["Pagos_*", "Raw_Pagos_*"], "rules": [
+        {"id": "fecha_valida", "kind": "date", "col": "Fecha Sorteo", "level": "warn"},
+        {"id": "dia_sorteo", "kind": "weekday", "col": "Fecha Sorteo", "level": "warn"},
+    ]},
+]
+
+def sheet_name(path_or_name: str) -> str:
+    """'HistoricoEuro_20250921_1456.csv' -> 'HistoricoEuro'."""
+    stem = os.path.splitext(os.path.basename(path_or_name))[0]
+    return re.sub(r"_\d{8}_\d{4}$", "", stem)
+
+def matches(pattern: str, path_or_name: str) -> bool:
+    return fnmatch(sheet_name(path_or_name).lower(), pattern.lower())
+
+def rules_for(path_or_name: str) -> List[Dict]:
+    out: List[Dict] = []
+    for rs in RULESETS:
+        if any(matches(p, path_or_name) for p in rs["sheets"]):
+            out += rs["rules"]
+    return out
+
+def game_for(path_or_name: str) -> Optional[str]:
+    sheet = sheet_name(path_or_name)
+    return GAME_BY_SHEET.get(sheet) or prize_game_for_sheet(sheet)
+
+# --- Columnas (parseadas una vez por hoja y compartidas entre reglas) -----------------
+class SheetFrame:
+    """
+    Columnas de una hoja parseadas sobre sus valores únicos (N1..N6 tienen como
+    mucho 54 distintos, FECHA uno por sorteo) y expandidas con los códigos.
+    """
+    def __init__(self, df: pd.DataFrame, game: Optional[str] = None):
+        self.df = df
+        self.game = game
+        self._codes: Dict[str, tuple] = {}
+        self._num: Dict[str, np.ndarray] = {}
+        self._date: Dict[str, pd.Series] = {}
+        self._parent: Optional["SheetFrame"] = None
+        self._pos: Optional[np.ndarray] = None
+
+    def take(self, positions: np.ndarray) -> "SheetFrame":
+        """Vista de unas filas que reutiliza lo ya parseado de la hoja completa."""
+        sub = SheetFrame(self.df.iloc[positions], self.game)
+        sub._parent, sub._pos = self, positions
+        return sub
+
+    def codes(self, col: str):
+        """(códigos, únicos sin espacios); -1 = vacío."""
+        if col not in self._codes and self._parent is not None:
+            codes, u = self._parent.codes(col)
+            self._codes[col] = (codes[self._pos], u)
+        if col not in self._codes:
+            codes, uniques = pd.factorize(self.df[col].to_numpy(dtype=object), use_na_sentinel=True)
+            u = np.array([str(v).strip() for v in uniques], dtype=object)
+            keep = u != ""
+            if not keep.all():
+                # los vacíos pasan a -1 y se renumera sobre los únicos no vacíos
+                remap = np.where(keep, np.cumsum(keep) - 1, -1)
+                codes = np.where(codes >= 0, remap[np.maximum(codes, 0)], -1)
+                u = u[keep]
+            self._codes[col] = (codes, u)
+        return self._codes[col]
+
+    def present(self, col: str) -> np.ndarray:
+        return self.codes(col)[0] >= 0
+
+    def _expand(self, col: str, values: np.ndarray, fill):
+        codes = self.codes(col)[0]
+        return np.where(codes >= 0, values[np.maximum(codes, 0)] if len(values) else fill, fill)
+
+    def num(self, col: str) -> np.ndarray:
+        """float64 con NaN donde no hay número."""
+        if col not in self._num and self._parent is not None:
+            self._num[col] = self._parent.num(col)[self._pos]
+        if col not in self._num:
+            s = self.df[col]
+            if pd.api.types.is_numeric_dtype(s):
+                self._num[col] = s.to_numpy(dtype="float64", na_value=np.nan)
+            else:
+                u = pd.to_numeric(pd.Series(self.codes(col)[1], dtype=object), errors="coerce").to_numpy(dtype="float64")
+                self._num[col] = self._expand(col, u, np.nan)
+        return self._num[col]
+
+    def date(self, col: str) -> pd.Series:
+        if col not in self._date and self._parent is not None:
+            self._date[col] = self._parent.date(col).iloc[self._pos].reset_index(drop=True)
+        if col not in self._date:
+            s = self.df[col]
+            if pd.api.types.is_datetime64_any_dtype(s):
+                d = s.reset_index(drop=True)
+            else:
+                u = parse_unique(self.codes(col)[1])
+                d = pd.Series(self._expand(col, u, np.datetime64("NaT", "ns")), dtype="datetime64[ns]")
+            self._date[col] = d
+        return self._date[col]
+
+    def value(self, col: str, i: int) -> str:
+        v = self.df[col].iloc[i]
+        return "" if pd.isna(v) else str(v).strip()
+
+# --- Tipos de regla (máscara de filas que incumplen) -----------------------------------
+def _required(sf: SheetFrame, rule: Dict) -> np.ndarray:
+    return np.logical_or.reduce([~sf.present(c) for c in rule["cols"]])
+
+def _range(sf: SheetFrame, rule: Dict) -> np.ndarray:
+    bad = np.zeros(len(sf.df), dtype=bool)
+    for c in rule["cols"]:
+        v = sf.num(c)
+        with np.errstate(invalid="ignore"):
+            out = (v < rule["min"]) | (v > rule["max"]) | (v != np.floor(v))
+        bad |= (sf.present(c) & np.isnan(v)) | (out & ~np.isnan(v))
+    return bad
+
+def _distinct(sf: SheetFrame, rule: Dict) -> np.ndarray:
+    m = np.sort(np.column_stack([sf.num(c) for c in rule["cols"]]), axis=1)  # NaN al final
+    return (np.diff(m, axis=1) == 0).any(axis=1)
+
+def _date(sf: SheetFrame, rule: Dict) -> np.ndarray:
+    return sf.date(rule["col"]).isna().to_numpy()
+
+def _unique(sf: SheetFrame, rule: Dict) -> np.ndarray:
+    d = sf.date(rule["col"])
+    return (d.duplicated(keep=False) & d.notna()).to_numpy()
+
+def _weekday(sf: SheetFrame, rule: Dict) -> np.ndarray:
+    d = sf.date(rule["col"])
+    if not sf.game:
+        return np.zeros(len(d), dtype=bool)
+    return d.notna().to_numpy() & ~is_draw_day(sf.game, d)
+
+KINDS = {
+    "required": _required,
+    "range": _range,
+    "distinct": _distinct,
+    "date": _date,
+    "unique": _unique,
+    "weekday": _weekday,
+}
+
+def describe(rule: Dict, game: Optional[str] = None) -> str:
+    cols = rule.get("cols") or [rule["col"]]
+    label = f"{cols[0]}..{cols[-1]}" if len(cols) > 2 else "/".join(cols)
+    kind = rule["kind"]
+    if kind == "required":
+        return f"{label} vacíos"
+    if kind == "range":
+        return f"{label} fuera de {rule['min']}..{rule['max']}"
+    if kind == "distinct":
+        return f"{label} repetidos en el mismo sorteo"
+    if kind == "date":
+        return f"{label} no es una fecha"
+    if kind == "unique":
+        return f"{label} duplicada"
+    if kind == "weekday":
+        return f"{label} fuera de los días de sorteo de {game or '?'}"
+    return rule["id"]
+
+# --- Evaluación ------------------------------------------------------------------------
+# Tipos que sólo miran la propia fila (aptos para DQ incremental); 'unique' necesita la hoja entera
+ROW_KINDS = {"required", "range", "distinct", "date", "weekday"}
+
+def check_rows(df: pd.DataFrame, name: str, rules: List[Dict], sample: int = SAMPLE_ROWS,
+               positions: Optional[np.ndarray] = None, sf: Optional[SheetFrame] = None):
+    """
+    Aplica 'rules' a 'df'. Devuelve (resultados, máscara de filas que incumplen alguna).
+    'positions' = posición de cada fila de 'df' en la hoja completa (para las líneas de ejemplo).
+    'sf' = columnas ya parseadas de 'df' (p. ej. SheetFrame.take de la hoja completa).
+    """
+    game = game_for(name)
+    sf = sf if sf is not None else SheetFrame(df, game)
+    bad = np.zeros(len(df), dtype=bool)
+    results = []
+    for rule in rules:
+        cols = rule.get("cols") or [rule["col"]]
+        res = {"id": rule["id"], "level": rule["level"], "count": 0, "rows": len(df),
+               "missing": [c for c in cols if c not in df.columns], "samples": []}
+        if res["missing"]:
+            res["message"] = f"faltan columnas {', '.join(res['missing'])}"
+            bad[:] = True  # sin la columna no se puede dar ninguna fila por buena
+        elif rule["kind"] == "weekday" and not game:
+            continue
+        else:
+            mask = KINDS[rule["kind"]](sf, rule)
+            bad |= mask
+            hits = np.flatnonzero(mask)
+            res["count"] = int(hits.size)
+            key = [rule["col"]] if "col" in rule else []
+            show = [c for c in dict.fromkeys(key + cols + ["FECHA"]) if c in df.columns]
+            for i in hits[:sample]:
+                line = int(positions[i] if positions is not None else i) + 2
+                res["samples"].append({"line": line, **{c: sf.value(c, i) for c in show}})
+            res["message"] = describe(rule, game)
+        results.append(res)
+    return results, bad
+
+def evaluate(df: pd.DataFrame, name: str, rules: Optional[List[Dict]] = None,
+             sample: int = SAMPLE_ROWS) -> List[Dict]:
+    """
+    Aplica a 'df' las reglas de la hoja 'name' (o 'rules').
+    Devuelve [{id, level, count, rows, missing, samples, message}], uno por regla.
+    """
+    rules = rules_for(name) if rules is None else rules
+    return check_rows(df, name, rules, sample)[0]
+
+def rules_signature(name: str) -> str:
+    """Firma de las reglas de la hoja + código de reglas y calendario (invalida el estado incremental)."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    h = hashlib.sha256(json.dumps(rules_for(name), sort_keys=True).encode("utf-8"))
+    for mod in ("dq_rules.py", "lae_calendar.py", "date_parse.py"):
+        with open(os.path.join(here, mod), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+def evaluate_incremental(df: pd.DataFrame, name: str, full: bool = False,
+                         state_dir: Optional[str] = None, sample: int = SAMPLE_ROWS):
+    """
+    Como evaluate, pero las reglas por fila sólo se aplican a las filas cuyo hash
+    no está entre las que ya pasaron (rowhash_store). Las que fallan nunca se
+    guardan, así que se vuelven a revisar y los recuentos coinciden con una
+    revisión completa. 'full' ignora el estado (y lo rehace).
+    Devuelve (resultados, {"checked", "carried"}).
+    """
+    rules = rules_for(name)
+    if not rules or df.empty:
+        return evaluate(df, name, rules, sample), {"checked": len(df), "carried": 0}
+    state_dir = state_dir or rowhash_store.STATE_DIR
+    sheet, sig = rowhash_store.sheet_key(name), rules_signature(name)
+
+    keys = rowhash_store.row_keys(df)
+    stored = rowhash_store.EMPTY if full else rowhash_store.load(sheet, sig, state_dir)
+    known = rowhash_store.contains(stored, keys)
+    todo = np.flatnonzero(~known)
+
+    row_rules = [r for r in rules if r["kind"] in ROW_KINDS]
+    sheet_rules = [r for r in rules if r["kind"] not in ROW_KINDS]
+    # las fechas se parsean una vez sobre la hoja completa ('unique' las necesita todas)
+    sf = SheetFrame(df, game_for(name))
+    row_res, bad = check_rows(df.iloc[todo], name, row_rules, sample, positions=todo, sf=sf.take(todo))
+    sheet_res, _ = check_rows(df, name, sheet_rules, sample, sf=sf)
+    # sólo se conservan hashes de filas que siguen en la hoja (el estado no crece sin límite)
+    rowhash_store.save(sheet, np.concatenate([keys[known], keys[todo][~bad]]), sig, state_dir)
+
+    by_id = {r["id"]: r for r in row_res + sheet_res}
+    for r in row_res:
+        r["rows"] = len(df)
+    results = [by_id[r["id"]] for r in rules if r["id"] in by_id]
+    return results, {"checked": int(len(todo)), "carried": int(known.sum())}
+
+def failed(results: List[Dict]) -> List[Dict]:
+    return [r for r in results if r["count"] or r["missing"]]
+
+def format_result(sheet: str, r: Dict) -> str:
+    icon = "❌ " if r["level"] == "fail" else "⚠️ "
+    if r["missing"]:
+        return f"{icon} {sheet}: {r['message']}"
+    ex = "; ".join(f"línea {s['line']}: " + " ".join(f"{k}={v}" for k, v in s.items() if k != "line")
+                   for s in r["samples"])
+    return f"{icon} {sheet}: {r['message']} → {r['count']} filas (p. ej. {ex})"
+
+# --- Bench -----------------------------------------------------------------------------
+def synthetic_historico(rows: int, seed: int = 7) -> pd.DataFrame:
+    """Histórico de Primitiva con rows sorteos (texto, como llega de las hojas) y algo de ruido."""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("1900-01-01", periods=rows * 3, freq="D")
+    days = days[np.isin(days.weekday, [0, 3, 5])][:rows]
+    nums = np.sort(np.argsort(rng.random((len(days), 49)), axis=1)[:, :6] + 1, axis=1)
+    df = pd.DataFrame(nums.astype(str), columns=_nums(6))
+    df.insert(0, "FECHA", days.strftime("%d/%m/%Y"))
+    df["Complementario"] = rng.integers(1, 50, len(df)).astype(str)
+    df["Reintegro"] = rng.integers(0, 10, len(df)).astype(str)
+    bad = rng.choice(len(df), max(1, len(df) // 1000), replace=False)
+    df.loc[bad, "N6"] = "50"
+    return df
+
+def bench(rows: int) -> None:
+    df = synthetic_historico(rows)
+    evaluate(df, "Historico")  # calentar cachés de parseo de fechas
+    t0 = time.perf_counter()
+    res = evaluate(df, "Historico")
+    dt = time.perf_counter() - t0
+    print(f"{len(df)} filas · {len(res)} reglas · {dt * 1000:.1f} ms")
+    for r in failed(res):
+        print(format_result("Historico", r))
+
+def main():
+    ap = argparse.ArgumentParser(description="Reglas declarativas de DQ por familia de hoja")
+    ap.add_argument("csv", nargs="*")
+    ap.add_argument("--bench", action="store_true")
+    ap.add_argument("--rows", type=int, default=50000)
+    args = ap.parse_args()
+    if args.bench:
+        bench(args.rows)
+        return
+    if not args.csv:
+        print(__doc__)
+        sys.exit(1)
+    from csv_reader import read_csv
+    for p in args.csv:
+        sheet = sheet_name(p)
+        res = evaluate(read_csv(p), p)
+        bad = failed(res)
+        print(f"{os.path.basename(p)}: {len(res)} reglas, {len(bad)} con incidencias")
+        for r in bad:
+            print("  " + format_result(sheet, r))
+
+if __name__ == "__main__":
+    main()
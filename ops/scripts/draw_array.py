@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/draw_array.py
+"""
+DrawArray · representación compacta de sorteos (NumPy)
+
+Cada sorteo se guarda como máscaras de bits alineadas por posición:
+  - numbers        uint64  (bit n = número n, 1..54)
+  - estrellas      uint16  (1..12, Euromillones)
+  - complementario uint64  (1..49)
+  - reintegro      uint16  (0..9)
+  - clave          uint16  (0..9, El Gordo)
+  - dates          datetime64[D]
+  - games          uint8   (índice en GAMES)
+
+Una máscara a 0 significa "campo ausente". El orden de los números no se
+conserva: se devuelven siempre en orden ascendente (igual que las hojas).
+Los números repetidos o fuera de rango (filas corruptas) no son representables
+y se pierden en la conversión: eso es trabajo de DQ, no de este tipo.
+
+Contar aciertos de una apuesta contra todo el histórico es un AND + popcount
+vectorizado, sin construir sets de Python por pareja.
+
+Uso:
+  python ops/scripts/draw_array.py --bench [--draws 20000] [--bets 200]
+  python ops/scripts/draw_array.py --csv loterias/data/Historico.csv --to-json
+"""
+
+import os, re, sys, json, time, random, argparse
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+GAMES = ("PRIMITIVA", "BONOLOTO", "GORDO", "EURO")
+GAME_CODE = {g: i for i, g in enumerate(GAMES)}
+
+# Hojas Historico* del Sheet maestro -> juego
+GAME_BY_SHEET = {
+    "Historico":      "PRIMITIVA",
+    "HistoricoBono":  "BONOLOTO",
+    "HistoricoGordo": "GORDO",
+    "HistoricoEuro":  "EURO",
+}
+SHEET_BY_GAME = {v: k for k, v in GAME_BY_SHEET.items()}
+
+# Nº de bolas principales por juego (coincide con las columnas N1..Nk de las hojas)
+MAIN_COUNT = {"PRIMITIVA": 6, "BONOLOTO": 6, "GORDO": 5, "EURO": 5}
+MAX_NUMBER_COLS = max(MAIN_COUNT.values())
+
+# Campos extra: clave JSON -> (columna(s) CSV, dtype de la máscara)
+EXTRA_FIELDS = ("complementario", "reintegro", "clave", "estrellas")
+MASK_DTYPE = {
+    "numbers": np.uint64,
+    "complementario": np.uint64,
+    "reintegro": np.uint16,
+    "clave": np.uint16,
+    "estrellas": np.uint16,
+}
+CSV_EXTRA = {
+    "complementario": ["Complementario"],
+    "reintegro": ["Reintegro"],
+    "clave": ["Clave"],
+    "estrellas": ["E1", "E2"],
+}
+
+DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y")
+
+# --- popcount ------------------------------------------------------------------
+_POP8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def popcount(x: np.ndarray) -> np.ndarray:
+    """Nº de bits a 1 por elemento (np.bitwise_count si existe; si no, tabla de 8 bits)."""
+    x = np.asarray(x)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x).astype(np.uint8)
+    u = np.ascontiguousarray(x.astype(np.uint64))
+    return _POP8[u.view(np.uint8)].reshape(u.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+# --- Conversión números <-> máscara ---------------------------------------------
+def to_mask(nums: Iterable[Any], dtype=np.uint64) -> int:
+    """[5, 6, 8] -> máscara con los bits 5, 6 y 8 encendidos (ignora valores no numéricos)."""
+    m = 0
+    for n in nums or []:
+        try:
+            v = int(n)
+        except (TypeError, ValueError):
+            continue
+        if 0 <= v < np.iinfo(dtype).bits:
+            m |= 1 << v
+    return m
+
+def from_mask(mask: int) -> List[int]:
+    """Máscara -> lista ascendente de números."""
+    m = int(mask)
+    out, n = [], 0
+    while m:
+        if m & 1:
+            out.append(n)
+        m >>= 1
+        n += 1
+    return out
+
+def _masks_from_matrix(vals: np.ndarray, dtype) -> np.ndarray:
+    """Matriz (n, k) de enteros (-1 = vacío) -> vector de máscaras (n,)."""
+    bits = np.iinfo(dtype).bits
+    ok = (vals >= 0) & (vals < bits)
+    shifted = np.where(ok, np.left_shift(np.ones_like(vals, dtype=np.uint64),
+                                         np.where(ok, vals, 0).astype(np.uint64)), 0)
+    return np.bitwise_or.reduce(shifted.astype(np.uint64), axis=1).astype(dtype)
+
+def _int_matrix(df: pd.DataFrame, cols: Sequence[str]) -> np.ndarray:
+    if not cols:
+        return np.full((len(df), 0), -1, dtype=np.int64)
+    block = df.reindex(columns=list(cols)).apply(pd.to_numeric, errors="coerce")
+    return block.fillna(-1).to_numpy(dtype=np.int64)
+
+def parse_dates(values: Iterable[Any]) -> np.ndarray:
+    """Fechas 'dd/mm/aaaa' o 'aaaa-mm-dd' (con o sin hora) -> datetime64[D] (NaT si no parsea)."""
+    s = pd.Series(list(values), dtype=object).astype(str).str.strip().str.slice(0, 10)
+    out = pd.Series(pd.NaT, index=s.index, dtype="datetime64[ns]")
+    for fmt in DATE_FORMATS:
+        todo = out.isna()
+        if not todo.any():
+            break
+        out[todo] = pd.to_datetime(s[todo], format=fmt, errors="coerce")
+    return out.to_numpy(dtype="datetime64[D]")
+
+def game_from_path(path: str) -> Optional[str]:
+    """'HistoricoBono_20250921_1456.csv' -> 'BONOLOTO'."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    stem = re.sub(r"_\d{8}_\d{4}$", "", stem)
+    for sheet, game in GAME_BY_SHEET.items():
+        if stem.lower() == sheet.lower():
+            return game
+    return None
+
+# --- Tipo principal -------------------------------------------------------------
+class DrawArray:
+    """Colección de sorteos en columnas NumPy alineadas."""
+
+    __slots__ = ("games", "dates", "numbers", "complementario", "reintegro", "clave", "estrellas")
+
+    def __init__(self, games, dates, numbers, complementario=None, reintegro=None,
+                 clave=None, estrellas=None):
+        n = len(numbers)
+        extras = {"complementario": complementario, "reintegro": reintegro,
+                  "clave": clave, "estrellas": estrellas}
+        self.games = np.asarray(games, dtype=np.uint8)
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.numbers = np.asarray(numbers, dtype=np.uint64)
+        for name, arr in extras.items():
+            if arr is None:
+                arr = np.zeros(n, dtype=MASK_DTYPE[name])
+            setattr(self, name, np.asarray(arr, dtype=MASK_DTYPE[name]))
+        if not (len(self.games) == len(self.dates) == n):
+            raise ValueError("DrawArray: columnas con longitudes distintas")
+
+    # ---- básicos ----
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def __getitem__(self, idx) -> "DrawArray":
+        if isinstance(idx, (int, np.integer)):
+            idx = slice(idx, idx + 1 if idx != -1 else None)
+        return DrawArray(self.games[idx], self.dates[idx], self.numbers[idx],
+                         **{f: getattr(self, f)[idx] for f in EXTRA_FIELDS})
+
+    def __repr__(self) -> str:
+        return f"DrawArray(n={len(self)}, games={sorted(set(self.game_names()))})"
+
+    def game_names(self) -> List[str]:
+        return [GAMES[i] for i in self.games]
+
+    def nbytes(self) -> int:
+        return int(sum(getattr(self, f).nbytes for f in self.__slots__))
+
+    def for_game(self, game: str) -> "DrawArray":
+        return self[self.games == GAME_CODE[game]]
+
+    def sort_by_date(self, descending: bool = False) -> "DrawArray":
+        order = np.argsort(self.dates, kind="stable")
+        return self[order[::-1] if descending else order]
+
+    @classmethod
+    def concat(cls, parts: Sequence["DrawArray"]) -> "DrawArray":
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        return cls(*[np.concatenate([getattr(p, f) for p in parts]) for f in cls.__slots__])
+
+    @classmethod
+    def empty(cls) -> "DrawArray":
+        return cls([], [], [])
+
+    # ---- aciertos ----
+    def hits(self, bet: Iterable[int]) -> np.ndarray:
+        """Aciertos de números principales de una apuesta en cada sorteo -> uint8 (n,)."""
+        return popcount(self.numbers & np.uint64(to_mask(bet)))
+
+    def hits_many(self, bets: Sequence[Iterable[int]]) -> np.ndarray:
+        """Aciertos de varias apuestas -> matriz uint8 (n_apuestas, n_sorteos)."""
+        masks = np.array([to_mask(b) for b in bets], dtype=np.uint64)
+        return popcount(masks[:, None] & self.numbers[None, :])
+
+    def star_hits(self, stars: Iterable[int]) -> np.ndarray:
+        return popcount(self.estrellas & np.uint16(to_mask(stars, np.uint16)))
+
+    def has_complementario(self, bet: Iterable[int]) -> np.ndarray:
+        return (self.complementario & np.uint64(to_mask(bet))) != 0
+
+    def has_reintegro(self, r: int) -> np.ndarray:
+        return (self.reintegro & np.uint16(1 << int(r))) != 0
+
+    # ---- JSON (docs/api/*.json) ----
+    @classmethod
+    def from_draws(cls, draws: Iterable[Dict[str, Any]], game: Optional[str] = None) -> "DrawArray":
+        """
+        Lista de dicts {"game","date","numbers",...} (formato de los fetchers) -> DrawArray.
+        Los sorteos sin juego o con un juego desconocido se descartan con un aviso.
+        """
+        draws = list(draws)
+        games, dates, cols = [], [], {f: [] for f in ("numbers",) + EXTRA_FIELDS}
+        unknown: Dict[str, int] = {}
+        for d in draws:
+            name = str(d.get("game") or game or "").upper()
+            if name not in GAME_CODE:
+                unknown[name] = unknown.get(name, 0) + 1
+                continue
+            games.append(GAME_CODE[name])
+            dates.append(d.get("date") or "")
+            cols["numbers"].append(to_mask(d.get("numbers")))
+            for f in ("complementario", "reintegro", "clave"):
+                v = d.get(f)
+                cols[f].append(to_mask([] if v in (None, "") else [v], MASK_DTYPE[f]))
+            cols["estrellas"].append(to_mask(d.get("estrellas"), np.uint16))
+        if unknown:
+            detail = ", ".join(f"{g or '(sin juego)'}: {n}" for g, n in sorted(unknown.items()))
+            print(f"⚠️  DrawArray: {sum(unknown.values())} sorteos descartados por juego desconocido ({detail})")
+        return cls(games, parse_dates(dates),
+                   np.array(cols["numbers"], dtype=np.uint64),
+                   **{f: np.array(cols[f], dtype=MASK_DTYPE[f]) for f in EXTRA_FIELDS})
+
+    def to_draws(self, date_format: str = "%Y-%m-%d") -> List[Dict[str, Any]]:
+        """DrawArray -> lista de dicts con el mismo esquema que escriben los fetchers."""
+        out: List[Dict[str, Any]] = []
+        dates = pd.to_datetime(self.dates).strftime(date_format)
+        for i in range(len(self)):
+            row: Dict[str, Any] = {
+                "game": GAMES[self.games[i]],
+                "date": "" if pd.isna(self.dates[i]) else dates[i],
+                "numbers": from_mask(self.numbers[i]),
+            }
+            for f in ("complementario", "reintegro", "clave"):
+                vals = from_mask(getattr(self, f)[i])
+                if vals:
+                    row[f] = vals[0]
+            stars = from_mask(self.estrellas[i])
+            if stars:
+                row["estrellas"] = stars
+            out.append(row)
+        return out
+
+    # ---- CSV (hojas Historico*) ----
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, game: str) -> "DrawArray":
+        """DataFrame con columnas FECHA, N1..Nk y extras de la hoja Historico* -> DrawArray."""
+        game = game.upper()
+        cols = {str(c).strip(): c for c in df.columns}
+        k = MAX_NUMBER_COLS
+        main = _int_matrix(df, [cols[f"N{i}"] for i in range(1, k + 1) if f"N{i}" in cols])
+        extras = {}
+        for f, names in CSV_EXTRA.items():
+            present = [cols[c] for c in names if c in cols]
+            dtype = MASK_DTYPE[f]
+            extras[f] = _masks_from_matrix(_int_matrix(df, present), dtype) if present \
+                else np.zeros(len(df), dtype=dtype)
+        # En la hoja de El Gordo el número clave se exporta como "Reintegro"
+        if game == "GORDO" and not extras["clave"].any():
+            extras["clave"], extras["reintegro"] = extras["reintegro"], np.zeros(len(df), np.uint16)
+        fecha = cols.get("FECHA") or next((c for k_, c in cols.items() if "fecha" in k_.lower()), None)
+        dates = parse_dates(df[fecha] if fecha is not None else [""] * len(df))
+        return cls(np.full(len(df), GAME_CODE[game], dtype=np.uint8), dates,
+                   _masks_from_matrix(main, np.uint64), **extras)
+
+    @classmethod
+    def from_csv(cls, path: str, game: Optional[str] = None) -> "DrawArray":
+        game = game or game_from_path(path)
+        if not game:
+            raise ValueError(f"No se puede inferir el juego de {os.path.basename(path)}")
+        return cls.from_frame(pd.read_csv(path, dtype=str, encoding="utf-8"), game)
+
+    def to_frame(self, game: Optional[str] = None, date_format: str = "%d/%m/%Y") -> pd.DataFrame:
+        """DrawArray (un solo juego) -> DataFrame con las columnas de la hoja Historico*."""
+        if game is None:
+            names = set(self.game_names())
+            if len(names) > 1:
+                raise ValueError("to_frame requiere un único juego; usa for_game()")
+            game = names.pop() if names else "PRIMITIVA"
+        k = MAIN_COUNT[game]
+        data: Dict[str, List[Any]] = {"FECHA": list(pd.to_datetime(self.dates).strftime(date_format))}
+        nums = [from_mask(m) for m in self.numbers]
+        for i in range(k):
+            data[f"N{i + 1}"] = [n[i] if len(n) > i else "" for n in nums]
+        first = lambda arr: [(from_mask(m) or [""])[0] for m in arr]
+        if game in ("PRIMITIVA", "BONOLOTO"):
+            data["Complementario"] = first(self.complementario)
+            data["Reintegro"] = first(self.reintegro)
+        elif game == "GORDO":
+            data["Reintegro"] = first(self.clave)
+        elif game == "EURO":
+            stars = [from_mask(m) for m in self.estrellas]
+            data["E1"] = [s[0] if len(s) > 0 else "" for s in stars]
+            data["E2"] = [s[1] if len(s) > 1 else "" for s in stars]
+        return pd.DataFrame(data)
+
+# --- Benchmark -----------------------------------------------------------------
+def synthetic_draws(n: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    base = np.datetime64("2000-01-01")
+    return [{"game": "PRIMITIVA",
+             "date": str(base + np.timedelta64(i, "D")),
+             "numbers": sorted(rnd.sample(range(1, 50), 6)),
+             "complementario": rnd.randint(1, 49),
+             "reintegro": rnd.randint(0, 9)} for i in range(n)]
+
+def bench(n_draws: int = 20000, n_bets: int = 200, seed: int = 7) -> Dict[str, Any]:
+    """Compara aciertos dict+set vs DrawArray (AND + popcount)."""
+    rnd = random.Random(seed + 1)
+    draws = synthetic_draws(n_draws, seed)
+    bets = [rnd.sample(range(1, 50), 6) for _ in range(n_bets)]
+
+    t0 = time.perf_counter()
+    ref = [[len(set(b) & set(d["numbers"])) for d in draws] for b in bets]
+    t_dict = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    arr = DrawArray.from_draws(draws)
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    got = arr.hits_many(bets)
+    t_mask = time.perf_counter() - t0
+
+    if not np.array_equal(got, np.array(ref, dtype=np.uint8)):
+        raise AssertionError("DrawArray.hits_many no coincide con la referencia dict/set")
+    return {
+        "draws": n_draws, "bets": n_bets,
+        "dict_set_s": round(t_dict, 4),
+        "drawarray_build_s": round(t_build, 4),
+        "drawarray_hits_s": round(t_mask, 4),
+        "speedup": round(t_dict / t_mask, 1) if t_mask else None,
+        "bytes_dict_numbers": sum(sys.getsizeof(d["numbers"]) + sum(sys.getsizeof(x) for x in d["numbers"])
+                                  for d in draws),
+        "bytes_drawarray": arr.nbytes(),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="DrawArray: benchmark y conversión CSV/JSON")
+    ap.add_argument("--bench", action="store_true", help="benchmark contra la representación dict")
+    ap.add_argument("--draws", type=int, default=20000)
+    ap.add_argument("--bets", type=int, default=200)
+    ap.add_argument("--csv", help="hoja Historico*.csv a convertir")
+    ap.add_argument("--json", help="docs/api/<GAME>.json a convertir")
+    ap.add_argument("--to-json", action="store_true", help="emite los sorteos como JSON")
+    ap.add_argument("--to-csv", action="store_true", help="emite los sorteos como CSV (un juego)")
+    args = ap.parse_args()
+
+    if args.bench:
+        print(json.dumps(bench(args.draws, args.bets), ensure_ascii=False, indent=2))
+        return
+
+    if args.csv:
+        arr = DrawArray.from_csv(args.csv)
+    elif args.json:
+        with open(args.json, "r", encoding="utf-8") as f:
+            arr = DrawArray.from_draws(json.load(f).get("results", []))
+    else:
+        ap.error("indica --bench, --csv o --json")
+        return
+
+    if args.to_csv:
+        arr.to_frame().to_csv(sys.stdout, index=False)
+    else:
+        json.dump({"results": arr.to_draws()}, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/draw_gaps.py
+"""
+Huecos de sorteos frente al calendario oficial (lae_calendar)
+
+Un bloqueo del WAF en fetch_lae_by_dates o una actualización manual de la
+hoja que no se hizo dejan sorteos sin cargar sin que nada falle. Por juego y
+por fuente (hoja Historico* y docs/api/{GAME}.json):
+
+1) Fechas esperadas = días de sorteo del tramo vigente + EXCEPTIONS
+   (lae_calendar.draw_dates), entre la primera y la última fecha guardada
+2) Anti-join con las fechas guardadas (arrays datetime64[D] ordenados):
+   - missing: esperadas que no están
+   - unexpected: guardadas que no tocaban (fecha mal puesta o traslado no
+     registrado en EXCEPTIONS). Sólo se informa para docs/api: en las hojas
+     ya lo cubre la regla dia_sorteo de dq_rules (con las filas afectadas)
+3) late/lag: sorteos esperados desde la última fecha guardada hasta la
+   referencia (hoja: el día anterior al sello del snapshot; API: ayer). Un
+   bloqueo o una actualización saltada al final del histórico sólo se ve
+   aquí: hasta LAG_TOLERANCE sorteos es informativo (el último sorteo puede
+   no estar cargado aún); por encima cuenta como warn y esas fechas van a la
+   lista de re-descarga
+
+Con --refetch-out se escribe la lista "GAME YYYY-MM-DD" de fechas que faltan
+(huecos y retraso por encima de la tolerancia) y que docs/api tampoco tiene,
+para fetch_lae_by_dates.py --dates-file.
+
+Variables:
+  DRAW_LAG_TOLERANCE -> sorteos de retraso sin aviso (2)
+
+Uso:
+  python ops/scripts/draw_gaps.py [--snapshots latest] [--api-dir docs/api] [--game EURO] \\
+      [--refetch-out dist/refetch_dates.txt] [--json]
+"""
+
+import os, json, argparse
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from draw_array import DrawArray, GAMES, game_from_path
+from lae_calendar import draw_dates
+from reconcile import load_api, API_DIR
+from snapshot_catalog import parse_name
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DATA_DIR = os.path.join(BASE_DIR, "loterias", "data")
+SAMPLE = 5
+
+try:
+    LAG_TOLERANCE = int(os.environ.get("DRAW_LAG_TOLERANCE", 2))
+except ValueError:
+    LAG_TOLERANCE = 2
+
+def _days(values) -> np.ndarray:
+    """Fechas válidas -> datetime64[D] ordenado y sin repetidos."""
+    d = np.asarray(values, dtype="datetime64[ns]")
+    return np.unique(d[~np.isnat(d)].astype("datetime64[D]"))
+
+def find_gaps(game: str, dates, today=None, until=None) -> Dict:
+    """
+    Fechas guardadas de un juego frente a su calendario. Ver cabecera.
+    'until' = último día que ya debería estar cargado (defecto: ayer respecto a 'today').
+    """
+    stored = _days(dates)
+    if not len(stored):
+        return {"stored": 0, "expected": 0, "missing": [], "unexpected": [], "late": [], "lag": 0,
+                "first": None, "last": None, "until": None}
+    first, last = stored[0], stored[-1]
+    expected = draw_dates(game, first, last).to_numpy(dtype="datetime64[D]")
+    missing = np.setdiff1d(expected, stored, assume_unique=True)
+    unexpected = np.setdiff1d(stored, expected, assume_unique=True)
+    if until is None:
+        until = pd.Timestamp(today or pd.Timestamp.today()).normalize() - pd.Timedelta(days=1)
+    until = pd.Timestamp(until).normalize()
+    late = draw_dates(game, pd.Timestamp(last) + pd.Timedelta(days=1), until) \
+        if pd.Timestamp(last) < until else []
+    late = [str(d) for d in np.asarray(late, dtype="datetime64[D]")]
+    return {"stored": int(len(stored)), "expected": int(len(expected)),
+            "missing": [str(d) for d in missing], "unexpected": [str(d) for d in unexpected],
+            "late": late, "lag": len(late), "first": str(first), "last": str(last),
+            "until": str(until.date())}
+
+def snapshot_until(name: str):
+    """Día anterior al sello del snapshot ('Historico_20250921_1456.csv' -> 2025-09-20); None sin sello."""
+    stamp = parse_name(os.path.basename(name))["stamp"]
+    if not stamp:
+        return None
+    return pd.Timestamp(stamp[:8]) - pd.Timedelta(days=1)
+
+def gaps_frames(frames: Dict[str, pd.DataFrame], api_dir: str = API_DIR, today=None) -> Dict[str, Dict]:
+    """
+    {fichero Historico*: DataFrame} -> {GAME: {"hoja": resultado, "api": resultado}}.
+    El retraso de la hoja se mide hasta su sello de snapshot (sin sello, hasta
+    ayer); el de la API, hasta ayer. La API sólo aparece si docs/api/{GAME}.json
+    tiene sorteos.
+    """
+    out: Dict[str, Dict] = {}
+    for name, df in frames.items():
+        game = game_from_path(name)
+        if not game or game in out:
+            continue
+        out[game] = {"hoja": find_gaps(game, DrawArray.from_frame(df, game).dates, today,
+                                       snapshot_until(name))}
+        api = load_api(game, api_dir)
+        if len(api):
+            out[game]["api"] = find_gaps(game, api.dates, today)
+    return out
+
+def format_lines(results: Dict[str, Dict], sample: int = SAMPLE, tolerance: int = LAG_TOLERANCE) -> List[str]:
+    """Líneas para dq_report.txt (⚠️ por fuente con huecos, fechas que no tocaban o retraso)."""
+    lines = []
+    for game, sources in results.items():
+        for src, r in sources.items():
+            label = "hoja" if src == "hoja" else f"docs/api/{game}.json"
+            if not r["stored"]:
+                lines.append(f"· Calendario {game} ({label}): sin fechas")
+                continue
+            lines.append(f"✓ Calendario {game} ({label}): {r['stored']} sorteos entre {r['first']} y "
+                         f"{r['last']} · esperados {r['expected']}")
+            if r["missing"]:
+                lines.append(f"⚠️  {game} ({label}): faltan {len(r['missing'])} sorteos "
+                             f"(p. ej. {', '.join(r['missing'][-sample:])})")
+            if r["unexpected"] and src != "hoja":
+                lines.append(f"⚠️  {game} ({label}): {len(r['unexpected'])} fechas fuera de calendario "
+                             f"(p. ej. {', '.join(r['unexpected'][-sample:])})")
+            if r["lag"] > tolerance:
+                lines.append(f"⚠️  {game} ({label}): {r['lag']} sorteos sin cargar entre {r['last']} y "
+                             f"{r['until']} (p. ej. {', '.join(r['late'][-sample:])})")
+            elif r["lag"]:
+                lines.append(f"· {game} ({label}): {r['lag']} sorteos posteriores a {r['last']} aún sin cargar")
+    return lines
+
+def _late(r: Dict, tolerance: int) -> List[str]:
+    return r.get("late", []) if r.get("lag", 0) > tolerance else []
+
+def issue_counts(results: Dict[str, Dict], tolerance: int = LAG_TOLERANCE):
+    """
+    (warn, fail): un warn por juego, fuente y tipo (faltan / fuera de calendario / retraso).
+    Fuera de calendario sólo cuenta en docs/api (en la hoja es la regla dia_sorteo).
+    """
+    warn = sum(bool(r["missing"]) + bool(r["unexpected"] and src != "hoja") + bool(_late(r, tolerance))
+               for s in results.values() for src, r in s.items())
+    return warn, 0
+
+def refetch_list(results: Dict[str, Dict], tolerance: int = LAG_TOLERANCE) -> Dict[str, List[str]]:
+    """{GAME: fechas} que faltan (o van con retraso) en alguna fuente y que docs/api no tiene."""
+    out: Dict[str, List[str]] = {}
+    for game, sources in results.items():
+        api = sources.get("api") or {"missing": [], "first": None, "last": None}
+        missing = set(api["missing"]) | set(_late(api, tolerance))
+        hoja = sources.get("hoja", {})
+        for d in hoja.get("missing", []) + _late(hoja, tolerance):
+            # dentro del rango de la API y sin hueco allí -> la API ya lo tiene
+            if not api["first"] or not (api["first"] <= d <= api["last"]):
+                missing.add(d)
+        if missing:
+            out[game] = sorted(missing)
+    return out
+
+def write_refetch(dates: Dict[str, Iterable[str]], path: str) -> int:
+    """Escribe "GAME YYYY-MM-DD" por línea. Devuelve nº de fechas."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for game, days in dates.items():
+            for d in days:
+                f.write(f"{game} {d}\n")
+                n += 1
+    return n
+
+def main():
+    from csv_reader import read_csv
+    from snapshot_catalog import select_paths, DEFAULT_SELECT
+    ap = argparse.ArgumentParser(description="Huecos de sorteos frente al calendario oficial")
+    ap.add_argument("--snapshots", default=DEFAULT_SELECT, help="latest | all | STAMP | FROM..TO")
+    ap.add_argument("--api-dir", default=API_DIR)
+    ap.add_argument("--game", choices=GAMES)
+    ap.add_argument("--refetch-out", help="fichero 'GAME YYYY-MM-DD' para fetch_lae_by_dates.py --dates-file")
+    ap.add_argument("--json", action="store_true", help="resultado completo en JSON")
+    args = ap.parse_args()
+
+    frames = {}
+    for p in select_paths(DATA_DIR, args.snapshots):
+        game = game_from_path(p)
+        if game and (not args.game or game == args.game):
+            frames[os.path.basename(p)] = read_csv(p)
+    results = gaps_frames(frames, args.api_dir)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print("\n".join(format_lines(results)) or "Sin hojas Historico* que revisar")
+    if args.refetch_out:
+        n = write_refetch(refetch_list(results), args.refetch_out)
+        print(f"✓ {n} fechas para re-descargar → {args.refetch_out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/dup_detect.py
+"""
+Detección de filas duplicadas en streaming (memoria acotada)
+
+Recorre CSV por bloques (DUP_CHUNK_ROWS filas) y reduce cada fila a un hash de
+64 bits de sus valores normalizados (sin espacios alrededor, vacío = ""). Las
+columnas cuentan por nombre y en orden alfabético: las de la cabecera original
+de la hoja (unión de sus snapshots), así que las que añade la normalización
+(fecha_estandar, game, *_cents, cat_*, _rowhash...) no entran y un snapshot
+agrupa con su copia normalizada. Las filas vacías se ignoran. Sólo se comparan
+filas de la misma hoja (nombre sin la marca _YYYYMMDD_HHMM), así que entran a la
+vez todos los snapshots de una hoja y sus particiones normalizadas
+(dist/loterias_norm).
+
+1) Por bloque: cada columna se factoriza y sólo se hashean sus valores únicos;
+   el hash de fila combina los de columna (multiplicación con desbordamiento)
+2) Cada fila deja un registro (hash, fichero, línea) de 16 bytes. Si el total
+   estimado no cabe en DUP_MEM_MB, los registros se reparten en particiones
+   en disco por los bits altos del hash (spill); si cabe, se quedan en memoria
+3) Por partición: orden por (hash, fichero, línea) y grupos del mismo hash =
+   clusters de duplicados con sus ficheros y líneas de origen
+
+La memoria pico es un bloque + una partición. Con 64 bits la probabilidad de
+colisión es despreciable para estos volúmenes (no se comparan los textos).
+
+Variables:
+  DUP_MEM_MB      -> memoria para registros antes de particionar (64)
+  DUP_CHUNK_ROWS  -> filas por bloque de lectura (50000)
+
+Uso:
+  python ops/scripts/dup_detect.py [--snapshots all] [--norm] [--mem-mb 64] [--json]
+  python ops/scripts/dup_detect.py --snapshots latest --check-norm   # snapshot == copia normalizada
+"""
+
+import os, sys, json, glob, math, shutil, argparse, tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from csv_reader import read_csv, dialect_for, sheet_name
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DATA_DIR = os.path.join(BASE_DIR, "loterias", "data")
+DIST_DIR = os.environ.get("DIST_DIR", os.path.join(BASE_DIR, "dist"))
+NORM_DIR = os.path.join(DIST_DIR, "loterias_norm")
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+MEM_MB = _env_int("DUP_MEM_MB", 64)
+CHUNK_ROWS = _env_int("DUP_CHUNK_ROWS", 50000)
+SAMPLE = 5
+LINES_PER_FILE = 5
+
+RECORD = np.dtype([("hash", "<u8"), ("file", "<u4"), ("line", "<u4")])
+_MIX = np.uint64(0x100000001B3)  # primo FNV-1 de 64 bits
+_EMPTY_HASH = pd.util.hash_array(np.array([""], dtype=object))[0]
+
+# --- Hash de filas ------------------------------------------------------------------
+def _column_hashes(values) -> Tuple[np.ndarray, np.ndarray]:
+    """(hash uint64 por fila, máscara de vacíos) hasheando sólo los valores únicos."""
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=True)
+    u = np.array([str(v).strip() for v in uniques], dtype=object)
+    h = pd.util.hash_array(u) if len(u) else np.zeros(0, dtype=np.uint64)
+    empty_u = u == ""
+    out = np.full(len(codes), _EMPTY_HASH, dtype=np.uint64)
+    hit = codes >= 0
+    out[hit] = h[codes[hit]]
+    empty = ~hit
+    empty[hit] = empty_u[codes[hit]]
+    return out, empty
+
+# columnas que añade normalize_loterias (no están en la hoja original)
+NORM_ADDED = ("fecha_estandar", "game")
+NORM_ADDED_PREFIX = ("_", "cat_")
+NORM_ADDED_SUFFIX = ("_cents",)
+
+def key_columns(columns: Iterable, raw_header: Optional[Iterable] = None) -> List[str]:
+    """
+    Columnas de la clave de fila, por nombre (sin espacios) y en orden alfabético.
+    Con 'raw_header' (cabecera de la hoja original) son exactamente esas; sin ella,
+    las de 'columns' menos las añadidas por la normalización.
+    """
+    if raw_header is not None:
+        names = {str(c).strip() for c in raw_header}
+    else:
+        names = {str(c).strip() for c in columns}
+        names = {c for c in names if c not in NORM_ADDED and not c.endswith(NORM_ADDED_SUFFIX)}
+    return sorted(c for c in names if not c.startswith(NORM_ADDED_PREFIX))
+
+def frame_keys(df: pd.DataFrame, cols: Optional[List[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (hash uint64 por fila, máscara de filas vacías) de 'df' normalizado.
+    'cols' = key_columns (por defecto, las de df); una columna que falte en df
+    cuenta como vacía (la normalización quita las columnas totalmente vacías).
+    """
+    by_name = {str(c).strip(): c for c in df.columns}
+    keys = np.zeros(len(df), dtype=np.uint64)
+    empty = np.ones(len(df), dtype=bool)
+    with np.errstate(over="ignore"):
+        for c in (key_columns(df.columns) if cols is None else cols):
+            if c in by_name:
+                h, e = _column_hashes(df[by_name[c]].to_numpy(dtype=object))
+            else:
+                h = np.full(len(df), _EMPTY_HASH, dtype=np.uint64)
+                e = np.ones(len(df), dtype=bool)
+            keys = keys * _MIX ^ h
+            empty &= e
+    return keys, empty
+
+def frame_duplicates(df: pd.DataFrame) -> Dict:
+    """
+    Duplicados dentro de un DataFrame ya leído (mismas claves que el streaming).
+    {"duplicates": filas repetidas (sin contar la 1ª), "clusters": [[líneas...], ...]}
+    """
+    if df.empty:
+        return {"duplicates": 0, "clusters": []}
+    keys, empty = frame_keys(df)
+    pos = np.flatnonzero(~empty)
+    k = keys[pos]
+    order = np.argsort(k, kind="stable")
+    k, pos = k[order], pos[order]
+    starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+    sizes = np.diff(np.r_[starts, len(k)])
+    multi = np.flatnonzero(sizes > 1)
+    clusters = [sorted(int(p) + 2 for p in pos[starts[g]:starts[g] + sizes[g]]) for g in multi]
+    return {"duplicates": int((sizes[multi] - 1).sum()), "clusters": sorted(clusters)}
+
+# --- Lectura por bloques ------------------------------------------------------------
+def iter_chunks(path: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Bloques de 'path' como texto; si la lectura por bloques falla, el fichero entero (csv_reader)."""
+    try:
+        d = dialect_for(path)
+        reader = pd.read_csv(path, dtype=str, sep=d["sep"], quotechar=d["quotechar"],
+                             encoding=d["encoding"], chunksize=chunk_rows)
+        chunks = iter(reader)
+        first = next(chunks, None)
+    except Exception:
+        yield read_csv(path)
+        return
+    if first is not None:
+        yield first
+        yield from chunks
+
+def read_header(path: str) -> List[str]:
+    """Cabecera de 'path' (sin leer datos; csv_reader si falla la lectura rápida)."""
+    try:
+        d = dialect_for(path)
+        return list(pd.read_csv(path, dtype=str, sep=d["sep"], quotechar=d["quotechar"],
+                                encoding=d["encoding"], nrows=0).columns)
+    except Exception:
+        return list(read_csv(path).columns)
+
+def is_normalized(header: Iterable) -> bool:
+    """Las particiones de normalize_loterias llevan _rowhash."""
+    return "_rowhash" in {str(c).strip() for c in header}
+
+def sheet_key_columns(paths: List[str]) -> Dict[str, List[str]]:
+    """
+    {hoja: key_columns} con la unión de las cabeceras originales de cada hoja, para
+    que un snapshot y su copia normalizada den la misma clave. Hojas sólo con
+    particiones normalizadas: sus columnas menos las añadidas por la normalización.
+    """
+    raw: Dict[str, set] = {}
+    norm: Dict[str, set] = {}
+    for path in paths:
+        try:
+            header = read_header(path)
+        except Exception:
+            continue
+        target = norm if is_normalized(header) else raw
+        target.setdefault(sheet_name(path), set()).update(str(c).strip() for c in header)
+    out = {sheet: key_columns(cols) for sheet, cols in norm.items()}
+    out.update({sheet: key_columns(cols, cols) for sheet, cols in raw.items()})
+    return out
+
+# --- Registros y particiones --------------------------------------------------------
+class RecordSink:
+    """
+    Registros (hash, fichero, línea) por hoja. Con 'partitions' > 1 se vuelcan a
+    disco en ficheros por bits altos del hash; con 1 se quedan en memoria.
+    """
+    def __init__(self, partitions: int = 1, tmp_dir: Optional[str] = None):
+        self.partitions = max(1, int(partitions))
+        self.bits = max(0, math.ceil(math.log2(self.partitions)))
+        self.partitions = 1 << self.bits
+        self.tmp_dir = tempfile.mkdtemp(prefix="dup_", dir=tmp_dir) if self.partitions > 1 else None
+        self.memory: Dict[Tuple[str, int], List[np.ndarray]] = {}
+        self.paths: Dict[Tuple[str, int], str] = {}
+        self.rows = 0
+
+    def add(self, sheet: str, records: np.ndarray) -> None:
+        self.rows += len(records)
+        if self.partitions == 1:
+            self.memory.setdefault((sheet, 0), []).append(records)
+            return
+        part = (records["hash"] >> np.uint64(64 - self.bits)).astype(np.int64)
+        for p in np.unique(part):
+            key = (sheet, int(p))
+            path = self.paths.setdefault(key, os.path.join(self.tmp_dir, f"{len(self.paths):05d}.bin"))
+            with open(path, "ab") as f:
+                records[part == p].tofile(f)
+
+    def parts(self) -> Iterator[Tuple[str, np.ndarray]]:
+        """(hoja, registros) de cada partición, de una en una."""
+        for (sheet, _), chunks in sorted(self.memory.items()):
+            yield sheet, np.concatenate(chunks)
+        for (sheet, _), path in sorted(self.paths.items()):
+            yield sheet, np.fromfile(path, dtype=RECORD)
+
+    def close(self) -> None:
+        if self.tmp_dir:
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+def partitions_for(paths: Iterable[str], mem_mb: int = MEM_MB) -> int:
+    """Nº de particiones: registros estimados (≤ bytes de CSV) entre la memoria disponible."""
+    total = sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+    return max(1, math.ceil(total / max(1, mem_mb) / (1 << 20)))
+
+# --- Detección ----------------------------------------------------------------------
+def labels(paths: List[str]) -> List[str]:
+    """Nombre de fichero; ruta relativa si el nombre se repite (snapshot y su partición normalizada)."""
+    base = [os.path.basename(p) for p in paths]
+    return [b if base.count(b) == 1 else os.path.relpath(p, BASE_DIR) for b, p in zip(base, paths)]
+
+def _clusters(records: np.ndarray):
+    """Grupos del mismo hash con más de una fila: (inicio, tamaño) sobre records ordenado."""
+    h = records["hash"]
+    starts = np.flatnonzero(np.r_[True, h[1:] != h[:-1]])
+    sizes = np.diff(np.r_[starts, len(h)])
+    multi = sizes > 1
+    return starts[multi], sizes[multi]
+
+def detect(paths: List[str], mem_mb: int = MEM_MB, chunk_rows: int = CHUNK_ROWS,
+           sample: int = SAMPLE, tmp_dir: Optional[str] = None) -> Dict:
+    """
+    Duplicados dentro de cada fichero y entre ficheros de la misma hoja.
+    Devuelve {"files", "rows", "partitions", "clusters", "duplicate_rows",
+              "within_file": {fichero: filas repetidas}, "cross_file_clusters",
+              "samples": [{"sheet", "rows", "sources": {fichero: [líneas]}}]}.
+    """
+    names = labels(paths)
+    cols = sheet_key_columns(paths)
+    sink = RecordSink(partitions_for(paths, mem_mb), tmp_dir)
+    try:
+        for fid, path in enumerate(paths):
+            sheet = sheet_name(path)
+            offset = 0
+            try:
+                for chunk in iter_chunks(path, chunk_rows):
+                    keys, empty = frame_keys(chunk, cols.get(sheet))
+                    keep = np.flatnonzero(~empty)
+                    rec = np.empty(len(keep), dtype=RECORD)
+                    rec["hash"], rec["file"], rec["line"] = keys[keep], fid, keep + offset + 2
+                    sink.add(sheet, rec)
+                    offset += len(chunk)
+            except Exception as e:
+                print(f"⚠️  {names[fid]}: no se pudo leer para duplicados ({e})")
+
+        within = np.zeros(len(paths), dtype=np.int64)
+        n_clusters = dup_rows = cross = 0
+        best: List[Tuple[Tuple[int, int], str, np.ndarray]] = []
+        for sheet, rec in sink.parts():
+            rec = rec[np.lexsort((rec["line"], rec["file"], rec["hash"]))]
+            starts, sizes = _clusters(rec)
+            if not len(starts):
+                continue
+            n_clusters += len(starts)
+            dup_rows += int((sizes - 1).sum())
+            # mismo (hash, fichero) repetido = duplicado dentro del fichero
+            same = (rec["hash"][1:] == rec["hash"][:-1]) & (rec["file"][1:] == rec["file"][:-1])
+            np.add.at(within, rec["file"][1:][same], 1)
+            # ordenado por fichero dentro del cluster: abarca varios si el 1º y el último difieren
+            cross += int((rec["file"][starts] != rec["file"][starts + sizes - 1]).sum())
+            # ejemplos: primero los que se repiten dentro de un fichero (entre snapshots es lo normal)
+            gid = np.cumsum(np.r_[True, rec["hash"][1:] != rec["hash"][:-1]]) - 1
+            repeats = np.bincount(gid[1:][same], minlength=gid[-1] + 1)[gid[starts]]
+            for g in np.lexsort((-sizes, -repeats))[:sample]:
+                best.append(((int(repeats[g]), int(sizes[g])), sheet, rec[starts[g]:starts[g] + sizes[g]].copy()))
+            best = sorted(best, key=lambda b: b[0], reverse=True)[:sample]
+    finally:
+        sink.close()
+
+    samples = []
+    for (_, size), sheet, members in best:
+        sources: Dict[str, List[int]] = {}
+        for r in members:
+            lines = sources.setdefault(names[int(r["file"])], [])
+            if len(lines) < LINES_PER_FILE:
+                lines.append(int(r["line"]))
+        samples.append({"sheet": sheet, "rows": size, "sources": sources})
+    return {
+        "files": len(paths), "rows": sink.rows, "partitions": sink.partitions,
+        "clusters": n_clusters, "duplicate_rows": dup_rows, "cross_file_clusters": cross,
+        "within_file": {names[i]: int(n) for i, n in enumerate(within) if n},
+        "samples": samples,
+    }
+
+def format_lines(result: Dict) -> List[str]:
+    lines = [f"Duplicados: {result['files']} ficheros · {result['rows']} filas · "
+             f"{result['partitions']} particiones · {result['clusters']} clusters "
+             f"({result['duplicate_rows']} filas repetidas; {result['cross_file_clusters']} entre ficheros, "
+             f"lo normal entre snapshots de una hoja)"]
+    for name, n in sorted(result["within_file"].items()):
+        lines.append(f"⚠️  {name}: {n} filas duplicadas dentro del fichero")
+    for s in result["samples"]:
+        where = "; ".join(f"{f} líneas {', '.join(map(str, ls))}" for f, ls in s["sources"].items())
+        lines.append(f"· {s['sheet']}: {s['rows']} copias → {where}")
+    return lines
+
+def norm_paths(sheets: Iterable[str], norm_dir: str = NORM_DIR) -> List[str]:
+    """Particiones normalizadas (dist/loterias_norm) de las hojas dadas."""
+    wanted = set(sheets)
+    return [p for p in sorted(glob.glob(os.path.join(norm_dir, "*.csv"))) if sheet_name(p) in wanted]
+
+def _key_counts(path: str, cols: List[str], chunk_rows: int = CHUNK_ROWS) -> Tuple[np.ndarray, np.ndarray]:
+    """(claves únicas, veces) de las filas no vacías de 'path'."""
+    keys = []
+    for chunk in iter_chunks(path, chunk_rows):
+        k, empty = frame_keys(chunk, cols)
+        keys.append(k[~empty])
+    return np.unique(np.concatenate(keys) if keys else np.zeros(0, dtype=np.uint64), return_counts=True)
+
+def check_norm(raw_path: str, norm_path: str, chunk_rows: int = CHUNK_ROWS) -> Dict:
+    """
+    Comprueba que un snapshot y su copia normalizada dan las mismas claves de fila.
+    {"file", "rows", "missing": filas sin copia, "extra": filas de más en la copia,
+     "reshaped": la normalización cambia las columnas (Salidas) y no se compara}.
+    """
+    raw_header, norm_header = read_header(raw_path), read_header(norm_path)
+    cols = key_columns(raw_header, raw_header)
+    out = {"file": os.path.basename(raw_path), "rows": 0, "missing": 0, "extra": 0,
+           "reshaped": not set(key_columns(norm_header)) <= set(cols)}
+    if out["reshaped"]:
+        return out
+    rk, rn = _key_counts(raw_path, cols, chunk_rows)
+    nk, nn = _key_counts(norm_path, cols, chunk_rows)
+    both, ri, ni = np.intersect1d(rk, nk, assume_unique=True, return_indices=True)
+    common = np.minimum(rn[ri], nn[ni]).sum()
+    out.update(rows=int(rn.sum()), missing=int(rn.sum() - common), extra=int(nn.sum() - common))
+    return out
+
+def main_check_norm(paths: List[str], norm_dir: str = NORM_DIR) -> int:
+    """--check-norm: 1 si alguna copia normalizada no agrupa con su snapshot."""
+    bad = checked = 0
+    for path in paths:
+        norm = os.path.join(norm_dir, os.path.basename(path))
+        if not os.path.exists(norm):
+            continue
+        r = check_norm(path, norm)
+        if r["reshaped"]:
+            print(f"ℹ️  {r['file']}: la normalización reestructura las columnas, no se compara")
+            continue
+        checked += 1
+        if r["missing"] or r["extra"]:
+            bad += 1
+            print(f"❌ {r['file']}: {r['missing']} filas sin copia normalizada, {r['extra']} de más")
+        else:
+            print(f"✓ {r['file']}: {r['rows']} filas iguales en la copia normalizada")
+    if not checked:
+        print(f"Sin copias normalizadas en {os.path.relpath(norm_dir, BASE_DIR)}")
+    return 1 if bad else 0
+
+def main():
+    from snapshot_catalog import select_paths
+    ap = argparse.ArgumentParser(description="Duplicados en streaming entre snapshots y particiones")
+    ap.add_argument("paths", nargs="*", help="CSV concretos (por defecto, la selección de --snapshots)")
+    ap.add_argument("--snapshots", default="all", help="latest | all | STAMP | FROM..TO (defecto all)")
+    ap.add_argument("--norm", action="store_true", help="incluye las particiones de dist/loterias_norm")
+    ap.add_argument("--sheet", action="append", help="limita a estas hojas (repetible)")
+    ap.add_argument("--check-norm", action="store_true",
+                    help="comprueba que cada snapshot y su copia normalizada coinciden fila a fila")
+    ap.add_argument("--mem-mb", type=int, default=MEM_MB)
+    ap.add_argument("--json", action="store_true", help="resultado completo en JSON")
+    args = ap.parse_args()
+
+    paths = args.paths or select_paths(DATA_DIR, args.snapshots)
+    if args.sheet:
+        paths = [p for p in paths if sheet_name(p) in args.sheet]
+    if args.check_norm:
+        sys.exit(main_check_norm(paths))
+    if args.norm:
+        paths += norm_paths({sheet_name(p) for p in paths})
+    if not paths:
+        print("Sin CSV que revisar")
+        sys.exit(0)
+    result = detect(paths, args.mem_mb)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print("\n".join(format_lines(result)))
+
+if __name__ == "__main__":
+    main()
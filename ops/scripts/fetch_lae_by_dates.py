@@ -1,26 +1,25 @@
 # ops/scripts/fetch_lae_by_dates.py
 # Captura robusta por fechas (HTML SEO) de LAE, respetando días reales de sorteo
 # con tolerancia d-1/d/d+1 para cambios puntuales. Rango: 2020..hoy.
+# Con --dates-file (líneas "GAME YYYY-MM-DD", p. ej. de draw_gaps.py --refetch-out)
+# sólo pide esas fechas y las fusiona con docs/api/{GAME}.json.
 
-import os, re, json, time, random
+import os, re, json, time, random, argparse
 from datetime import date, timedelta, datetime
 from typing import List, Dict, Any, Optional
 import requests
 
+from api_shards import write_shards
+from stage_timing import span, note
+from profiling import profiled
+from lae_calendar import WEEKDAYS, draw_dates  # días reales de sorteo (0=Lunes ... 6=Domingo)
+
 OUT_DIR = os.path.join("docs", "api")
 
 # Nuestro modelo usa últimos 5 años
 START_YEAR = 2020
 END_YEAR   = date.today().year
 
-# Días reales de sorteo (0=Lunes ... 6=Domingo)
-WEEKDAYS = {
-    "PRIMITIVA": {0, 3, 5},             # L, J, S
-    "BONOLOTO":  {0, 1, 2, 3, 4, 5},     # L a S
-    "EURO":      {1, 4},                 # M, V
-    "GORDO":     {6},                    # D
-}
-
 # Páginas públicas de resultados (evitan WAF del API JSON)
 GAMES: Dict[str, Dict[str, Any]] = {
     "PRIMITIVA": {
@@ -68,13 +67,27 @@ TIMEOUT = 20
 def ensure_dir(p: str):
     os.makedirs(p, exist_ok=True)
 
-def daterange(start_y: int, end_y: int):
-    d = date(start_y, 1, 1)
-    end = date(end_y, 12, 31)
-    one = timedelta(days=1)
-    while d <= end:
-        yield d
-        d += one
+def read_dates_file(path: str) -> Dict[str, List[date]]:
+    """Líneas "GAME YYYY-MM-DD" (las vacías y las que empiezan por # se ignoran)."""
+    out: Dict[str, List[date]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 2 or parts[0].startswith("#"):
+                continue
+            game = parts[0].upper()
+            if game not in GAMES:
+                print(f"[skip] juego desconocido en {path}: {game}")
+                continue
+            out.setdefault(game, []).append(datetime.strptime(parts[1], "%Y-%m-%d").date())
+    return {g: sorted(set(v)) for g, v in out.items()}
+
+def load_existing(game: str) -> List[Dict[str, Any]]:
+    try:
+        with open(os.path.join(OUT_DIR, f"{game}.json"), "r", encoding="utf-8") as f:
+            return json.load(f).get("results") or []
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
 
 def http_get(url: str) -> Optional[str]:
     try:
@@ -179,12 +192,14 @@ def fetch_with_neighbors(game: str, cfg: Dict[str, Any], d: date) -> Optional[Di
 
 def fetch_game(game: str, cfg: Dict[str, Any], start_y: int, end_y: int) -> List[Dict[str, Any]]:
     allowed = WEEKDAYS.get(game, set())
-    results_by_date: Dict[str, Dict[str, Any]] = {}
     print(f"[run] {game} => días de sorteo {sorted(allowed)} | rango {start_y}..{end_y}")
+    # calendario por tramos + excepciones (lae_calendar)
+    days = [ts.date() for ts in draw_dates(game, date(start_y, 1, 1), date(end_y, 12, 31))]
+    return fetch_dates(game, cfg, days)
 
-    for d in daterange(start_y, end_y):
-        if d.weekday() not in allowed:
-            continue
+def fetch_dates(game: str, cfg: Dict[str, Any], days: List[date]) -> List[Dict[str, Any]]:
+    results_by_date: Dict[str, Dict[str, Any]] = {}
+    for d in days:
         got = fetch_with_neighbors(game, cfg, d)
         if got:
             results_by_date[got["date"]] = got
@@ -210,22 +225,42 @@ def latest_by_game(draws_by_game: Dict[str, List[Dict[str, Any]]]) -> List[Dict[
     return out
 
 def main():
+    ap = argparse.ArgumentParser(description="LAE · histórico por fechas (HTML)")
+    ap.add_argument("--dates-file", help="sólo estas fechas ('GAME YYYY-MM-DD' por línea), fusionadas con docs/api")
+    args = ap.parse_args()
+
     ensure_dir(OUT_DIR)
-    print(f"=== LAE · HISTÓRICO por fechas (días reales con tolerancia) · {START_YEAR}..{END_YEAR} ===")
     all_by_game: Dict[str, List[Dict[str, Any]]] = {}
-
-    for game, cfg in GAMES.items():
-        all_by_game[game] = fetch_game(game, cfg, START_YEAR, END_YEAR)
+    mode = "by_dates_html_days+neighbors"
+
+    if args.dates_file:
+        wanted = read_dates_file(args.dates_file)
+        print(f"=== LAE · re-descarga de {sum(map(len, wanted.values()))} fechas ({args.dates_file}) ===")
+        mode += "+dates_file"
+        for game in GAMES:
+            merged = {d["date"]: d for d in load_existing(game) if d.get("date")}
+            if wanted.get(game):
+                got = fetch_dates(game, GAMES[game], wanted[game])
+                merged.update({d["date"]: d for d in got})
+            all_by_game[game] = sorted(merged.values(), key=lambda x: x["date"])
+    else:
+        print(f"=== LAE · HISTÓRICO por fechas (días reales con tolerancia) · {START_YEAR}..{END_YEAR} ===")
+        for game, cfg in GAMES.items():
+            all_by_game[game] = fetch_game(game, cfg, START_YEAR, END_YEAR)
 
     payload = {
         "generated_at": datetime.utcnow().isoformat() + "Z",
         "results": sum(all_by_game.values(), []),
         "by_game_counts": {k: len(v) for k, v in all_by_game.items()},
-        "meta": {"from_year": START_YEAR, "to_year": END_YEAR, "mode": "by_dates_html_days+neighbors"}
+        "meta": {"from_year": START_YEAR, "to_year": END_YEAR, "mode": mode}
     }
 
     with open(os.path.join(OUT_DIR, "lae_historico.json"), "w", encoding="utf-8") as f:
         json.dump(payload, f, ensure_ascii=False, indent=2)
+    note(rows=len(payload["results"]), bytes=os.path.getsize(os.path.join(OUT_DIR, "lae_historico.json")))
+
+    # shards por juego/año + index.json (sólo reescribe lo que cambia)
+    write_shards(payload["results"], OUT_DIR)
 
     for g, arr in all_by_game.items():
         with open(os.path.join(OUT_DIR, f"{g}.json"), "w", encoding="utf-8") as f:
@@ -238,4 +273,5 @@ def main():
     print("=== DONE ===")
 
 if __name__ == "__main__":
-    main()
+    with span("fetch", "by_dates"), profiled("fetch_lae_by_dates"):
+        main()
@@ -4,6 +4,10 @@ import os, sys, json, time, math, random
 from datetime import datetime, date
 import requests
 
+from api_shards import write_shards
+from stage_timing import span, note
+from profiling import profiled
+
 # ---------- Config ----------
 OUT_DIR = os.path.join("docs", "api")
 GAMES = {
@@ -213,6 +217,10 @@ def main():
 
     with open(os.path.join(OUT_DIR, "lae_historico.json"), "w", encoding="utf-8") as f:
         json.dump(payload, f, ensure_ascii=False, indent=2)
+    note(rows=len(payload["results"]), bytes=os.path.getsize(os.path.join(OUT_DIR, "lae_historico.json")))
+
+    # shards por juego/año + index.json (sólo reescribe lo que cambia)
+    write_shards(payload["results"], OUT_DIR)
 
     for g, arr in all_draws.items():
         with open(os.path.join(OUT_DIR, f"{g}.json"), "w", encoding="utf-8") as f:
@@ -226,4 +234,5 @@ def main():
     print("by_game_counts:", payload["by_game_counts"])
 
 if __name__ == "__main__":
-    main()
+    with span("fetch", "historic"), profiled("fetch_lae_historic"):
+        main()
@@ -3,6 +3,10 @@ import os, json, re, time, random
 from datetime import datetime, date
 from typing import Any, Dict, List
 
+from api_shards import write_shards
+from stage_timing import span, note
+from profiling import profiled
+
 # Config general
 OUT_DIR = os.path.join("docs", "api")
 START_YEAR = 2020                       # histórico desde 2020 (rápido para producción)
@@ -244,6 +248,10 @@ def main():
 
     with open(os.path.join(OUT_DIR, "lae_historico.json"), "w", encoding="utf-8") as f:
         json.dump(payload, f, ensure_ascii=False, indent=2)
+    note(rows=len(payload["results"]), bytes=os.path.getsize(os.path.join(OUT_DIR, "lae_historico.json")))
+
+    # shards por juego/año + index.json (sólo reescribe lo que cambia)
+    write_shards(payload["results"], OUT_DIR)
 
     # particionado por juego (útil para Apps Script)
     for g, arr in all_by_game.items():
@@ -259,4 +267,5 @@ def main():
     print("by_game_counts:", payload["by_game_counts"])
 
 if __name__ == "__main__":
-    main()
+    with span("fetch", "historic_browser"), profiled("fetch_lae_historic_browser"):
+        main()
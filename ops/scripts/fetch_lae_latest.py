@@ -1,5 +1,7 @@
 import sys
 from fetch_lae_common import fetch_game, dump_payload
+from stage_timing import span, note
+from profiling import profiled
 
 def main(outfile: str):
     errors = []
@@ -16,7 +18,9 @@ def main(outfile: str):
         except Exception as e:
             errors.append(f"{g}: {e.__class__.__name__}: {e}")
     dump_payload(outfile, results, errors)
+    note(rows=len(results))
 
 if __name__ == "__main__":
     out = sys.argv[1] if len(sys.argv) > 1 else "docs/api/lae_latest.json"
-    main(out)
+    with span("fetch", "latest"), profiled("fetch_lae_latest"):
+        main(out)
@@ -1,15 +1,16 @@
 #!/usr/bin/env python3
 # ops/scripts/fetch_lae_results.py
 # Scrapea resultados LAE con Playwright (headless) y actualiza Google Sheet.
+# Los parsers (parse_*) son texto puro: gspread/Playwright y los secretos
+# (CONTROL_SHEET_ID, GOOGLE_SA_JSON_BASE64) se cargan sólo al usarlos, para
+# poder importar el módulo en bench_suite.py sin credenciales.
 import os, json, re, asyncio, base64
 from datetime import datetime
-import gspread
-from google.oauth2.service_account import Credentials
-from playwright.async_api import async_playwright
 
-SHEET_ID = os.environ["CONTROL_SHEET_ID"]  # ENCRYPTED/secret en Actions
+from stage_timing import span, note
+from profiling import profiled
+
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
-SA = json.loads(base64.b64decode(os.environ["GOOGLE_SA_JSON_BASE64"]).decode("utf-8"))
 
 # URLs de resultados (páginas públicas visibles en navegador)
 FEEDS = {
@@ -21,9 +22,13 @@ FEEDS = {
 
 # ===== Helpers Google Sheets =====
 def open_sheet():
-    creds = Credentials.from_service_account_info(SA, scopes=SCOPES)
+    import gspread
+    from google.oauth2.service_account import Credentials
+    sheet_id = os.environ["CONTROL_SHEET_ID"]  # ENCRYPTED/secret en Actions
+    sa = json.loads(base64.b64decode(os.environ["GOOGLE_SA_JSON_BASE64"]).decode("utf-8"))
+    creds = Credentials.from_service_account_info(sa, scopes=SCOPES)
     gc = gspread.authorize(creds)
-    return gc.open_by_key(SHEET_ID)
+    return gc.open_by_key(sheet_id)
 
 def header_map(sh):
     hdr = sh.row_values(1)
@@ -116,6 +121,7 @@ PARSERS = {
 }
 
 async def grab_text(url):
+    from playwright.async_api import async_playwright
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
         ctx = await browser.new_context(user_agent="Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
@@ -139,10 +145,12 @@ async def main_async():
             print(f"  ⚠️  {game}: no se pudo parsear")
             continue
         upsert_by_fecha(ss.worksheet(sheet_name), row)
+        note(rows=1)
         print(f"  ✓ {game}: {row['FECHA']} -> actualizado")
 
 def main():
     asyncio.run(main_async())
 
 if __name__ == "__main__":
-    main()
+    with span("fetch", "results"), profiled("fetch_lae_results"):
+        main()
@@ -13,6 +13,9 @@ from datetime import date, datetime, timedelta
 from pathlib import Path
 from playwright.sync_api import sync_playwright
 
+from stage_timing import span, note
+from profiling import profiled
+
 REPO_ROOT = Path(__file__).resolve().parents[2]
 OUT_DIR   = REPO_ROOT / "docs" / "api"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -94,6 +97,7 @@ def run_latest(games: list, win_days: int):
 
                 out = OUT_DIR / f"{g}_latest.json"
                 save_json(out, latest)
+                note(rows=len(sorteos), bytes=out.stat().st_size)
                 print(f"[ok] {g} -> {out}", flush=True)
 
             except Exception as e:
@@ -112,4 +116,5 @@ def parse_args():
 if __name__ == "__main__":
     args = parse_args()
     games = [g.strip().lower() for g in args.games.split(",") if g.strip()]
-    run_latest(games, args.window_days)
+    with span("fetch", "runner"), profiled("fetch_lae_runner"):
+        run_latest(games, args.window_days)
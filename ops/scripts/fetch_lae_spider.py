@@ -4,6 +4,10 @@ from datetime import date, datetime
 from typing import Dict, Any, List, Tuple
 from playwright.sync_api import sync_playwright
 
+from api_shards import write_shards
+from stage_timing import span, note
+from profiling import profiled
+
 OUT_DIR = os.path.join("docs", "api")
 os.makedirs(OUT_DIR, exist_ok=True)
 
@@ -226,6 +230,10 @@ def run_spider():
 
     with open(os.path.join(OUT_DIR, "lae_historico.json"), "w", encoding="utf-8") as f:
         json.dump(payload, f, ensure_ascii=False, indent=2)
+    note(rows=len(payload["results"]), bytes=os.path.getsize(os.path.join(OUT_DIR, "lae_historico.json")))
+
+    # shards por juego/año + index.json (sólo reescribe lo que cambia)
+    write_shards(payload["results"], OUT_DIR)
 
     for g, arr in all_draws.items():
         with open(os.path.join(OUT_DIR, f"{g}.json"), "w", encoding="utf-8") as f:
@@ -239,4 +247,5 @@ def run_spider():
     print("by_game_counts:", payload["by_game_counts"])
 
 if __name__ == "__main__":
-    run_spider()
+    with span("fetch", "spider"), profiled("fetch_lae_spider"):
+        run_spider()
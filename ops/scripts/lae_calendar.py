@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/lae_calendar.py
+"""
+Calendario de sorteos LAE (compartido por fetchers y DQ)
+
+Días de sorteo por juego (0=Lunes ... 6=Domingo) con vigencia: cada juego
+tiene una lista de tramos (desde, días) ordenada; un tramo vale hasta que
+empieza el siguiente. WEEKDAYS es el calendario vigente hoy (el que usan los
+fetchers para decidir qué fechas pedir).
+
+  PRIMITIVA  J, S; también L desde el 11/07/2022 (así aparece en el histórico)
+  BONOLOTO   L a S; también D desde el 25/09/2022 (así aparece en el histórico)
+  EURO       M, V
+  GORDO      D
+
+EXCEPTIONS corrige el calendario fecha a fecha: "skip" = día de sorteo sin
+sorteo (suspensión, festivo), "extra" = sorteo fuera de su día (traslado).
+Un traslado es las dos cosas:
+  "EURO": {"skip": ["2020-12-25"], "extra": ["2020-12-26"]}
+Sólo se añaden fechas confirmadas en la web de LAE.
+
+Uso:
+  python ops/scripts/lae_calendar.py GAME FECHA [FECHA...]   # ¿hay sorteo?
+"""
+
+import sys
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+SCHEDULES: Dict[str, List[Tuple[Optional[str], Set[int]]]] = {
+    "PRIMITIVA": [(None, {3, 5}), ("2022-07-11", {0, 3, 5})],
+    "BONOLOTO":  [(None, {0, 1, 2, 3, 4, 5}), ("2022-09-25", {0, 1, 2, 3, 4, 5, 6})],
+    "EURO":      [(None, {1, 4})],
+    "GORDO":     [(None, {6})],
+}
+
+EXCEPTIONS: Dict[str, Dict[str, List[str]]] = {
+    "PRIMITIVA": {"skip": [], "extra": []},
+    "BONOLOTO":  {"skip": [], "extra": []},
+    "EURO":      {"skip": [], "extra": []},
+    "GORDO":     {"skip": [], "extra": []},
+}
+
+# Días reales de sorteo hoy (0=Lunes ... 6=Domingo)
+WEEKDAYS: Dict[str, Set[int]] = {g: set(s[-1][1]) for g, s in SCHEDULES.items()}
+
+def weekdays_on(game: str, day) -> Set[int]:
+    """Días de sorteo de 'game' vigentes en la fecha 'day'."""
+    day = pd.Timestamp(day)
+    current: Set[int] = set()
+    for since, days in SCHEDULES.get(game, []):
+        if since is None or day >= pd.Timestamp(since):
+            current = days
+    return set(current)
+
+def is_draw_day(game: str, dates) -> np.ndarray:
+    """
+    Vectorizado: array bool, True si en esa fecha hay sorteo según el tramo
+    vigente y EXCEPTIONS. NaT -> False. Juego desconocido -> todo False.
+    """
+    d = pd.to_datetime(pd.Series(dates)).reset_index(drop=True)
+    out = np.zeros(len(d), dtype=bool)
+    periods = SCHEDULES.get(game, [])
+    wd = d.dt.weekday.to_numpy(dtype=float, na_value=np.nan)
+    for i, (since, days) in enumerate(periods):
+        lo = pd.Timestamp(since) if since else None
+        hi = pd.Timestamp(periods[i + 1][0]) if i + 1 < len(periods) else None
+        in_period = d.notna().to_numpy().copy()
+        if lo is not None:
+            in_period &= (d >= lo).to_numpy()
+        if hi is not None:
+            in_period &= (d < hi).to_numpy()
+        out |= in_period & np.isin(wd, sorted(days))
+    exc = EXCEPTIONS.get(game) or {}
+    day = d.dt.normalize().to_numpy(dtype="datetime64[ns]")
+    if exc.get("skip"):
+        out &= ~np.isin(day, pd.to_datetime(exc["skip"]).to_numpy(dtype="datetime64[ns]"))
+    if exc.get("extra"):
+        out |= np.isin(day, pd.to_datetime(exc["extra"]).to_numpy(dtype="datetime64[ns]"))
+    return out
+
+def draw_dates(game: str, start, end) -> pd.DatetimeIndex:
+    """Fechas de sorteo esperadas de 'game' entre start y end (ambas incluidas)."""
+    days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D")
+    return days[is_draw_day(game, days)]
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    game = sys.argv[1].upper()
+    dates = pd.to_datetime(sys.argv[2:], dayfirst=True)
+    for d, ok in zip(dates, is_draw_day(game, dates)):
+        print(f"{d.date()} {'sí' if ok else 'no'} (días {sorted(weekdays_on(game, d))})")
+
+if __name__ == "__main__":
+    main()
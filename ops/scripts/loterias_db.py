@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/loterias_db.py
+"""
+Almacén SQLite local · Loterías (dist/loterias.sqlite)
+
+Cada hoja normalizada va a su propia tabla (Historico_20250921_1456.csv -> "historico")
+en lugar de mezclarse en el CSV ancho y disperso de loterias_master.csv.
+
+- Una tabla = el último snapshot de su hoja (por sello); si llegan varios
+  (--snapshots all o un rango) los anteriores se ignoran con un aviso
+- Clave primaria (_rowhash, _dup) -> carga incremental: sólo se insertan las
+  filas nuevas y se borran las que ya no están en la hoja. _dup numera las
+  repeticiones de una misma fila dentro del fichero (0, 1, ...): los duplicados
+  genuinos de la hoja se conservan como filas propias
+- Índice (game, fecha_estandar) en cada tabla para consultas por juego/fecha
+- Inserción masiva con executemany dentro de una única transacción
+- Columnas nuevas en la hoja -> ALTER TABLE ADD COLUMN (el esquema sólo crece)
+
+Uso:
+  python ops/scripts/loterias_db.py [dist/loterias_norm] [--db dist/loterias.sqlite]
+"""
+
+import os, re, sys, glob, sqlite3, argparse
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from snapshot_catalog import parse_name
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DIST_DIR = os.path.join(BASE_DIR, "dist")
+DB_PATH  = os.environ.get("LOT_SQLITE", os.path.join(DIST_DIR, "loterias.sqlite"))
+
+META_COLS = ["_rowhash", "_dup", "game", "fecha_estandar", "_source", "_loaded_at"]
+
+# Juego por hoja (Historico*) o por sufijo (Pagos_*, Raw_Pagos_*)
+GAME_BY_SHEET = {
+    "historico": "PRIMITIVA",
+    "historicobono": "BONOLOTO",
+    "historicogordo": "GORDO",
+    "historicoeuro": "EURO",
+}
+GAME_ALIASES = {
+    "primitiva": "PRIMITIVA", "la primitiva": "PRIMITIVA",
+    "bonoloto": "BONOLOTO",
+    "gordo": "GORDO", "el gordo": "GORDO", "el gordo de la primitiva": "GORDO",
+    "euro": "EURO", "euromillones": "EURO",
+}
+GAME_COLUMNS = ("Juego", "GAME", "game")
+
+def table_name(filename: str) -> str:
+    """'Raw_Pagos_Gordo_20250921_1456.csv' -> 'raw_pagos_gordo'."""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    stem = re.sub(r"_\d{8}_\d{4}$", "", stem)
+    return re.sub(r"[^a-z0-9_]", "_", stem.strip().lower()) or "sheet"
+
+def qi(name: str) -> str:
+    """Identificador SQLite entre comillas dobles."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+def game_for(table: str, df: pd.DataFrame) -> pd.Series:
+    if table in GAME_BY_SHEET:
+        return pd.Series(GAME_BY_SHEET[table], index=df.index)
+    m = re.match(r"^(?:raw_)?pagos_(.+)$", table)
+    if m and m.group(1) in GAME_ALIASES:
+        return pd.Series(GAME_ALIASES[m.group(1)], index=df.index)
+    for col in GAME_COLUMNS:
+        if col in df.columns:
+            return df[col].astype(str).str.strip().str.lower().map(GAME_ALIASES)
+    return pd.Series(None, index=df.index, dtype=object)
+
+# --- Esquema ---------------------------------------------------------------------
+def sql_safe_columns(columns: Iterable[str]) -> Dict[str, str]:
+    """
+    SQLite no distingue mayúsculas en nombres de columna: 'GAME' choca con la
+    meta-columna 'game'. Devuelve {columna original: nombre en la tabla}.
+    """
+    used = {c.lower() for c in META_COLS}
+    out: Dict[str, str] = {}
+    for c in columns:
+        name, n = c, 1
+        while name.lower() in used:
+            name = f"{c}_{n}"
+            n += 1
+        used.add(name.lower())
+        out[c] = name
+    return out
+
+def existing_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({qi(table)})")]
+
+def ensure_table(conn: sqlite3.Connection, table: str, columns: List[str]) -> None:
+    cols = existing_columns(conn, table)
+    if cols and "_dup" not in cols:
+        # tabla con la clave antigua (sólo _rowhash): se recarga entera
+        conn.execute(f"DROP TABLE {qi(table)}")
+        cols = []
+    if not cols:
+        body = ", ".join([f"{qi('_rowhash')} TEXT", f"{qi('_dup')} INTEGER"] +
+                         [f"{qi(c)} TEXT" for c in META_COLS[2:]] +
+                         [f"{qi(c)} TEXT" for c in columns if c not in META_COLS] +
+                         [f"PRIMARY KEY ({qi('_rowhash')}, {qi('_dup')})"])
+        conn.execute(f"CREATE TABLE {qi(table)} ({body})")
+    else:
+        have = {c.lower() for c in cols}
+        for c in columns:
+            if c.lower() not in have:
+                conn.execute(f"ALTER TABLE {qi(table)} ADD COLUMN {qi(c)} TEXT")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {qi('ix_' + table + '_game_fecha')} "
+                 f"ON {qi(table)} (game, fecha_estandar)")
+
+# --- Carga ----------------------------------------------------------------------
+def snapshot_key(source: str) -> Tuple[str, str]:
+    """Orden de snapshots de una hoja: por sello (los ficheros sin sello, primero)."""
+    return (parse_name(os.path.basename(source))["stamp"] or "", source)
+
+def _frame_for_table(table: str, parts: List[Tuple[str, pd.DataFrame]]) -> pd.DataFrame:
+    """
+    Filas de la tabla = las del último snapshot. Unir varios dejaría vivas filas
+    que el último ya borró o cambió (con su hash viejo).
+    """
+    parts = [(src, df) for src, df in parts if "_rowhash" in df.columns]
+    if not parts:
+        return pd.DataFrame(columns=META_COLS)
+    source, df = max(parts, key=lambda p: snapshot_key(p[0]))
+    df = df.copy()
+    if "fecha_estandar" not in df.columns:
+        df["fecha_estandar"] = None
+    df["game"] = game_for(table, df)
+    df["_source"] = source
+    # n-ésima repetición de la fila en el fichero
+    df["_dup"] = df.groupby("_rowhash", sort=False).cumcount()
+    return df
+
+def load_tables(conn: sqlite3.Connection, parts_by_table: Dict[str, List[Tuple[str, pd.DataFrame]]]) -> Dict[str, Dict[str, int]]:
+    stats: Dict[str, Dict[str, int]] = {}
+    loaded_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    with conn:  # una sola transacción para todas las tablas
+        for table, parts in sorted(parts_by_table.items()):
+            df = _frame_for_table(table, parts)
+            rename = sql_safe_columns(c for c in df.columns if c not in META_COLS)
+            df = df.rename(columns=rename)
+            data_cols = list(rename.values())
+            ensure_table(conn, table, data_cols)
+            df["_loaded_at"] = loaded_at
+            cols = META_COLS + data_cols
+            df = df[cols].astype(object).where(df[cols].notna(), None)
+
+            before = conn.execute(f"SELECT COUNT(*) FROM {qi(table)}").fetchone()[0]
+
+            # claves vigentes en una tabla temporal -> borrar las filas que ya no existen
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS _cur (h TEXT, d INTEGER, PRIMARY KEY (h, d))")
+            conn.execute("DELETE FROM _cur")
+            conn.executemany("INSERT OR IGNORE INTO _cur (h, d) VALUES (?, ?)",
+                             zip(df["_rowhash"], df["_dup"]))
+            deleted = conn.execute(
+                f"DELETE FROM {qi(table)} WHERE NOT EXISTS "
+                f"(SELECT 1 FROM _cur WHERE h = {qi(table)}._rowhash AND d = {qi(table)}._dup)").rowcount
+
+            placeholders = ", ".join("?" for _ in cols)
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {qi(table)} ({', '.join(qi(c) for c in cols)}) VALUES ({placeholders})",
+                df.itertuples(index=False, name=None))
+            after = conn.execute(f"SELECT COUNT(*) FROM {qi(table)}").fetchone()[0]
+            stats[table] = {"rows": int(after), "inserted": int(after - before + deleted), "deleted": int(deleted)}
+    return stats
+
+def build_sqlite(out_dir: str, db_path: str = DB_PATH, paths: Optional[Iterable[str]] = None) -> str:
+    """Carga los CSV normalizados de out_dir (o 'paths') en db_path, una tabla por hoja."""
+    paths = sorted(paths) if paths is not None else sorted(glob.glob(os.path.join(out_dir, "*.csv")))
+    # un snapshot por hoja: el último (los anteriores ni se leen)
+    latest: Dict[str, str] = {}
+    for p in paths:
+        t = table_name(p)
+        if t not in latest or snapshot_key(p) > snapshot_key(latest[t]):
+            latest[t] = p
+    skipped = len(paths) - len(latest)
+    if skipped:
+        print(f"ℹ️  SQLite: {skipped} snapshots anteriores ignorados (se carga el último de cada hoja)")
+    parts_by_table: Dict[str, List[Tuple[str, pd.DataFrame]]] = {}
+    for p in sorted(latest.values()):
+        try:
+            df = pd.read_csv(p, dtype=str, encoding="utf-8")
+        except Exception as e:
+            print(f"⚠️  SQLite: no se pudo leer {os.path.basename(p)}: {e}")
+            continue
+        parts_by_table.setdefault(table_name(p), []).append((os.path.basename(p), df))
+
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA synchronous=NORMAL")
+        stats = load_tables(conn, parts_by_table)
+    finally:
+        conn.close()
+
+    for t, s in stats.items():
+        print(f"   · {t}: {s['rows']} filas (+{s['inserted']} / -{s['deleted']})")
+    print(f"✓ SQLite: {db_path} ({len(stats)} tablas)")
+    return db_path
+
+def main():
+    ap = argparse.ArgumentParser(description="Carga los CSV normalizados en SQLite (una tabla por hoja)")
+    ap.add_argument("norm_dir", nargs="?", default=os.path.join(DIST_DIR, "loterias_norm"))
+    ap.add_argument("--db", default=DB_PATH)
+    args = ap.parse_args()
+    build_sqlite(args.norm_dir, args.db)
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,16 @@ from datetime import datetime, timezone
 from string import Template
 from pathlib import Path
 
+import stage_timing
+from profiling import profiled
+import run_metrics
+import svg_charts
+from publish_pages import minify_html, PANEL_MAX_BYTES
+
 # --- Config ---
 DIST = os.environ.get("DIST_DIR", "dist")
 DOCS_HTML = "docs/index.html"
+DOCS_REPORT_JSON = "docs/report.json"
 DQ_REPORT_TXT = os.path.join(DIST, "dq_report.txt")
 DRIVE_LINKS_TXT = os.path.join(DIST, "drive_links.txt")
 REPORT_JSON = os.path.join(DIST, "report.json")
@@ -47,6 +54,24 @@ def zip_list():
     zips = sorted(glob.glob(os.path.join(DIST, "*.zip")))
     return [os.path.basename(z) for z in zips]
 
+def artifact_sizes(zips):
+    """Bytes de los artefactos de la ejecución (para la serie de docs/metrics/)."""
+    paths = {"zips": [os.path.join(DIST, z) for z in zips],
+             "master_csv": [os.path.join(DIST, "loterias_master.csv")],
+             "sqlite": [os.path.join(DIST, "loterias.sqlite")]}
+    return {k: stage_timing.file_bytes(v) for k, v in paths.items() if any(os.path.isfile(p) for p in v)}
+
+def carried_stages():
+    """
+    Etapas del docs/report.json versionado. El job de Pages no ejecuta etapas
+    (dist/ vacío): las trae del último commit del job del pipeline.
+    """
+    try:
+        with open(DOCS_REPORT_JSON, "r", encoding="utf-8") as f:
+            return json.load(f).get("stages") or {}
+    except (OSError, ValueError):
+        return {}
+
 def parse_dq_status(txt):
     # Busca línea “Data Quality → WARN (warn=2, fail=0)” o similar
     status = "UNKNOWN"
@@ -75,14 +100,33 @@ def status_badge(status):
         return '❌ FAIL'
     return 'ℹ️ UNKNOWN'
 
-def build_report_json():
+def build_report_json(dq=None, manifest=None, master_csv=None, zips=None, stages=None):
+    """
+    Sin argumentos lee lo que dejaron las etapas en dist/.
+    run_pipeline pasa los resultados ya en memoria (dq={"status","warn","fail"},
+    ruta del manifest, existencia del master y lista de ZIPs).
+    'stages' = {etapa: medida}; por defecto la última de cada etapa en
+    dist/stage_metrics.jsonl (stage_timing.py) y, si no hay ninguna, las del
+    docs/report.json anterior (carried_stages).
+    Cada informe se apunta además en la serie histórica (run_metrics.py),
+    salvo que las etapas vengan de un informe anterior.
+    """
     now_utc = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-    manifest = find_latest_manifest()
+    manifest = find_latest_manifest() if manifest is None else manifest
     manifest_name = os.path.basename(manifest) if manifest else ""
-    master_exists = os.path.exists(os.path.join(DIST, "loterias_master.csv"))
+    if master_csv is None:
+        master_csv = os.path.exists(os.path.join(DIST, "loterias_master.csv"))
 
-    dq_txt = read_text(DQ_REPORT_TXT)
-    dq_status, dq_warn, dq_fail = parse_dq_status(dq_txt)
+    carried = False
+    if stages is None:
+        stages = stage_timing.latest()
+        if not stages:
+            stages, carried = carried_stages(), True
+
+    if dq and "status" in dq:
+        dq_status, dq_warn, dq_fail = dq["status"], int(dq.get("warn", 0)), int(dq.get("fail", 0))
+    else:
+        dq_status, dq_warn, dq_fail = parse_dq_status((dq or {}).get("text") or read_text(DQ_REPORT_TXT))
 
     report = {
         "updated_utc": now_utc,
@@ -93,14 +137,18 @@ def build_report_json():
         },
         "files": {
             "manifest": manifest_name,
-            "master_csv": bool(master_exists),
-            "zips": zip_list()
+            "master_csv": bool(master_csv),
+            "zips": zip_list() if zips is None else list(zips)
         },
-        "drive_links": drive_links()
+        "drive_links": drive_links(),
+        "stages": stages
     }
     os.makedirs(DIST, exist_ok=True)
     with open(REPORT_JSON, "w", encoding="utf-8") as f:
         json.dump(report, f, ensure_ascii=False, indent=2)
+    if not carried:
+        run_metrics.record(report, rows=run_metrics.rows_from_manifest(manifest),
+                           sizes=artifact_sizes(report["files"]["zips"]))
     return report
 
 def as_html_list(items):
@@ -116,43 +164,57 @@ def as_links_list(links):
         out.append(f'<li><a href="{url}" target="_blank" rel="noopener">{name}</a></li>')
     return "\n".join(out)
 
-def build_chart_config(report):
-    # Gráfica simple: nº de zips por categoría + warn/fail
-    labels = ["ZIPs", "WARN", "FAIL"]
-    data = [
-        len(report["files"]["zips"]),
-        int(report["dq"]["warn"] or 0),
-        int(report["dq"]["fail"] or 0),
-    ]
-    cfg = {
-        "type": "bar",
-        "data": {
-            "labels": labels,
-            "datasets": [{
-                "label": "Resumen",
-                "data": data
-            }]
-        },
-        "options": {
-            "responsive": True,
-            "plugins": {
-                "legend": { "display": True }
-            },
-            "scales": {
-                "y": { "beginAtZero": True }
-            }
-        }
-    }
-    return json.dumps(cfg, ensure_ascii=False)
+# Mismo color por estado en todas las gráficas: WARN ámbar, FAIL rojo
+STATUS_COLORS = {"warn": svg_charts.AMBER, "fail": svg_charts.RED}
+
+def build_summary_svg(report):
+    # Resumen: nº de ZIPs + warn/fail
+    return svg_charts.bars([
+        ("ZIPs", len(report["files"]["zips"])),
+        ("WARN", int(report["dq"]["warn"] or 0)),
+        ("FAIL", int(report["dq"]["fail"] or 0)),
+    ], title="Resumen", colors=(svg_charts.BLUE, STATUS_COLORS["warn"], STATUS_COLORS["fail"]))
+
+# Gráficas de tendencia: (título, series de run_metrics.trends())
+TREND_CHARTS = [
+    ("WARN / FAIL", ["dq.warn", "dq.fail"]),
+    ("Filas normalizadas", ["rows.total"]),
+]
+SPARK_POINTS = 60
+
+def build_trend_html(trends):
+    """Líneas de DQ y filas + tabla de etapas con su minigráfica (SVG en línea)."""
+    charts = [svg_charts.lines({n.split(".", 1)[1]: trends[n] for n in names if trends.get(n)}, title,
+                               colors=STATUS_COLORS)
+              for title, names in TREND_CHARTS]
+    rows = []
+    for name, pts in trends.items():
+        if not name.startswith("stages."):
+            continue
+        spark = svg_charts.sparkline(run_metrics.downsample(pts, SPARK_POINTS))
+        rows.append(f"<tr><td><code>{name.split('.', 1)[1]}</code></td>"
+                    f"<td class=\"num\">{pts[-1][1]:.2f}s</td><td>{spark}</td></tr>")
+    if rows:
+        charts.append("<table><tr><th>Etapa</th><th>Última</th><th>Tendencia</th></tr>"
+                      + "".join(rows) + "</table>")
+    return "\n".join(c for c in charts if c) or '<p class="muted"><em>(sin histórico todavía)</em></p>'
 
 def build_html(report):
+    """
+    Panel autocontenido: gráficas SVG generadas aquí (sin JS de terceros ni CDN),
+    HTML minificado y el JSON completo aparte en docs/report.json, que sólo se
+    descarga al abrir "Ver JSON completo". Avisa si supera PANEL_MAX_BYTES
+    (publish_pages.py lo hace cumplir en el workflow de Pages).
+    Devuelve los bytes del HTML.
+    """
     updated = report["updated_utc"]
     badge = status_badge(report["dq"]["status"])
     manifest = report["files"]["manifest"] or "—"
     master_yes = "sí" if report["files"]["master_csv"] else "no"
     zips_html = as_html_list(report["files"]["zips"])
     links_html = as_links_list(report["drive_links"])
-    chart_config = build_chart_config(report)
+    summary_svg = build_summary_svg(report)
+    trend_html = build_trend_html(run_metrics.trends())
 
     # Usamos string.Template para evitar conflictos de llaves con JS
     tpl = Template("""<!doctype html>
@@ -161,7 +223,6 @@ def build_html(report):
 <meta charset="utf-8">
 <title>Fran Ops · Data Quality</title>
 <meta name="viewport" content="width=device-width, initial-scale=1">
-<link rel="preconnect" href="https://cdn.jsdelivr.net" crossorigin>
 <style>
  body{font-family:system-ui,-apple-system,Segoe UI,Roboto,Ubuntu,Arial,sans-serif;margin:20px;color:#111}
  h1{font-size:28px;margin:0 0 6px}
@@ -170,6 +231,9 @@ def build_html(report):
  code{background:#f6f8fa;padding:2px 6px;border-radius:4px}
  details{margin-top:8px}
  .badge{display:inline-block;padding:4px 10px;border-radius:999px;background:#efefef}
+ svg{max-width:100%;height:auto;display:block;margin:6px 0}
+ td{padding:2px 8px;vertical-align:middle}
+ .num{text-align:right}
 </style>
 </head>
 <body>
@@ -179,7 +243,12 @@ def build_html(report):
   <section>
     <h2>Estado DQ</h2>
     <p>Estado: <span class="badge">$badge</span> <span class="muted">(warn=$warn, fail=$fail)</span></p>
-    <canvas id="chart" width="600" height="260"></canvas>
+    $summary_svg
+  </section>
+
+  <section>
+    <h2>Tendencia</h2>
+    $trend_html
   </section>
 
   <section>
@@ -198,18 +267,19 @@ def build_html(report):
     </ul>
   </section>
 
-  <details>
+  <details id="json">
     <summary>Ver JSON completo</summary>
-    <pre><code>$report_pretty</code></pre>
+    <pre><code></code></pre>
   </details>
 
-  <script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js"></script>
   <script>
-    (function(){
-      const ctx = document.getElementById('chart').getContext('2d');
-      const cfg = $chart_config;
-      new Chart(ctx, cfg);
-    })();
+    document.getElementById('json').addEventListener('toggle', function(){
+      var out = this.querySelector('code');
+      if (!this.open || out.textContent) return;
+      fetch('$report_href').then(function(r){ return r.json(); })
+        .then(function(j){ out.textContent = JSON.stringify(j, null, 2); })
+        .catch(function(){ out.textContent = '$report_href no disponible'; });
+    });
   </script>
 </body>
 </html>""")
@@ -223,18 +293,26 @@ def build_html(report):
         master_yes=master_yes,
         zips_html=zips_html,
         links_html=links_html,
-        report_pretty=json.dumps(report, ensure_ascii=False, indent=2),
-        chart_config=chart_config
+        summary_svg=summary_svg,
+        trend_html=trend_html,
+        report_href=os.path.basename(DOCS_REPORT_JSON)
     )
+    data = minify_html(html).encode("utf-8")
     Path("docs").mkdir(parents=True, exist_ok=True)
-    with open(DOCS_HTML, "w", encoding="utf-8") as f:
-        f.write(html)
+    with open(DOCS_HTML, "wb") as f:
+        f.write(data)
+    with open(DOCS_REPORT_JSON, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, separators=(",", ":"))
+    if len(data) > PANEL_MAX_BYTES:
+        print(f"⚠️  {DOCS_HTML}: {len(data)} bytes > presupuesto {PANEL_MAX_BYTES} (PANEL_MAX_BYTES)")
+    return len(data)
 
 def main():
     report = build_report_json()
-    build_html(report)
-    print(f"✓ JSON: {REPORT_JSON}")
-    print(f"✓ HTML: {DOCS_HTML}")
+    size = build_html(report)
+    print(f"✓ JSON: {REPORT_JSON} · {DOCS_REPORT_JSON}")
+    print(f"✓ HTML: {DOCS_HTML} ({size} bytes)")
 
 if __name__ == "__main__":
-    main()
+    with profiled("make_report"):
+        main()
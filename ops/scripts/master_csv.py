@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/master_csv.py
+"""
+Escritura en streaming de dist/loterias_master.csv
+
+- Cabecera unificada calculada al principio leyendo sólo la 1ª línea de cada
+  CSV normalizado (mismo orden de columnas que el antiguo pd.concat)
+- Cada fichero se añade por bloques (MASTER_CHUNK_ROWS filas) alineado a esa
+  cabecera: la memoria pico es un bloque, no la suma de todas las hojas
+- Índice de segmentos junto al master (loterias_master.segments.json):
+  por fichero origen, su sha256 y el rango de bytes que ocupa en el master
+- Modo incremental: si la cabecera no cambia, los segmentos de orígenes sin
+  cambios se copian byte a byte del master anterior y sólo se regeneran los
+  de los orígenes modificados; si cambia la cabecera se reconstruye entero
+- Pre-renderizado: con el pool de normalize, cada segmento que haya que
+  regenerar se renderiza en <master>.parts/ en cuanto termina su fichero,
+  contra la cabecera del master anterior (prerender_plan). write_master sólo
+  concatena esos ficheros si la cabecera final coincide (lo normal: mismas
+  hojas, mismas columnas); si no, los renderiza otra vez
+
+Uso:
+  python ops/scripts/master_csv.py [dist/loterias_norm] [--out dist/loterias_master.csv] [--full]
+"""
+
+import os, io, csv, sys, json, glob, shutil, argparse
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from run_manifest import file_digest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DIST_DIR = os.path.join(BASE_DIR, "dist")
+MASTER_PATH = os.path.join(DIST_DIR, "loterias_master.csv")
+SOURCE_COL = "_source"
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+CHUNK_ROWS = _env_int("MASTER_CHUNK_ROWS", 50000)
+
+def index_path(master_path: str) -> str:
+    return os.path.splitext(master_path)[0] + ".segments.json"
+
+def parts_dir(master_path: str) -> str:
+    return os.path.splitext(master_path)[0] + ".parts"
+
+# --- Cabecera -------------------------------------------------------------------
+def read_header(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return next(csv.reader(f), [])
+
+def source_info(path: str) -> Dict:
+    """Cabecera + sha256 de un CSV normalizado (se puede calcular en cuanto termina)."""
+    return {"header": read_header(path), "sha256": file_digest(path)}
+
+def unified_header(headers: Iterable[List[str]]) -> List[str]:
+    """Unión ordenada por aparición; cada fichero aporta sus columnas + _source."""
+    seen: Dict[str, None] = {}
+    for h in headers:
+        for c in list(h) + [SOURCE_COL]:
+            seen.setdefault(c, None)
+    return list(seen)
+
+# --- Segmentos ------------------------------------------------------------------
+def render_segment(path: str, header: List[str], out, chunk_rows: int = CHUNK_ROWS) -> int:
+    """Escribe en 'out' (binario) las filas de 'path' alineadas a 'header'. Devuelve nº de filas."""
+    rows = 0
+    name = os.path.basename(path)
+    for chunk in pd.read_csv(path, dtype=str, encoding="utf-8", chunksize=chunk_rows):
+        chunk[SOURCE_COL] = name
+        buf = io.StringIO()
+        chunk.reindex(columns=header).to_csv(buf, index=False, header=False)
+        out.write(buf.getvalue().encode("utf-8"))
+        rows += len(chunk)
+    return rows
+
+def _copy_range(src, out, offset: int, length: int, block: int = 1 << 20) -> None:
+    src.seek(offset)
+    while length > 0:
+        data = src.read(min(block, length))
+        if not data:
+            raise IOError("master anterior truncado")
+        out.write(data)
+        length -= len(data)
+
+def load_index(master_path: str) -> Dict:
+    try:
+        with open(index_path(master_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _reusable(index: Dict, header: List[str], master_path: str) -> bool:
+    if not index or index.get("header") != header or not os.path.isfile(master_path):
+        return False
+    return os.path.getsize(master_path) == index.get("bytes")
+
+# --- Pre-renderizado (solapado con el pool de normalize) --------------------------
+def prerender_plan(master_path: str = MASTER_PATH, incremental: bool = True) -> Dict:
+    """
+    Cabecera del master anterior (la que casi siempre vuelve a salir) y sha256 de
+    sus segmentos reutilizables (esos se copiarán: no hace falta renderizarlos).
+    """
+    prev = load_index(master_path)
+    header = prev.get("header")
+    reuse = incremental and bool(header) and _reusable(prev, header, master_path)
+    return {"header": header,
+            "sha256": {s["source"]: s["sha256"] for s in prev.get("segments", [])} if reuse else {}}
+
+def prerender(path: str, info: Dict, plan: Dict, master_path: str = MASTER_PATH,
+              chunk_rows: int = CHUNK_ROWS) -> Optional[Dict]:
+    """
+    Renderiza ya el segmento de 'path' en <master>.parts/ contra la cabecera del plan.
+    None si no merece la pena (sin cabecera prevista, columnas nuevas o segmento que se copiará).
+    """
+    header, name = plan.get("header"), os.path.basename(path)
+    if not header or not info["header"] or not set(info["header"]) <= set(header):
+        return None
+    if plan["sha256"].get(name) == info["sha256"]:
+        return None
+    os.makedirs(parts_dir(master_path), exist_ok=True)
+    out_path = os.path.join(parts_dir(master_path), name + ".part")
+    with open(out_path, "wb") as out:
+        rows = render_segment(path, header, out, chunk_rows)
+    return {"path": out_path, "header": header, "rows": rows}
+
+def write_master(paths: List[str], master_path: str = MASTER_PATH, incremental: bool = True,
+                 infos: Optional[Dict[str, Dict]] = None, chunk_rows: int = CHUNK_ROWS) -> Dict:
+    """
+    Escribe el master a partir de 'paths' (en ese orden). 'infos' = {fichero: source_info}
+    ya calculados (los que falten se calculan aquí); si traen "segment" (prerender)
+    y su cabecera es la final, el segmento se concatena tal cual.
+    Devuelve el índice nuevo con "rendered"/"copied"/"prerendered" (nombres de fichero).
+    """
+    infos = dict(infos or {})
+    for p in paths:
+        name = os.path.basename(p)
+        if name not in infos:
+            infos[name] = source_info(p)
+    # CSV vacíos (sin cabecera) no aportan nada, como antes
+    paths = [p for p in paths if infos[os.path.basename(p)]["header"]]
+    header = unified_header(infos[os.path.basename(p)]["header"] for p in paths)
+
+    prev = load_index(master_path) if incremental else {}
+    reuse = _reusable(prev, header, master_path)
+    prev_segments = {s["source"]: s for s in prev.get("segments", [])} if reuse else {}
+
+    segments, rendered, copied, prerendered = [], [], [], []
+    tmp = master_path + ".tmp"
+    os.makedirs(os.path.dirname(master_path) or ".", exist_ok=True)
+    old = open(master_path, "rb") if reuse else None
+    try:
+        with open(tmp, "wb") as out:
+            buf = io.StringIO()
+            csv.writer(buf, lineterminator="\n").writerow(header)
+            out.write(buf.getvalue().encode("utf-8"))
+            for p in paths:
+                name = os.path.basename(p)
+                info = infos[name]
+                start = out.tell()
+                seg = prev_segments.get(name)
+                if seg and seg["sha256"] == info["sha256"]:
+                    _copy_range(old, out, seg["offset"], seg["length"])
+                    rows = seg["rows"]
+                    copied.append(name)
+                elif (info.get("segment") or {}).get("header") == header:
+                    with open(info["segment"]["path"], "rb") as part:
+                        shutil.copyfileobj(part, out, 1 << 20)
+                    rows = info["segment"]["rows"]
+                    rendered.append(name)
+                    prerendered.append(name)
+                else:
+                    rows = render_segment(p, header, out, chunk_rows)
+                    rendered.append(name)
+                segments.append({"source": name, "sha256": info["sha256"],
+                                 "offset": start, "length": out.tell() - start, "rows": rows})
+            total = out.tell()
+    finally:
+        if old:
+            old.close()
+        shutil.rmtree(parts_dir(master_path), ignore_errors=True)
+    os.replace(tmp, master_path)
+
+    index = {"header": header, "bytes": total, "rows": sum(s["rows"] for s in segments),
+             "segments": segments}
+    with open(index_path(master_path), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    return {**index, "rendered": rendered, "copied": copied, "prerendered": prerendered}
+
+def main():
+    ap = argparse.ArgumentParser(description="Construye loterias_master.csv en streaming")
+    ap.add_argument("norm_dir", nargs="?", default=os.path.join(DIST_DIR, "loterias_norm"))
+    ap.add_argument("--out", default=MASTER_PATH)
+    ap.add_argument("--full", action="store_true", help="reconstruye todos los segmentos")
+    args = ap.parse_args()
+    paths = sorted(glob.glob(os.path.join(args.norm_dir, "*.csv")))
+    idx = write_master(paths, args.out, incremental=not args.full)
+    print(f"✓ Master CSV: {args.out} ({idx['rows']} filas · regenerados {len(idx['rendered'])}"
+          f" · copiados {len(idx['copied'])})")
+
+if __name__ == "__main__":
+    main()
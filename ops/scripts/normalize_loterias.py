@@ -1,53 +1,41 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os, sys, csv, glob, hashlib
+import os, sys, csv, glob, time, hashlib, argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 import pandas as pd
 
+from loterias_db import build_sqlite, DB_PATH
+from run_manifest import stage_unchanged, record_stage, force_enabled
+from csv_reader import read_csv, dialect_for, save_cache as save_dialect_cache
+from sheet_schema import apply_schema, for_csv
+from master_csv import write_master, source_info, index_path, prerender_plan, prerender
+from date_parse import parse_dates
+from snapshot_catalog import select_paths, DEFAULT_SELECT
+from rowhash_store import value_keys
+from stage_timing import span, file_bytes
+from profiling import profiled
+
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 DATA_DIR = os.path.join(BASE_DIR, "loterias", "data")
 DIST_DIR = os.path.join(BASE_DIR, "dist")
 OUT_DIR  = os.path.join(DIST_DIR, "loterias_norm")
+MASTER_PATH = os.path.join(DIST_DIR, "loterias_master.csv")
 
 os.makedirs(DIST_DIR, exist_ok=True)
 os.makedirs(OUT_DIR,  exist_ok=True)
 
 # --- Utilidades --------------------------------------------------------------
 
-def _try_read(path, **kw):
-    """Intento básico de lectura con pandas."""
-    return pd.read_csv(path, **kw)
-
 def robust_read_csv(path: str) -> pd.DataFrame:
     """
-    Lector robusto:
-      1) Autodetección con engine='python', sep=None
-      2) Reintentos con separadores comunes
-      3) on_bad_lines='skip' para saltar líneas corruptas
+    Lector robusto (csv_reader compartido con DQ):
+      1) Dialecto olfateado del primer KB y cacheado por hoja/cabecera
+      2) Parseo con el motor C (o pyarrow)
+      3) Sólo si falla: ruta tolerante (engine='python', reintentos, líneas rotas)
     """
-    common_kw = dict(encoding="utf-8", dtype=str)
-    # 1) Autodetección
-    try:
-        return _try_read(path, sep=None, engine="python", on_bad_lines="warn", **common_kw)
-    except Exception:
-        pass
-
-    # 2) Reintentos por separador
-    for sep in [",", ";", "\t", "|"]:
-        try:
-            return _try_read(path, sep=sep, engine="python", on_bad_lines="warn", **common_kw)
-        except Exception:
-            continue
-
-    # 3) Último recurso: sin encabezado, luego renombramos
-    try:
-        df = _try_read(path, header=None, engine="python", on_bad_lines="skip", **common_kw)
-        # genera nombres de columnas genéricos
-        df.columns = [f"col_{i+1}" for i in range(df.shape[1])]
-        return df
-    except Exception as e:
-        raise RuntimeError(f"No se pudo leer {path}: {e}")
+    return read_csv(path)
 
 def clean_df(df: pd.DataFrame) -> pd.DataFrame:
     """Limpieza general: espacios, columnas totalmente vacías y normalización básica."""
@@ -61,8 +49,35 @@ def clean_df(df: pd.DataFrame) -> pd.DataFrame:
             df[c] = df[c].astype(str).str.strip()
     return df
 
-def add_hash(df: pd.DataFrame) -> pd.DataFrame:
+# md5 -> mismos valores que la versión fila a fila (compatibilidad con _rowhash ya publicados)
+# fast -> hash estable de 64 bits de pandas sobre las columnas (16 hex), sin md5 por fila
+ROWHASH_MODE = os.environ.get("ROWHASH_MODE", "md5").strip().lower()
+
+def row_hashes(df: pd.DataFrame, mode: str = None) -> pd.Series:
+    """
+    Hash por fila vectorizado: una pasada por columna para construir
+    "v1|v2|...|vn" y un único bucle de hashing sobre el resultado.
+    """
+    mode = (mode or ROWHASH_MODE)
+    if df.shape[1] == 0:
+        return pd.Series([hashlib.md5(b"").hexdigest()] * len(df), index=df.index, dtype=object)
+    if mode == "fast":
+        # mismo hash que usa el DQ incremental (rowhash_store)
+        return pd.Series([f"{x:016x}" for x in value_keys(df)], index=df.index, dtype=object)
+    cols = [df.iloc[:, i].astype(object).fillna("").astype(str) for i in range(df.shape[1])]
+    joined = cols[0].to_numpy(dtype=object)
+    for c in cols[1:]:
+        joined = joined + "|" + c.to_numpy(dtype=object)
+    md5 = hashlib.md5
+    return pd.Series([md5(x.encode("utf-8")).hexdigest() for x in joined], index=df.index, dtype=object)
+
+def add_hash(df: pd.DataFrame, mode: str = None) -> pd.DataFrame:
     """Añade una columna _rowhash para trazabilidad."""
+    df["_rowhash"] = row_hashes(df, mode)
+    return df
+
+def add_hash_rowwise(df: pd.DataFrame) -> pd.DataFrame:
+    """Implementación original fila a fila (referencia para el benchmark y la compatibilidad)."""
     def row_hash(s: pd.Series) -> str:
         return hashlib.md5("|".join(s.fillna("").astype(str).tolist()).encode("utf-8")).hexdigest()
     df["_rowhash"] = df.apply(row_hash, axis=1)
@@ -73,15 +88,16 @@ def save_csv(df: pd.DataFrame, out_path: str):
 
 # --- Normalizadores específicos ---------------------------------------------
 
-def normalize_salidas(path: str) -> pd.DataFrame:
+def normalize_salidas(path: str, df: pd.DataFrame = None) -> pd.DataFrame:
     """
     'salidas.csv' a veces trae 2 columnas esperadas pero líneas con comas extra.
     Estrategia:
       - Leer robusto
       - Si hay >2 columnas, unificar desde la 2ª en un único campo 'detalle'
       - Renombrar a ['fecha', 'detalle'] si procede
+    'df' = hoja ya leída (run_pipeline); si no, se lee de 'path'.
     """
-    df = robust_read_csv(path)
+    df = robust_read_csv(path) if df is None else df.copy()
     df = clean_df(df)
 
     # Si llega con encabezados típicos intentamos detectarlos
@@ -109,19 +125,19 @@ def normalize_salidas(path: str) -> pd.DataFrame:
 
     # Normaliza fecha si es posible (dayfirst=True por formato español)
     if "fecha" in df.columns:
-        df["fecha_estandar"] = pd.to_datetime(df["fecha"], errors="coerce", dayfirst=True).dt.date
+        df["fecha_estandar"] = parse_dates(df["fecha"]).dt.date
 
     return add_hash(df)
 
-def normalize_generic(path: str) -> pd.DataFrame:
-    df = robust_read_csv(path)
+def normalize_generic(path: str, df: pd.DataFrame = None) -> pd.DataFrame:
+    df = robust_read_csv(path) if df is None else df.copy()
     df = clean_df(df)
 
     # Heurística: si hay columna fecha, normalízala a fecha_estandar
     for col in df.columns:
         if "fecha" in col.lower():
             try:
-                df["fecha_estandar"] = pd.to_datetime(df[col], errors="coerce", dayfirst=True).dt.date
+                df["fecha_estandar"] = parse_dates(df[col]).dt.date
                 break
             except Exception:
                 continue
@@ -130,21 +146,89 @@ def normalize_generic(path: str) -> pd.DataFrame:
 
 # --- Pipeline ----------------------------------------------------------------
 
-def normalize_file(csv_path: str, out_dir: str) -> dict:
+def normalize_one(csv_path: str, out_dir: str, raw: pd.DataFrame = None):
+    """Normaliza un CSV y devuelve (meta, DataFrame tipado o None si falla)."""
     name = os.path.basename(csv_path)
+    t0 = time.perf_counter()
     try:
         if name.lower() == "salidas.csv":
-            df = normalize_salidas(csv_path)
+            df = normalize_salidas(csv_path, raw)
         else:
-            df = normalize_generic(csv_path)
+            df = normalize_generic(csv_path, raw)
+        # tipos por familia de hoja (después del _rowhash, que se calcula sobre el texto)
+        text, df = df, apply_schema(df, name)
 
+        # el CSV conserva el texto original; los tipos sólo viven en memoria
         out_path = os.path.join(out_dir, name)
-        save_csv(df, out_path)
+        save_csv(for_csv(df, name, text), out_path)
         print(f"✓ Normalizado: {name} ({len(df)} filas)")
-        return {"file": name, "rows": len(df), "ok": True}
+        return {"file": name, "rows": len(df), "ok": True,
+                "seconds": round(time.perf_counter() - t0, 3)}, df
     except Exception as e:
         print(f"⚠️  Error normalizando {name}: {e}")
-        return {"file": name, "rows": 0, "ok": False, "error": str(e)}
+        return {"file": name, "rows": 0, "ok": False, "error": str(e),
+                "seconds": round(time.perf_counter() - t0, 3)}, None
+
+def normalize_file(csv_path: str, out_dir: str) -> dict:
+    return normalize_one(csv_path, out_dir)[0]
+
+def normalize_all(inputs: list, out_dir: str, workers: int = 1, raw: dict = None,
+                  master_path: str = None, incremental: bool = True):
+    """
+    Normaliza 'inputs' (en serie o en un pool de 'workers' procesos).
+    Devuelve (results, parts, frames):
+      - results en el mismo orden que 'inputs' (manifest determinista)
+      - parts: {fichero: cabecera + sha256} de cada salida para el master; con
+        pool y 'master_path' se calculan según terminan y además se renderiza
+        ya su segmento del master (master_csv.prerender), solapado con el
+        resto del pool
+      - frames: {fichero: DataFrame tipado} (sólo en serie; con pool, vacío:
+        quien los necesite vuelve a leer los CSV de out_dir)
+    'raw' = {ruta: DataFrame} con las hojas ya leídas (run_pipeline).
+    """
+    results = [None] * len(inputs)
+    parts, frames = {}, {}
+    plan = None
+
+    def collect(i, meta):
+        results[i] = meta
+        if meta.get("ok"):
+            path = os.path.join(out_dir, meta["file"])
+            info = source_info(path)
+            if plan is not None:
+                info["segment"] = prerender(path, info, plan, master_path)
+            parts[meta["file"]] = info
+
+    if workers <= 1 or len(inputs) <= 1:
+        for i, csv_file in enumerate(inputs):
+            meta, df = normalize_one(csv_file, out_dir, raw[csv_file] if raw is not None else None)
+            collect(i, meta)
+            if df is not None:
+                frames[meta["file"]] = df
+        return results, parts, frames
+
+    # dialectos olfateados aquí una vez y persistidos: los procesos hijos los leen de la caché
+    for p in inputs:
+        try:
+            dialect_for(p)
+        except OSError:
+            pass
+    save_dialect_cache()
+    if master_path:
+        plan = prerender_plan(master_path, incremental)
+
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futures = {ex.submit(normalize_file, p, out_dir): i for i, p in enumerate(inputs)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                meta = fut.result()
+            except Exception as e:  # el proceso hijo murió
+                name = os.path.basename(inputs[i])
+                print(f"⚠️  Error normalizando {name}: {e}")
+                meta = {"file": name, "rows": 0, "ok": False, "error": str(e), "seconds": None}
+            collect(i, meta)
+    return results, parts, frames
 
 def build_manifest(results: list, out_dir: str) -> str:
     ts = datetime.now().strftime("%Y%m%d")
@@ -161,34 +245,91 @@ def build_manifest(results: list, out_dir: str) -> str:
     print(f"Normalización Loterías · fin — archivos: {sum(1 for r in results if r.get('ok'))} · filas totales: {total}")
     return mani
 
-def build_master_csv(out_dir: str) -> str:
+def build_master_csv(out_dir: str, parts: dict = None, incremental: bool = True, paths: list = None) -> str:
     """
     Une todos los CSV normalizados en uno solo (añade columna _source).
+    Escritura en streaming por bloques; en modo incremental sólo se regeneran
+    los segmentos de los ficheros que han cambiado (ver master_csv.py).
+    'parts' = {fichero: source_info} ya calculados (los que falten se calculan).
+    'paths' limita el master a esos CSV (por defecto, todos los de out_dir).
     """
-    master_path = os.path.join(DIST_DIR, "loterias_master.csv")
-    parts = []
-    for f in sorted(glob.glob(os.path.join(out_dir, "*.csv"))):
-        try:
-            df = pd.read_csv(f, dtype=str, encoding="utf-8")
-            df["_source"] = os.path.basename(f)
-            parts.append(df)
-        except Exception:
-            continue
-    if parts:
-        pd.concat(parts, ignore_index=True).to_csv(master_path, index=False, encoding="utf-8")
-        print(f"✓ Master CSV: {master_path}")
+    master_path = MASTER_PATH
+    paths = sorted(paths) if paths is not None else sorted(glob.glob(os.path.join(out_dir, "*.csv")))
+    if paths:
+        idx = write_master(paths, master_path, incremental=incremental, infos=parts)
+        print(f"✓ Master CSV: {master_path} (regenerados {len(idx['rendered'])}"
+              f" [{len(idx['prerendered'])} ya renderizados con el pool] · copiados {len(idx['copied'])})")
     return master_path
 
-def main():
-    print("Normalización Loterías · inicio")
-    results = []
-    for csv_file in sorted(glob.glob(os.path.join(DATA_DIR, "*.csv"))):
-        meta = normalize_file(csv_file, OUT_DIR)
-        results.append(meta)
+def _default_workers() -> int:
+    try:
+        return max(1, int(os.environ.get("NORMALIZE_WORKERS", "1")))
+    except ValueError:
+        return 1
+
+# el propio código también es entrada: un cambio de lógica invalida la caché
+STAGE_MODULES = ("loterias_db.py", "csv_reader.py", "sheet_schema.py", "prize_parser.py",
+                 "master_csv.py", "date_parse.py", "snapshot_catalog.py", "rowhash_store.py")
+
+def stage_inputs_for(inputs: list) -> list:
+    here = os.path.dirname(os.path.abspath(__file__))
+    return list(inputs) + [os.path.abspath(__file__)] + [os.path.join(here, m) for m in STAGE_MODULES]
+
+def run_normalize(inputs: list, workers: int = 1, raw: dict = None) -> dict:
+    """
+    Etapa completa (manifest, master, SQLite) sobre 'inputs'.
+    Devuelve {"skipped", "results", "frames", "manifest", "master", "outputs"}.
+    """
+    with span("normalize") as s:
+        result = _run_normalize(inputs, workers, raw)
+        s.skipped = result["skipped"]
+        s.add(rows=sum(r.get("rows", 0) for r in result["results"]), bytes=file_bytes(result["outputs"]))
+    return result
+
+def _run_normalize(inputs: list, workers: int, raw: dict) -> dict:
+    stage_inputs = stage_inputs_for(inputs)
+    if stage_unchanged("normalize", stage_inputs):
+        print("= Entradas sin cambios desde la última ejecución; se omite la normalización")
+        return {"skipped": True, "results": [], "frames": {}, "manifest": find_latest_manifest(),
+                "master": MASTER_PATH, "outputs": []}
+
+    t0 = time.perf_counter()
+    results, parts, frames = normalize_all(inputs, OUT_DIR, workers, raw,
+                                           master_path=MASTER_PATH, incremental=not force_enabled())
+    save_dialect_cache()
+    print(f"   {len(inputs)} ficheros en {time.perf_counter() - t0:.2f}s (workers={workers})")
 
     manifest_path = build_manifest(results, OUT_DIR)
-    build_master_csv(OUT_DIR)
+    # master y SQLite sólo con las salidas de esta selección (no con restos de ejecuciones previas)
+    outputs = [os.path.join(OUT_DIR, r["file"]) for r in results if r.get("ok")]
+    master_path = build_master_csv(OUT_DIR, parts, incremental=not force_enabled(), paths=outputs)
+    build_sqlite(OUT_DIR, paths=outputs)
+
+    record_stage("normalize", stage_inputs,
+                 outputs + [manifest_path, master_path, index_path(master_path), DB_PATH])
+    return {"skipped": False, "results": results, "frames": frames, "manifest": manifest_path,
+            "master": master_path, "outputs": outputs}
+
+def find_latest_manifest() -> str:
+    files = sorted(glob.glob(os.path.join(DIST_DIR, "loterias_manifest_*.csv")))
+    return files[-1] if files else ""
+
+def main():
+    ap = argparse.ArgumentParser(description="Normaliza loterias/data/*.csv en dist/loterias_norm")
+    ap.add_argument("--workers", type=int, default=_default_workers(),
+                    help="procesos en paralelo para normalize_file (0 = nº de CPUs; defecto NORMALIZE_WORKERS o 1)")
+    ap.add_argument("--snapshots", default=DEFAULT_SELECT,
+                    help="snapshots a procesar: latest | all | STAMP | FROM..TO (defecto LOT_SNAPSHOTS o latest)")
+    args = ap.parse_args()
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+
+    print("Normalización Loterías · inicio")
+    inputs = select_paths(DATA_DIR, args.snapshots)
+    print(f"   snapshots: {args.snapshots} → {len(inputs)} ficheros")
+    if run_normalize(inputs, workers)["skipped"]:
+        return
     print("Listo en", DIST_DIR)
 
 if __name__ == "__main__":
-    main()
+    with profiled("normalize_loterias"):
+        main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/prize_parser.py
+"""
+Parser vectorizado de tablas de premios (Pagos_* / Raw_Pagos_*)
+
+Importes -> céntimos (Int64), formato español:
+  "1181824,81" · "1.181.824,81" · "65.278.573,00€" · "743.932,43€" · "65278573" · "12.00"
+Recuentos -> UInt32: "1.234.567" -> 1234567
+
+Categorías -> campos estructurados:
+  cat_rank     1ª, 2ª... (si falta, se deduce de la tabla de categorías del juego)
+  cat_hits     aciertos de números principales
+  cat_extra    estrellas (Euromillones) o clave (El Gordo) acertadas
+  cat_complementario / cat_reintegro   "+ C" / "+ R" o categoría "Reintegro"
+
+  "1ª 5 + 2"            -> rank 1, hits 5, extra 2
+  "2ª (5 Aciertos + C)" -> rank 2, hits 5, complementario
+  "ª (5 + 1)"           -> rank 1 (deducido), hits 5, extra 1
+  "6 Aciertor + R"      -> rank 0 (especial), hits 6, reintegro
+
+Todo se calcula sobre los valores únicos y se expande con los códigos de
+pd.factorize: el coste depende de cuántos importes/etiquetas distintos hay,
+no del nº de filas.
+
+Uso:
+  python ops/scripts/prize_parser.py --bench [--rows 100000]
+  python ops/scripts/prize_parser.py fichero.csv [...]
+"""
+
+import os, re, sys, json, time, random, argparse
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# --- Utilidades --------------------------------------------------------------------
+def _by_unique(values, fn) -> Tuple[np.ndarray, pd.Series]:
+    """factorize sobre el texto tal cual; la limpieza y el parseo sólo sobre los únicos."""
+    s = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    return codes, fn(pd.Series(uniques.astype(object), dtype="string").str.strip())
+
+def _expand(codes: np.ndarray, parsed: pd.Series, index, dtype: str) -> pd.Series:
+    out = pd.Series(pd.NA, index=index, dtype=dtype)
+    hit = codes >= 0
+    if hit.any():
+        out.iloc[np.flatnonzero(hit)] = parsed.astype(dtype).to_numpy()[codes[hit]]
+    return out
+
+# --- Importes y recuentos ------------------------------------------------------------
+_THOUSANDS_ONLY = r"^-?\d{1,3}(?:\.\d{3})+$"
+
+def _cents_unique_pandas(t: pd.Series) -> pd.Series:
+    """Ruta con pandas (numpy < 2 sin np.strings); pasa por float."""
+    t = t.str.replace(r"[€\s\u00a0]", "", regex=True).mask(lambda x: x.isin(["", "nan", "None"]))
+    has_comma = t.str.contains(",", regex=False).fillna(False)
+    thousands = t.str.match(_THOUSANDS_ONLY).fillna(False)
+    # con coma: '.' miles y ',' decimales · sin coma: '1.234.567' miles, '12.00' decimal
+    spanish = t.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    t = t.where(~(has_comma | thousands), spanish)
+    num = pd.to_numeric(t, errors="coerce")
+    return (num * 100).round().astype("Int64")
+
+def _cents_unique(t: pd.Series) -> pd.Series:
+    """
+    Ruta entera con np.strings: parte entera * 100 + 2 decimales, sin pasar
+    por float (sin errores de redondeo en importes grandes).
+    """
+    if not hasattr(np, "strings"):
+        return _cents_unique_pandas(t)
+    a = t.fillna("").to_numpy(dtype=object).astype("U")
+    for ch in ("€", " ", "\u00a0"):
+        a = np.strings.replace(a, ch, "")
+    comma = np.strings.find(a, ",") >= 0
+    last_dot = np.strings.rfind(a, ".")
+    thousands = ~comma & (last_dot >= 0) & (np.strings.str_len(a) - last_dot - 1 == 3)
+    spanish = np.strings.replace(np.strings.replace(a, ".", ""), ",", ".")
+    a = np.where(comma | thousands, spanish, a)
+
+    neg = np.strings.startswith(a, "-")
+    a = np.strings.lstrip(a, "-")
+    whole, _, frac = np.strings.partition(a, ".")
+    ok = np.strings.isdigit(whole) & ((frac == "") | np.strings.isdigit(frac)) & (np.strings.str_len(frac) <= 2)
+    cents = (np.where(ok, whole, "0").astype(np.int64) * 100
+             + np.where(ok, np.strings.ljust(frac, 2, "0"), "00").astype(np.int64))
+    out = pd.Series(np.where(neg, -cents, cents), index=t.index, dtype="Int64")
+    out[~ok] = pd.NA
+    # raros (más de 2 decimales, notación científica...): vía float
+    odd = ~ok & (a != "")
+    if odd.any():
+        out[odd] = _cents_unique_pandas(t[odd])
+    return out
+
+def parse_cents(values) -> pd.Series:
+    """Importes en texto español -> céntimos Int64 (NA si no es un importe)."""
+    index = values.index if isinstance(values, pd.Series) else None
+    codes, parsed = _by_unique(values, _cents_unique)
+    return _expand(codes, parsed, index if index is not None else range(len(codes)), "Int64")
+
+def _count_unique(t: pd.Series) -> pd.Series:
+    if hasattr(np, "strings"):
+        a = np.strings.replace(t.fillna("").to_numpy(dtype=object).astype("U"), ".", "")
+        ok = np.strings.isdigit(a) & (np.strings.str_len(a) <= 9)
+        out = pd.Series(np.where(ok, a, "0").astype(np.int64), index=t.index).astype("UInt32")
+        out[~ok] = pd.NA
+        return out
+    num = pd.to_numeric(t.str.replace(".", "", regex=False), errors="coerce")
+    ok = num.notna() & (num >= 0) & (num <= np.iinfo("uint32").max) & (num == np.floor(num))
+    return num.where(ok).astype("UInt32")
+
+def parse_count(values) -> pd.Series:
+    """Recuentos con puntos de miles -> UInt32."""
+    index = values.index if isinstance(values, pd.Series) else None
+    codes, parsed = _by_unique(values, _count_unique)
+    return _expand(codes, parsed, index if index is not None else range(len(codes)), "UInt32")
+
+# --- Categorías ----------------------------------------------------------------------
+CATEGORY_RE = re.compile(
+    r"^\s*(?:(?P<rank>\d+)?\s*ª)?\s*\(?\s*(?P<hits>\d+)\s*(?:aciert\w*)?\s*"
+    r"(?:\+\s*(?P<extra>[0-9]+|[CR]))?\s*\)?\s*$", re.I)
+
+# (aciertos, extra) -> categoría, según las tablas de premios de LAE
+RANKS: Dict[str, Dict[Tuple[int, str], int]] = {
+    "PRIMITIVA": {(6, "R"): 0, (6, ""): 1, (5, "C"): 2, (5, ""): 3, (4, ""): 4, (3, ""): 5},
+    "BONOLOTO": {(6, ""): 1, (5, "C"): 2, (5, ""): 3, (4, ""): 4, (3, ""): 5},
+    "GORDO": {(5, "1"): 1, (5, "0"): 2, (4, "1"): 3, (4, "0"): 4,
+              (3, "1"): 5, (3, "0"): 6, (2, "1"): 7, (2, "0"): 8},
+    "EURO": {(5, "2"): 1, (5, "1"): 2, (5, "0"): 3, (4, "2"): 4, (4, "1"): 5, (3, "2"): 6,
+             (4, "0"): 7, (2, "2"): 8, (3, "1"): 9, (3, "0"): 10, (1, "2"): 11, (2, "1"): 12, (2, "0"): 13},
+}
+GAME_BY_SUFFIX = {
+    "primitiva": "PRIMITIVA", "bonoloto": "BONOLOTO", "gordo": "GORDO",
+    "euromillones": "EURO", "euro": "EURO",
+}
+CATEGORY_FIELDS = {
+    "cat_rank": "UInt8", "cat_hits": "UInt8", "cat_extra": "UInt8",
+    "cat_complementario": "boolean", "cat_reintegro": "boolean",
+}
+
+def game_for_sheet(sheet: str) -> Optional[str]:
+    """'Raw_Pagos_Euromillones_20250921_1456.csv' -> 'EURO'."""
+    stem = re.sub(r"_\d{8}_\d{4}$", "", os.path.splitext(os.path.basename(sheet))[0])
+    m = re.match(r"^(?:raw_)?pagos_(.+)$", stem, re.I)
+    return GAME_BY_SUFFIX.get(m.group(1).lower()) if m else None
+
+def _categories_unique(labels: pd.Series, game: Optional[str]) -> pd.DataFrame:
+    ex = labels.str.extract(CATEGORY_RE)
+    extra = ex["extra"].str.upper().fillna("")
+    hits = pd.to_numeric(ex["hits"], errors="coerce")
+    rank = pd.to_numeric(ex["rank"], errors="coerce")
+    is_reint = labels.str.strip().str.lower().eq("reintegro").fillna(False)
+
+    table = RANKS.get(game or "", {})
+    if table:
+        known = pd.Series([table.get((int(h), e)) if pd.notna(h) else None for h, e in zip(hits, extra)],
+                          index=labels.index, dtype="Float64")
+        rank = rank.fillna(known)
+
+    numeric_extra = pd.to_numeric(extra.where(extra.str.isdigit(), None), errors="coerce")
+    return pd.DataFrame({
+        "cat_rank": rank,
+        "cat_hits": hits,
+        "cat_extra": numeric_extra,
+        "cat_complementario": extra.eq("C") & ~is_reint,
+        "cat_reintegro": extra.eq("R") | is_reint,
+    }, index=labels.index)
+
+def parse_categories(values, game: Optional[str] = None) -> pd.DataFrame:
+    """Etiquetas de categoría -> DataFrame con CATEGORY_FIELDS (mismo índice que 'values')."""
+    index = values.index if isinstance(values, pd.Series) else pd.RangeIndex(len(values))
+    codes, parsed = _by_unique(values, lambda u: _categories_unique(u, game))
+    return pd.DataFrame({col: _expand(codes, parsed[col], index, dtype)
+                         for col, dtype in CATEGORY_FIELDS.items()}, index=index)
+
+# --- Benchmark -------------------------------------------------------------------------
+def _cents_rowwise(v) -> Optional[int]:
+    """Lo que hacía cada consumidor: limpiar y convertir fila a fila."""
+    try:
+        s = str(v).replace("€", "").strip()
+        if "," in s:
+            s = s.replace(".", "").replace(",", ".")
+        return int(round(float(s) * 100))
+    except ValueError:
+        return None
+
+def _category_rowwise(v) -> Tuple:
+    m = CATEGORY_RE.match(str(v))
+    return (m.group("rank"), m.group("hits"), m.group("extra")) if m else (None, None, None)
+
+def synthetic_prizes(rows: int, seed: int = 7) -> pd.DataFrame:
+    """
+    Tabla de premios sintética con la forma de las reales: 13 categorías por
+    sorteo; las 3 primeras con importes casi siempre distintos y el resto con
+    premios que se repiten mucho (importes fijos o bajos). Formatos mezclados
+    como en Pagos_* / Raw_Pagos_*.
+    """
+    rng = random.Random(seed)
+    cats = ["1ª 5 + 2", "2ª 5 + 1", "3ª 5 + 0", "4ª 4 + 2", "5ª 4 + 1", "6ª 3 + 2", "7ª 4 + 0",
+            "8ª 2 + 2", "9ª 3 + 1", "10ª 3 + 0", "11ª 1 + 2", "12ª 2 + 1", "13ª 2 + 0"]
+    small = [rng.randint(300, 30000) for _ in range(400)]
+
+    def money(c: int) -> str:
+        e, d = divmod(c, 100)
+        style = rng.randrange(3)
+        if style == 0:
+            return f"{e},{d:02d}"
+        grouped = f"{e:,}".replace(",", ".")
+        return f"{grouped},{d:02d}" + ("€" if style == 2 else "")
+
+    out = {"Categoría": [], "Nº Acertantes": [], "Premio por ganador (€)": []}
+    for i in range(rows):
+        k = i % len(cats)
+        cents = rng.randint(10**6, 2 * 10**10) if k < 3 else rng.choice(small)
+        out["Categoría"].append(cats[k])
+        out["Nº Acertantes"].append(f"{rng.randint(0, 10 ** min(k + 1, 7)):,}".replace(",", "."))
+        out["Premio por ganador (€)"].append(money(cents))
+    return pd.DataFrame(out)
+
+def bench(rows: int = 100_000) -> Dict:
+    df = synthetic_prizes(rows)
+    col = df["Premio por ganador (€)"]
+
+    t0 = time.perf_counter()
+    ref = col.map(_cents_rowwise)
+    df["Categoría"].map(_category_rowwise)
+    df["Nº Acertantes"].map(lambda v: int(str(v).replace(".", "")))
+    t_row = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    cents = parse_cents(col)
+    cats = parse_categories(df["Categoría"], "EURO")
+    counts = parse_count(df["Nº Acertantes"])
+    t_vec = time.perf_counter() - t0
+
+    same = bool((cents.astype("float").to_numpy() == ref.astype("float").to_numpy()).all())
+    return {
+        "rows": rows,
+        "rowwise_s": round(t_row, 3),
+        "vectorised_s": round(t_vec, 3),
+        "speedup": round(t_row / t_vec, 1) if t_vec else None,
+        "cents_match_rowwise": same,
+        "unique_amounts": int(col.nunique()),
+        "counts_parsed": int(counts.notna().sum()),
+        "categories_parsed": int((cats["cat_hits"].notna() | cats["cat_reintegro"]).sum()),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="Parser de importes y categorías de premios")
+    ap.add_argument("files", nargs="*")
+    ap.add_argument("--bench", action="store_true")
+    ap.add_argument("--rows", type=int, default=100_000)
+    args = ap.parse_args()
+
+    if args.bench:
+        print(json.dumps(bench(args.rows), indent=2))
+        return
+    if not args.files:
+        ap.error("indica ficheros o --bench")
+    from csv_reader import read_csv
+    for p in args.files:
+        df = read_csv(p)
+        out = pd.concat([df["Categoría"], parse_categories(df["Categoría"], game_for_sheet(p)),
+                         parse_cents(df["Premio por ganador (€)"]).rename("premio_cents")], axis=1)
+        print(f"== {os.path.basename(p)} ({game_for_sheet(p) or '?'})")
+        print(out.to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/profiling.py
+"""
+Perfilado opcional de los scripts del pipeline (cProfile + tracemalloc)
+
+Apagado por defecto. Con OPS_PROFILE definido, cada punto de entrada envuelve
+su main() así:
+
+    from profiling import profiled
+    if __name__ == "__main__":
+        with span("dq"), profiled("dq_loterias"):
+            main()
+
+y al terminar (también si falla) deja en dist/profiles/:
+  {script}_{fecha}_{pid}.prof     -> cProfile (pstats, snakeviz, 'show', 'compare')
+  {script}_{fecha}_{pid}_mem.txt  -> pico de memoria Python y top-N líneas que más asignan
+  {script}_{fecha}_{pid}_cpu.txt  -> top-N funciones por tiempo acumulado
+
+tracemalloc ralentiza bastante (2-4x) los tramos con muchas asignaciones
+pequeñas: los tiempos del .prof con memoria activada son orientativos; para
+medir sólo CPU usar OPS_PROFILE_MEM=0. Con NORMALIZE_WORKERS > 1 los procesos
+hijos no se perfilan (sólo el padre).
+
+Variables:
+  OPS_PROFILE        -> 1 | all | lista de scripts (p. ej. "dq_loterias,make_report")
+  OPS_PROFILE_DIR    -> carpeta de salida (defecto dist/profiles)
+  OPS_PROFILE_TOP    -> N del top de CPU y memoria (25)
+  OPS_PROFILE_MEM    -> 0 para no usar tracemalloc
+  OPS_PROFILE_FRAMES -> marcos guardados por asignación (1; más = trazas más útiles y más lentas)
+
+Uso:
+  python ops/scripts/profiling.py show dist/profiles/dq_loterias_*.prof [--top 25] [--sort tottime]
+  python ops/scripts/profiling.py compare antes.prof despues.prof [--top 25]
+"""
+
+import os, io, sys, time, pstats, cProfile, argparse, tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DIST_DIR = os.environ.get("DIST_DIR", os.path.join(BASE_DIR, "dist"))
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+PROFILE_DIR = os.environ.get("OPS_PROFILE_DIR", os.path.join(DIST_DIR, "profiles"))
+TOP_N = _env_int("OPS_PROFILE_TOP", 25)
+
+def enabled(name: str) -> bool:
+    """¿Hay que perfilar este script? (según OPS_PROFILE)"""
+    spec = os.environ.get("OPS_PROFILE", "").strip().lower()
+    if spec in ("", "0", "false", "no"):
+        return False
+    if spec in ("1", "all", "true", "yes"):
+        return True
+    return name.lower() in {s.strip() for s in spec.split(",")}
+
+def _mem_report(snapshot, peak: int, top: int) -> str:
+    stats = snapshot.statistics("lineno")
+    lines = [f"Pico de memoria Python (tracemalloc): {peak / (1 << 20):.1f} MB",
+             f"Memoria viva al terminar: {sum(s.size for s in stats) / (1 << 20):.1f} MB",
+             "", f"Top {top} líneas por memoria viva:"]
+    for s in stats[:top]:
+        frame = s.traceback[0]
+        lines.append(f"{s.size / 1024:>10.1f} KB {s.count:>8} bloques  {frame.filename}:{frame.lineno}")
+    return "\n".join(lines) + "\n"
+
+def _cpu_report(prof: cProfile.Profile, top: int, sort: str = "cumulative") -> str:
+    buf = io.StringIO()
+    pstats.Stats(prof, stream=buf).strip_dirs().sort_stats(sort).print_stats(top)
+    return buf.getvalue()
+
+@contextmanager
+def profiled(name: str, out_dir: Optional[str] = None):
+    """Perfila el bloque si OPS_PROFILE lo pide; si no, no hace nada. Ver cabecera."""
+    if not enabled(name):
+        yield None
+        return
+    mem = os.environ.get("OPS_PROFILE_MEM", "1").strip() != "0"
+    started_mem = mem and not tracemalloc.is_tracing()
+    if started_mem:
+        tracemalloc.start(_env_int("OPS_PROFILE_FRAMES", 1))
+    prof = cProfile.Profile()
+    t0 = time.perf_counter()
+    prof.enable()
+    try:
+        yield prof
+    finally:
+        prof.disable()
+        wall = time.perf_counter() - t0
+        snapshot = peak = None
+        if mem and tracemalloc.is_tracing():
+            # antes de volcar el .prof: pstats también asigna y ensuciaría el top
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen *>")])
+            if started_mem:
+                tracemalloc.stop()
+        out_dir = out_dir or PROFILE_DIR
+        stem = os.path.join(out_dir, f"{name}_{datetime.now(timezone.utc):%Y%m%d_%H%M%S}_{os.getpid()}")
+        try:
+            os.makedirs(out_dir, exist_ok=True)
+            prof.dump_stats(stem + ".prof")
+            with open(stem + "_cpu.txt", "w", encoding="utf-8") as f:
+                f.write(f"{name}: {wall:.2f}s de reloj\n")
+                f.write(_cpu_report(prof, TOP_N))
+            written = [stem + ".prof", stem + "_cpu.txt"]
+            if snapshot is not None:
+                with open(stem + "_mem.txt", "w", encoding="utf-8") as f:
+                    f.write(_mem_report(snapshot, peak, TOP_N))
+                written.append(stem + "_mem.txt")
+            print(f"· Perfil de {name} ({wall:.2f}s) → {', '.join(os.path.relpath(p) for p in written)}")
+        except OSError as e:
+            print(f"⚠️  No se pudo guardar el perfil de {name}: {e}")
+
+# --- Lectura y comparación ------------------------------------------------------------
+def function_times(path: str) -> Dict[str, Tuple[float, float, int]]:
+    """{función: (tottime, cumtime, llamadas)} de un .prof."""
+    st = pstats.Stats(path)
+    out = {}
+    for (file, line, func), (cc, nc, tt, ct, _) in st.stats.items():
+        out[f"{os.path.basename(file)}:{line}({func})"] = (tt, ct, nc)
+    return out
+
+def compare(before: str, after: str, top: int = TOP_N) -> List[str]:
+    """Funciones con mayor cambio de tiempo acumulado entre dos perfiles."""
+    a, b = function_times(before), function_times(after)
+    rows = []
+    for key in set(a) | set(b):
+        ca, cb = a.get(key, (0, 0, 0))[1], b.get(key, (0, 0, 0))[1]
+        rows.append((cb - ca, ca, cb, key))
+    rows.sort(key=lambda r: abs(r[0]), reverse=True)
+    total_a = max((v[1] for v in a.values()), default=0)
+    total_b = max((v[1] for v in b.values()), default=0)
+    lines = [f"Total (cumtime máx.): {total_a:.3f}s → {total_b:.3f}s",
+             f"{'Δ s':>9} {'antes':>9} {'después':>9}  función"]
+    for d, ca, cb, key in rows[:top]:
+        lines.append(f"{d:>+9.3f} {ca:>9.3f} {cb:>9.3f}  {key}")
+    return lines
+
+def main():
+    ap = argparse.ArgumentParser(description="Perfiles de dist/profiles (cProfile)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sh = sub.add_parser("show", help="top de funciones de un .prof")
+    sh.add_argument("path")
+    sh.add_argument("--top", type=int, default=TOP_N)
+    sh.add_argument("--sort", default="cumulative", help="cumulative | tottime | calls")
+    cmp_ = sub.add_parser("compare", help="diferencias de tiempo acumulado entre dos .prof")
+    cmp_.add_argument("before")
+    cmp_.add_argument("after")
+    cmp_.add_argument("--top", type=int, default=TOP_N)
+    args = ap.parse_args()
+
+    if args.cmd == "show":
+        pstats.Stats(args.path, stream=sys.stdout).strip_dirs().sort_stats(args.sort).print_stats(args.top)
+    else:
+        print("\n".join(compare(args.before, args.after, args.top)))
+
+if __name__ == "__main__":
+    main()
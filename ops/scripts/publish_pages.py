@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/publish_pages.py
+"""
+Publicación de docs/ para GitHub Pages
+- Minifica in situ los artefactos publicables (*.html, *.json, *.css, *.js, *.svg)
+- Genera hermanos precomprimidos .gz (siempre) y .br (si está instalado 'brotli')
+- Escribe docs/size_report.json (bytes raw / gzip / br por artefacto)
+- Guardia: falla (exit 1) si un artefacto crece más de lo esperado respecto
+  al size_report anterior (el del último despliegue: pages.yml lo descarga
+  de la web publicada; no se versiona). Los datos (DATA_PATTERNS: api/*,
+  report.json, metrics/*) crecen con cada sorteo: su límite es
+  DATA_MAX_GROWTH_PCT por ejecución; el resto, MAX_GROWTH_PCT. Los
+  artefactos con presupuesto fijo (BUDGETS) sólo pasan por el presupuesto.
+  En CI un salto legítimo se acepta lanzando pages.yml a mano con
+  accept_sizes=true (pasa --accept)
+- Presupuesto: falla (exit 1) si index.html minificado pasa de PANEL_MAX_BYTES
+  (no se salta con --accept: el panel tiene que seguir cargando rápido en móvil)
+
+Variables opcionales:
+  PUBLISH_MAX_GROWTH_PCT    -> crecimiento máximo permitido en % (defecto 25)
+  PUBLISH_DATA_GROWTH_PCT   -> ídem para los datos de DATA_PATTERNS (defecto 10)
+  PUBLISH_MIN_GROWTH_BYTES  -> por debajo de este aumento absoluto no se avisa (defecto 4096)
+  PANEL_MAX_BYTES           -> tamaño máximo de index.html en bytes raw (defecto 32768)
+
+Uso:
+  python ops/scripts/publish_pages.py [docs] [--accept] [--no-compress]
+"""
+
+import os, re, sys, gzip, json, argparse
+from datetime import datetime, timezone
+from fnmatch import fnmatch
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli  # opcional
+except ImportError:
+    brotli = None
+
+DOCS_DIR = "docs"
+SIZE_REPORT = "size_report.json"
+PUBLISH_EXT = (".html", ".json", ".css", ".js", ".svg")
+COMPRESSED_EXT = (".gz", ".br")
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+MAX_GROWTH_PCT   = _env_int("PUBLISH_MAX_GROWTH_PCT", 25)
+DATA_MAX_GROWTH_PCT = _env_int("PUBLISH_DATA_GROWTH_PCT", 10)
+MIN_GROWTH_BYTES = _env_int("PUBLISH_MIN_GROWTH_BYTES", 4096)
+PANEL_MAX_BYTES  = _env_int("PANEL_MAX_BYTES", 32 * 1024)
+# artefacto -> bytes raw máximos (rutas relativas a docs/)
+BUDGETS = {"index.html": PANEL_MAX_BYTES}
+# datos publicados: crecen un poco con cada sorteo/ejecución (límite DATA_MAX_GROWTH_PCT)
+DATA_PATTERNS = ("api/*", "report.json", "metrics/*")
+
+# --- Minificado -----------------------------------------------------------------
+_RAW_BLOCKS = re.compile(r"(<pre\b.*?</pre>|<textarea\b.*?</textarea>|<script\b.*?</script>)", re.S | re.I)
+_COMMENTS = re.compile(r"<!--(?!\[if).*?-->", re.S)
+
+def minify_html(html: str) -> str:
+    """Minificado conservador: quita comentarios y colapsa espacios fuera de <pre>/<script>/<textarea>."""
+    out = []
+    for i, part in enumerate(_RAW_BLOCKS.split(html)):
+        if i % 2:  # bloque literal
+            out.append(part)
+            continue
+        part = _COMMENTS.sub("", part)
+        part = re.sub(r"\s+", " ", part)
+        out.append(part)
+    return "".join(out).strip() + "\n"
+
+def minify_json(text: str) -> Optional[str]:
+    try:
+        return json.dumps(json.loads(text), ensure_ascii=False, separators=(",", ":"))
+    except json.JSONDecodeError:
+        return None
+
+def minify_css(text: str) -> str:
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    return re.sub(r"\s*([{}:;,])\s*", r"\1", text).strip()
+
+def minify(path: str, text: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        return minify_json(text) or text
+    if ext in (".html", ".svg"):
+        return minify_html(text)
+    if ext == ".css":
+        return minify_css(text)
+    return text
+
+# --- Ficheros -------------------------------------------------------------------
+def write_if_changed(path: str, data: bytes) -> bool:
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+def gzip_bytes(data: bytes) -> bytes:
+    # mtime=0 -> salida determinista (el .gz no cambia si no cambia el origen)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def list_artifacts(root: str) -> List[str]:
+    out = []
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if name == SIZE_REPORT or not name.lower().endswith(PUBLISH_EXT):
+                continue
+            out.append(os.path.join(dirpath, name))
+    return sorted(out)
+
+def remove_orphans(root: str) -> int:
+    """Borra .gz/.br cuyo original ya no existe."""
+    removed = 0
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            base, ext = os.path.splitext(name)
+            if ext in COMPRESSED_EXT and base.lower().endswith(PUBLISH_EXT) and base not in files:
+                os.remove(os.path.join(dirpath, name))
+                removed += 1
+    return removed
+
+def publish_file(path: str, compress: bool = True) -> Dict[str, Optional[int]]:
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    data = minify(path, text).encode("utf-8")
+    write_if_changed(path, data)
+    sizes: Dict[str, Optional[int]] = {"raw": len(data), "gzip": None, "br": None}
+    if compress:
+        gz = gzip_bytes(data)
+        write_if_changed(path + ".gz", gz)
+        sizes["gzip"] = len(gz)
+        if brotli is not None:
+            br = brotli.compress(data, quality=11)
+            write_if_changed(path + ".br", br)
+            sizes["br"] = len(br)
+    return sizes
+
+# --- Informe y guardia ------------------------------------------------------------
+def load_size_report(root: str) -> Dict:
+    try:
+        with open(os.path.join(root, SIZE_REPORT), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def growth_limit(rel: str, max_pct: int = MAX_GROWTH_PCT, data_pct: int = DATA_MAX_GROWTH_PCT) -> Optional[int]:
+    """% de crecimiento permitido para 'rel' (None = sin guardia: tiene presupuesto fijo)."""
+    if rel in BUDGETS:
+        return None
+    return data_pct if any(fnmatch(rel, pat) for pat in DATA_PATTERNS) else max_pct
+
+def check_growth(prev: Dict[str, Dict], cur: Dict[str, Dict],
+                 max_pct: int = MAX_GROWTH_PCT, min_bytes: int = MIN_GROWTH_BYTES,
+                 data_pct: int = DATA_MAX_GROWTH_PCT) -> List[str]:
+    """
+    Devuelve los artefactos que crecen por encima de su umbral (en bytes raw):
+    data_pct para los datos (DATA_PATTERNS), max_pct para el resto; lo que
+    tiene presupuesto fijo (BUDGETS) no pasa por aquí.
+    """
+    problems = []
+    for rel, sizes in cur.items():
+        limit = growth_limit(rel, max_pct, data_pct)
+        old = (prev.get(rel) or {}).get("raw")
+        if limit is None or not old:
+            continue
+        grow = sizes["raw"] - old
+        if grow > min_bytes and grow * 100 > old * limit:
+            problems.append(f"{rel}: {old} → {sizes['raw']} bytes (+{grow * 100 // old}%)")
+    return problems
+
+def check_budget(cur: Dict[str, Dict], budgets: Dict[str, int] = BUDGETS) -> List[str]:
+    """Devuelve los artefactos que superan su presupuesto fijo (en bytes raw)."""
+    return [f"{rel}: {cur[rel]['raw']} bytes > presupuesto {limit}"
+            for rel, limit in budgets.items() if rel in cur and cur[rel]["raw"] > limit]
+
+def fmt_table(artifacts: Dict[str, Dict]) -> str:
+    lines = [f"{'artefacto':<48} {'raw':>10} {'gzip':>10} {'br':>10}"]
+    for rel, s in artifacts.items():
+        lines.append(f"{rel:<48} {s['raw']:>10} {s['gzip'] or '-':>10} {s['br'] or '-':>10}")
+    return "\n".join(lines)
+
+def publish(root: str = DOCS_DIR, compress: bool = True,
+            accept: bool = False) -> Tuple[Dict, List[str], List[str]]:
+    """Devuelve (size_report, crecimientos inesperados, presupuestos superados)."""
+    prev = load_size_report(root).get("artifacts", {})
+    artifacts: Dict[str, Dict] = {}
+    for path in list_artifacts(root):
+        rel = os.path.relpath(path, root).replace(os.sep, "/")
+        artifacts[rel] = publish_file(path, compress=compress)
+    removed = remove_orphans(root)
+
+    totals = {k: (sum(a[k] for a in artifacts.values()) if all(a[k] is not None for a in artifacts.values()) else None)
+              for k in ("raw", "gzip", "br")}
+    report = {
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"),
+        "brotli": brotli is not None,
+        "totals": totals,
+        "artifacts": artifacts,
+    }
+    problems = [] if accept else check_growth(prev, artifacts)
+    over = check_budget(artifacts)
+    if not problems:
+        # sólo se actualiza la línea base si pasa la guardia (o si se acepta explícitamente)
+        with open(os.path.join(root, SIZE_REPORT), "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(fmt_table(artifacts))
+    print(f"Total raw={totals['raw']} gzip={totals['gzip']} br={totals['br'] or '-'}"
+          f" · huérfanos eliminados: {removed}")
+    if brotli is None and compress:
+        print("ℹ️  'brotli' no instalado: sólo se generan .gz")
+    return report, problems, over
+
+def main():
+    ap = argparse.ArgumentParser(description="Minifica y precomprime docs/ para GitHub Pages")
+    ap.add_argument("root", nargs="?", default=DOCS_DIR)
+    ap.add_argument("--accept", action="store_true", help="acepta los tamaños actuales como nueva línea base")
+    ap.add_argument("--no-compress", action="store_true", help="sólo minifica (sin .gz/.br)")
+    args = ap.parse_args()
+
+    _, problems, over = publish(args.root, compress=not args.no_compress, accept=args.accept)
+    if over:
+        print("❌ Artefactos por encima de su presupuesto de tamaño:")
+        for p in over:
+            print(f"   - {p}")
+    if problems:
+        print(f"❌ Artefactos con crecimiento inesperado (>{DATA_MAX_GROWTH_PCT}% datos, >{MAX_GROWTH_PCT}% resto;"
+              f" >{MIN_GROWTH_BYTES} bytes):")
+        for p in problems:
+            print(f"   - {p}")
+        print("   Si es legítimo, vuelve a ejecutar con --accept (en CI: lanza pages.yml a mano con"
+              " accept_sizes=true).")
+    if problems or over:
+        sys.exit(1)
+    print(f"✓ Publicación lista en {args.root}")
+
+if __name__ == "__main__":
+    main()
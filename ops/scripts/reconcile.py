@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/reconcile.py
+"""
+Reconciliación hojas Historico* ↔ docs/api/{GAME}.json
+
+Dos copias de la verdad: las hojas que exporta sheets_to_csv y los sorteos
+que publican los fetchers. Por juego:
+
+1) Ambos lados se pasan a DrawArray (máscaras de bits + fecha datetime64[D])
+2) Join por hash sobre la fecha canónica (pd.Index.get_indexer): lineal en
+   el nº de sorteos, sin bucles por fila
+3) En las parejas se comparan números y extras (complementario, reintegro,
+   clave, estrellas); un extra sólo se compara si está en los dos lados
+4) Salen: sólo en la hoja, sólo en la API y sorteos con diferencias, con
+   unas fechas de ejemplo
+
+Los fetchers sólo cubren desde START_YEAR (2020), así que por defecto se
+compara desde la fecha en que empiezan los dos lados; lo anterior se cuenta
+aparte (out_of_range) y no es incidencia. Por arriba no se recorta: sorteos
+recientes que falten en la hoja o en la API sí se reportan.
+
+Uso:
+  python ops/scripts/reconcile.py [--snapshots latest] [--api-dir docs/api] [--game EURO] [--full-range]
+"""
+
+import os, json, time, argparse
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from draw_array import DrawArray, GAMES, EXTRA_FIELDS, from_mask, game_from_path
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DATA_DIR = os.path.join(BASE_DIR, "loterias", "data")
+API_DIR = os.environ.get("LAE_API_DIR", os.path.join(BASE_DIR, "docs", "api"))
+SAMPLE = 3
+
+def api_path(game: str, api_dir: str = API_DIR) -> str:
+    return os.path.join(api_dir, f"{game}.json")
+
+def load_api(game: str, api_dir: str = API_DIR) -> DrawArray:
+    """docs/api/{GAME}.json -> DrawArray (vacío si no existe o no tiene sorteos)."""
+    try:
+        with open(api_path(game, api_dir), "r", encoding="utf-8") as f:
+            results = json.load(f).get("results") or []
+    except (FileNotFoundError, json.JSONDecodeError):
+        results = []
+    return DrawArray.from_draws(results, game) if results else DrawArray.empty()
+
+def _keyed(arr: DrawArray):
+    """(índice hash de días, posiciones en arr, nº de duplicados); se queda el 1º de cada fecha."""
+    pos = np.flatnonzero(~np.isnat(arr.dates))
+    keys = pd.Index(arr.dates[pos].astype("int64"))
+    dup = keys.duplicated()
+    return keys[~dup], pos[~dup], int(dup.sum())
+
+def _day(d) -> str:
+    return str(np.datetime64(d, "D"))
+
+def _describe(arr: DrawArray, i: int) -> Dict:
+    out = {"numbers": from_mask(arr.numbers[i])}
+    for f in EXTRA_FIELDS:
+        vals = from_mask(getattr(arr, f)[i])
+        if vals:
+            out[f] = vals if f == "estrellas" else vals[0]
+    return out
+
+def reconcile(sheet: DrawArray, api: DrawArray, full_range: bool = False, sample: int = SAMPLE) -> Dict:
+    """Compara dos DrawArray del mismo juego. Devuelve contadores + ejemplos."""
+    s_keys, s_pos, s_dup = _keyed(sheet)
+    a_keys, a_pos, a_dup = _keyed(api)
+
+    out_of_range = 0
+    if not full_range and len(s_keys) and len(a_keys):
+        # sólo se recorta por abajo: lo más reciente que falte en un lado sí es incidencia
+        lo = max(s_keys.min(), a_keys.min())
+        s_in, a_in = s_keys >= lo, a_keys >= lo
+        out_of_range = int((~s_in).sum() + (~a_in).sum())
+        s_keys, s_pos = s_keys[s_in], s_pos[s_in]
+        a_keys, a_pos = a_keys[a_in], a_pos[a_in]
+
+    # join por hash: posición de cada fecha de la hoja en la API (-1 = no está)
+    at = a_keys.get_indexer(s_keys)
+    hit = at >= 0
+    si, ai = s_pos[hit], a_pos[at[hit]]
+    only_sheet = s_pos[~hit]
+    in_sheet = np.zeros(len(a_keys), dtype=bool)
+    in_sheet[at[hit]] = True
+    only_api = a_pos[~in_sheet]
+
+    diff = sheet.numbers[si] != api.numbers[ai]
+    fields = {"numbers": diff.copy()}
+    for f in EXTRA_FIELDS:
+        s, a = getattr(sheet, f)[si], getattr(api, f)[ai]
+        d = (s != 0) & (a != 0) & (s != a)
+        fields[f] = d
+        diff |= d
+    bad = np.flatnonzero(diff)
+
+    return {
+        "sheet_rows": len(sheet), "api_rows": len(api),
+        "matched": int(hit.sum()), "only_sheet": int(len(only_sheet)), "only_api": int(len(only_api)),
+        "mismatched": int(len(bad)), "out_of_range": out_of_range,
+        "duplicates": {"sheet": s_dup, "api": a_dup},
+        "by_field": {f: int(m.sum()) for f, m in fields.items() if m.any()},
+        "samples": {
+            "only_sheet": [_day(sheet.dates[i]) for i in np.sort(only_sheet)[-sample:]],
+            "only_api": [_day(api.dates[i]) for i in np.sort(only_api)[-sample:]],
+            "mismatched": [{"date": _day(sheet.dates[si[k]]), "sheet": _describe(sheet, si[k]),
+                            "api": _describe(api, ai[k]),
+                            "fields": [f for f, m in fields.items() if m[k]]} for k in bad[-sample:]],
+        },
+    }
+
+def reconcile_frames(frames: Dict[str, pd.DataFrame], api_dir: str = API_DIR,
+                     full_range: bool = False) -> Dict[str, Dict]:
+    """
+    {fichero Historico*: DataFrame} -> {GAME: resultado}. Juegos sin sorteos en
+    la API se devuelven con "skipped" (aún no hay nada que comparar).
+    """
+    out: Dict[str, Dict] = {}
+    for name, df in frames.items():
+        game = game_from_path(name)
+        if not game or game in out:
+            continue
+        api = load_api(game, api_dir)
+        if not len(api):
+            out[game] = {"skipped": True, "sheet_rows": len(df), "api_rows": 0}
+            continue
+        t0 = time.perf_counter()
+        res = reconcile(DrawArray.from_frame(df, game), api, full_range)
+        res["seconds"] = round(time.perf_counter() - t0, 4)
+        out[game] = res
+    return out
+
+def format_lines(results: Dict[str, Dict]) -> List[str]:
+    """Líneas para dq_report.txt (con ⚠️/❌ cuando hay incidencias)."""
+    lines = []
+    for game, r in results.items():
+        if r.get("skipped"):
+            lines.append(f"· Reconciliación {game}: sin sorteos en docs/api/{game}.json; se omite")
+            continue
+        head = (f"Reconciliación {game}: hoja {r['sheet_rows']} · API {r['api_rows']} · "
+                f"coinciden {r['matched']}")
+        if r["out_of_range"]:
+            head += f" · anteriores al inicio común {r['out_of_range']}"
+        lines.append(f"✓ {head}")
+        if r["only_sheet"]:
+            lines.append(f"⚠️  {game}: {r['only_sheet']} sorteos sólo en la hoja "
+                         f"(p. ej. {', '.join(r['samples']['only_sheet'])})")
+        if r["only_api"]:
+            lines.append(f"⚠️  {game}: {r['only_api']} sorteos sólo en docs/api "
+                         f"(p. ej. {', '.join(r['samples']['only_api'])})")
+        if r["mismatched"]:
+            ex = "; ".join(f"{m['date']} {f}: hoja {m['sheet'].get(f)} vs API {m['api'].get(f)}"
+                           for m in r["samples"]["mismatched"] for f in m["fields"][:1])
+            fields = ", ".join(f"{k}={v}" for k, v in r["by_field"].items())
+            lines.append(f"❌  {game}: {r['mismatched']} sorteos distintos ({fields}) (p. ej. {ex})")
+    return lines
+
+def issue_counts(results: Dict[str, Dict]):
+    """(warn, fail): faltantes en un lado = warn, sorteos distintos = fail (uno por juego y tipo)."""
+    warn = sum(bool(r.get("only_sheet")) + bool(r.get("only_api")) for r in results.values())
+    fail = sum(bool(r.get("mismatched")) for r in results.values())
+    return warn, fail
+
+def main():
+    from csv_reader import read_csv
+    from snapshot_catalog import select_paths, DEFAULT_SELECT
+    ap = argparse.ArgumentParser(description="Reconciliación Historico* ↔ docs/api/{GAME}.json")
+    ap.add_argument("--snapshots", default=DEFAULT_SELECT, help="latest | all | STAMP | FROM..TO")
+    ap.add_argument("--api-dir", default=API_DIR)
+    ap.add_argument("--game", choices=GAMES)
+    ap.add_argument("--full-range", action="store_true", help="compara también fuera del rango común")
+    ap.add_argument("--json", action="store_true", help="resultado completo en JSON")
+    args = ap.parse_args()
+
+    frames = {}
+    for p in select_paths(DATA_DIR, args.snapshots):
+        game = game_from_path(p)
+        if game and (not args.game or game == args.game):
+            frames[os.path.basename(p)] = read_csv(p)
+    results = reconcile_frames(frames, args.api_dir, args.full_range)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2, default=int))
+    else:
+        print("\n".join(format_lines(results)) or "Sin hojas Historico* que reconciliar")
+
+if __name__ == "__main__":
+    main()
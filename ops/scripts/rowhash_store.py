@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/rowhash_store.py
+"""
+Conjunto compacto de hashes de fila (DQ incremental)
+
+Por hoja (nombre sin la marca _YYYYMMDD_HHMM) se guarda el conjunto de filas
+que ya pasaron las reglas por fila de dq_rules:
+
+  dist/dq_state/<Hoja>.npy   uint64 ordenado y sin repetidos (8 bytes por fila)
+  dist/dq_state/meta.json    {hoja: {"signature", "rows", "updated_at"}}
+
+La firma es la de las reglas que se aplicaron: si cambian las reglas (o su
+código), el conjunto guardado deja de valer y la hoja se revisa entera.
+La pertenencia se resuelve con np.searchsorted sobre el array ordenado.
+
+Clave de fila: si la hoja trae _rowhash (normalize_loterias) se usan sus 16
+primeros dígitos hex; si no, el hash de 64 bits de pandas sobre los valores de
+la fila como texto (el mismo que _rowhash con ROWHASH_MODE=fast).
+
+Variables:
+  DQ_STATE_DIR -> carpeta del estado (dist/dq_state)
+
+Uso:
+  python ops/scripts/rowhash_store.py            # resumen del estado guardado
+"""
+
+import os, re, sys, json
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DIST_DIR = os.environ.get("DIST_DIR", os.path.join(BASE_DIR, "dist"))
+STATE_DIR = os.environ.get("DQ_STATE_DIR", os.path.join(DIST_DIR, "dq_state"))
+META_NAME = "meta.json"
+
+EMPTY = np.zeros(0, dtype=np.uint64)
+
+def sheet_key(path_or_name: str) -> str:
+    """'HistoricoEuro_20250921_1456.csv' -> 'HistoricoEuro'."""
+    stem = os.path.splitext(os.path.basename(path_or_name))[0]
+    return re.sub(r"_\d{8}_\d{4}$", "", stem)
+
+# --- Claves de fila -------------------------------------------------------------------
+def value_keys(df: pd.DataFrame) -> np.ndarray:
+    """Hash de 64 bits de pandas de cada fila con sus valores como texto (vacío = "")."""
+    if df.shape[1] == 0:
+        return np.zeros(len(df), dtype=np.uint64)
+    cols = pd.concat([df.iloc[:, i].astype(object).fillna("").astype(str) for i in range(df.shape[1])], axis=1)
+    return pd.util.hash_pandas_object(cols, index=False).to_numpy(dtype=np.uint64)
+
+def row_keys(df: pd.DataFrame) -> np.ndarray:
+    """Un uint64 por fila (ver cabecera)."""
+    if "_rowhash" in df.columns:
+        hexes = df["_rowhash"].astype(str).str.slice(0, 16)
+        return np.array([int(h, 16) for h in hexes], dtype=np.uint64)
+    return value_keys(df)
+
+def contains(stored: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """keys ∈ stored (stored ordenado) -> máscara bool."""
+    if not len(stored):
+        return np.zeros(len(keys), dtype=bool)
+    idx = np.searchsorted(stored, keys)
+    return stored[np.minimum(idx, len(stored) - 1)] == keys
+
+# --- Persistencia ---------------------------------------------------------------------
+def _path(sheet: str, state_dir: str) -> str:
+    return os.path.join(state_dir, f"{sheet}.npy")
+
+def load_meta(state_dir: str = STATE_DIR) -> Dict:
+    try:
+        with open(os.path.join(state_dir, META_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def load(sheet: str, signature: Optional[str] = None, state_dir: str = STATE_DIR) -> np.ndarray:
+    """Hashes guardados de la hoja (vacío si no hay o la firma no coincide)."""
+    entry = load_meta(state_dir).get(sheet)
+    if not entry or (signature is not None and entry.get("signature") != signature):
+        return EMPTY
+    try:
+        return np.load(_path(sheet, state_dir), allow_pickle=False)
+    except (FileNotFoundError, ValueError, OSError):
+        return EMPTY
+
+def save(sheet: str, keys: np.ndarray, signature: str, state_dir: str = STATE_DIR) -> int:
+    """Guarda keys (ordenado, sin repetidos). Devuelve el nº de hashes."""
+    os.makedirs(state_dir, exist_ok=True)
+    keys = np.unique(np.asarray(keys, dtype=np.uint64))
+    tmp = _path(sheet, state_dir) + ".tmp.npy"
+    np.save(tmp, keys, allow_pickle=False)
+    os.replace(tmp, _path(sheet, state_dir))
+    meta = load_meta(state_dir)
+    meta[sheet] = {"signature": signature, "rows": int(len(keys)),
+                   "updated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")}
+    mtmp = os.path.join(state_dir, META_NAME + ".tmp")
+    with open(mtmp, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(meta.items())), f, ensure_ascii=False, indent=2)
+    os.replace(mtmp, os.path.join(state_dir, META_NAME))
+    return int(len(keys))
+
+def main():
+    state_dir = sys.argv[1] if len(sys.argv) > 1 else STATE_DIR
+    meta = load_meta(state_dir)
+    if not meta:
+        print(f"Sin estado en {state_dir}")
+        return
+    total = 0
+    for sheet, entry in meta.items():
+        p = _path(sheet, state_dir)
+        size = os.path.getsize(p) if os.path.exists(p) else 0
+        total += size
+        print(f"{sheet:<28} {entry['rows']:>8} filas · {size:>9} bytes · {entry['updated_at']}")
+    print(f"Total: {total} bytes en {state_dir}")
+
+if __name__ == "__main__":
+    main()
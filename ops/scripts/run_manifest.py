@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/run_manifest.py
+"""
+Manifest de contenido entre ejecuciones (dist/run_manifest.json)
+
+Guarda, por etapa del pipeline, el sha256 de cada entrada y de cada artefacto
+producido. Una etapa puede saltarse si:
+  - sus entradas (ficheros + el propio script) tienen los mismos hashes,
+  - sus parámetros no de fichero ('params', p. ej. la fecha de la ejecución
+    en DQ) son los mismos, y
+  - sus salidas registradas siguen existiendo con el mismo contenido.
+
+Etapas que lo usan: normalize_loterias, dq_loterias, zip_all.sh, upload_to_gdrive.
+Una ejecución sin cambios termina en segundos y no toca Drive.
+
+Variables:
+  RUN_MANIFEST    -> ruta del manifest (defecto dist/run_manifest.json; en CI
+                     conviene apuntarlo a un directorio cacheado entre ejecuciones)
+  PIPELINE_FORCE  -> 1/true para ignorar el manifest y ejecutar todo
+
+CLI (para scripts bash):
+  python run_manifest.py check  <etapa> --inputs f1 f2 ...          # exit 0 = sin cambios
+  python run_manifest.py record <etapa> --inputs ... --outputs ...
+"""
+
+import os, sys, json, hashlib, argparse
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DIST_DIR = os.environ.get("DIST_DIR", os.path.join(BASE_DIR, "dist"))
+MANIFEST_PATH = os.environ.get("RUN_MANIFEST", os.path.join(DIST_DIR, "run_manifest.json"))
+
+def force_enabled() -> bool:
+    return os.environ.get("PIPELINE_FORCE", "").strip().lower() in ("1", "true", "yes", "si", "sí")
+
+# --- Hashes ---------------------------------------------------------------------
+def file_digest(path: str, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _key(path: str) -> str:
+    p = os.path.abspath(path)
+    return os.path.relpath(p, BASE_DIR) if p.startswith(BASE_DIR + os.sep) else p
+
+def digest_paths(paths: Iterable[str]) -> Dict[str, str]:
+    """{ruta relativa al repo: sha256} (ignora rutas inexistentes)."""
+    out: Dict[str, str] = {}
+    for p in paths:
+        if p and os.path.isfile(p):
+            out[_key(p)] = file_digest(p)
+    return dict(sorted(out.items()))
+
+# --- Persistencia ------------------------------------------------------------------
+def load_manifest(path: str = MANIFEST_PATH) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"stages": {}}
+
+def save_manifest(data: Dict, path: str = MANIFEST_PATH) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+# --- API de etapas -----------------------------------------------------------------
+def stage_unchanged(stage: str, inputs: Iterable[str], path: str = MANIFEST_PATH,
+                    params: Optional[Dict] = None) -> bool:
+    """True si la etapa ya se ejecutó con estas mismas entradas y sus salidas siguen intactas."""
+    if force_enabled():
+        return False
+    entry = load_manifest(path).get("stages", {}).get(stage)
+    if not entry:
+        return False
+    if entry.get("inputs") != digest_paths(inputs):
+        return False
+    if (entry.get("params") or {}) != (params or {}):
+        return False
+    for rel, digest in (entry.get("outputs") or {}).items():
+        p = rel if os.path.isabs(rel) else os.path.join(BASE_DIR, rel)
+        if not os.path.isfile(p) or file_digest(p) != digest:
+            return False
+    return True
+
+def record_stage(stage: str, inputs: Iterable[str], outputs: Iterable[str],
+                 extra: Optional[Dict] = None, path: str = MANIFEST_PATH,
+                 params: Optional[Dict] = None) -> Dict:
+    data = load_manifest(path)
+    entry = {
+        "run_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"),
+        "inputs": digest_paths(inputs),
+        "outputs": digest_paths(outputs),
+    }
+    if params:
+        entry["params"] = params
+    if extra:
+        entry["extra"] = extra
+    data.setdefault("stages", {})[stage] = entry
+    save_manifest(data, path)
+    return entry
+
+def stage_extra(stage: str, path: str = MANIFEST_PATH) -> Dict:
+    return (load_manifest(path).get("stages", {}).get(stage) or {}).get("extra") or {}
+
+# --- CLI -----------------------------------------------------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Manifest de contenido por etapa del pipeline")
+    ap.add_argument("action", choices=["check", "record", "show"])
+    ap.add_argument("stage", nargs="?")
+    ap.add_argument("--inputs", nargs="*", default=[])
+    ap.add_argument("--outputs", nargs="*", default=[])
+    args = ap.parse_args()
+
+    if args.action == "show":
+        print(json.dumps(load_manifest(), ensure_ascii=False, indent=2))
+        return
+    if not args.stage:
+        ap.error("falta <etapa>")
+    if args.action == "check":
+        same = stage_unchanged(args.stage, args.inputs)
+        print(f"= {args.stage}: sin cambios" if same else f"→ {args.stage}: hay cambios")
+        sys.exit(0 if same else 1)
+    record_stage(args.stage, args.inputs, args.outputs)
+    print(f"✓ Manifest: etapa {args.stage} registrada")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/run_metrics.py
+"""
+Serie histórica de ejecuciones (docs/metrics/runs.ndjson)
+
+Una línea JSON por ejecución (k="run") con:
+  ts, run, dq {status, warn, fail}, rows {hoja: filas}, stages {etapa: segundos},
+  sizes {artefacto: bytes}
+
+Retención: las ejecuciones de los últimos RAW_DAYS días se guardan tal cual;
+las anteriores se pliegan en una línea por mes (k="month", n = ejecuciones):
+  rows y sizes -> último valor del mes (son niveles)
+  stages       -> media del mes
+  dq           -> máximo de warn/fail y peor estado del mes
+Con ejecuciones diarias el fichero se queda en ~RAW_DAYS líneas + 12 por año.
+
+El panel no pinta la serie entera: series() la aplana por métrica y
+downsample() la reduce a max_points puntos (media por tramos, el último
+punto se conserva tal cual).
+
+Variables:
+  RUN_METRICS       -> ruta del fichero (docs/metrics/runs.ndjson)
+  RUN_METRICS_DAYS  -> días con detalle por ejecución (90)
+
+Uso:
+  python ops/scripts/run_metrics.py [--compact] [--series dq.warn,stages.dq]
+"""
+
+import os, csv, json, argparse
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+METRICS_PATH = os.environ.get("RUN_METRICS", os.path.join(BASE_DIR, "docs", "metrics", "runs.ndjson"))
+RAW_DAYS = _env_int("RUN_METRICS_DAYS", 90)
+MAX_POINTS = 120
+STATUS_RANK = {"UNKNOWN": 0, "OK": 1, "WARN": 2, "FAIL": 3}
+
+TS_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _parse_ts(ts: str) -> datetime:
+    return datetime.strptime(ts, TS_FORMAT).replace(tzinfo=timezone.utc)
+
+# --- Registro -----------------------------------------------------------------------
+def build_record(report: Dict, rows: Optional[Dict[str, int]] = None,
+                 sizes: Optional[Dict[str, int]] = None, ts: Optional[datetime] = None) -> Dict:
+    """Línea de una ejecución a partir de report.json (make_report) + filas por hoja + tamaños."""
+    dq = report.get("dq") or {}
+    stages = {s: e.get("wall_s") for s, e in (report.get("stages") or {}).items()
+              if e.get("wall_s") is not None}
+    return {"k": "run", "ts": (ts or _now()).strftime(TS_FORMAT),
+            "run": next((e.get("run") for e in (report.get("stages") or {}).values() if e.get("run")), ""),
+            "dq": {"status": dq.get("status", "UNKNOWN"), "warn": int(dq.get("warn") or 0),
+                   "fail": int(dq.get("fail") or 0)},
+            "rows": dict(sorted((rows or {}).items())), "stages": stages,
+            "sizes": dict(sorted((sizes or {}).items()))}
+
+def rows_from_manifest(path: str) -> Dict[str, int]:
+    """{hoja: filas} del manifest de normalize (nombre sin el sello del snapshot; sólo ficheros ok)."""
+    from snapshot_catalog import parse_name
+    out: Dict[str, int] = {}
+    if not path or not os.path.exists(path):
+        return out
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for r in csv.DictReader(f):
+            if str(r.get("ok", "")).strip().lower() not in ("true", "1"):
+                continue
+            try:
+                rows = int(float(r.get("rows") or 0))
+            except ValueError:
+                continue
+            sheet = parse_name(os.path.basename(r.get("file") or ""))["sheet"]
+            out[sheet] = out.get(sheet, 0) + rows
+    return out
+
+def _signature(rec: Dict) -> str:
+    """Contenido sin la hora: el mismo informe regenerado no cuenta como otra ejecución."""
+    return json.dumps({k: v for k, v in rec.items() if k != "ts"}, sort_keys=True)
+
+def load(path: str = METRICS_PATH) -> List[Dict]:
+    out = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    out.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return out
+
+def _write(records: List[Dict], path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for r in records:
+            f.write(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n")
+    os.replace(tmp, path)
+
+def append(rec: Dict, path: str = METRICS_PATH) -> bool:
+    """Añade la ejecución (salvo que sea igual que la última). Devuelve True si se escribió."""
+    records = load(path)
+    last = next((r for r in reversed(records) if r.get("k") == "run"), None)
+    if last is not None and _signature(last) == _signature(rec):
+        return False
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+    return True
+
+def record(report: Dict, rows: Optional[Dict[str, int]] = None, sizes: Optional[Dict[str, int]] = None,
+           path: str = METRICS_PATH) -> bool:
+    """
+    Apunta la ejecución y aplica la retención. Un informe sin DQ ni etapas (el
+    workflow de Pages regenera el panel con dist/ vacío) no es una ejecución.
+    """
+    rec = build_record(report, rows, sizes)
+    if rec["dq"]["status"] == "UNKNOWN" and not rec["stages"] and not rec["rows"]:
+        return False
+    try:
+        written = append(rec, path)
+        compact(path)
+    except OSError as e:
+        print(f"⚠️  No se pudo actualizar {path}: {e}")
+        return False
+    return written
+
+# --- Retención --------------------------------------------------------------------------
+def rollup(runs: List[Dict], month: str) -> Dict:
+    """Pliega las ejecuciones de un mes en una línea (ver cabecera)."""
+    runs = sorted(runs, key=lambda r: r["ts"])
+    n = sum(int(r.get("n", 1)) for r in runs)
+    stage_sum: Dict[str, float] = {}
+    stage_n: Dict[str, int] = {}
+    for r in runs:
+        w = int(r.get("n", 1))
+        for s, v in (r.get("stages") or {}).items():
+            stage_sum[s] = stage_sum.get(s, 0.0) + float(v) * w
+            stage_n[s] = stage_n.get(s, 0) + w
+    dqs = [r.get("dq") or {} for r in runs]
+    return {"k": "month", "ts": runs[-1]["ts"], "month": month, "n": n,
+            "dq": {"status": max((d.get("status", "UNKNOWN") for d in dqs), key=lambda s: STATUS_RANK.get(s, 0)),
+                   "warn": max(int(d.get("warn", 0)) for d in dqs),
+                   "fail": max(int(d.get("fail", 0)) for d in dqs)},
+            "rows": runs[-1].get("rows") or {},
+            "stages": {s: round(stage_sum[s] / stage_n[s], 3) for s in sorted(stage_sum)},
+            "sizes": runs[-1].get("sizes") or {}}
+
+def compact(path: str = METRICS_PATH, raw_days: int = RAW_DAYS, now: Optional[datetime] = None) -> Tuple[int, int]:
+    """Pliega por meses lo anterior a raw_days. Devuelve (líneas antes, después)."""
+    records = load(path)
+    cutoff = (now or _now()) - timedelta(days=raw_days)
+    keep: List[Dict] = []
+    months: "OrderedDict[str, List[Dict]]" = OrderedDict()
+    for r in sorted(records, key=lambda r: r.get("ts", "")):
+        try:
+            ts = _parse_ts(r["ts"])
+        except (KeyError, ValueError):
+            continue
+        if r.get("k") == "month" or ts < cutoff:
+            months.setdefault(r.get("month") or ts.strftime("%Y-%m"), []).append(r)
+        else:
+            keep.append(r)
+    folded = [months[m][0] if len(months[m]) == 1 and months[m][0].get("k") == "month"
+              else rollup(months[m], m) for m in months]
+    out = folded + keep
+    if out != records:
+        _write(out, path)
+    return len(records), len(out)
+
+# --- Series para el panel -------------------------------------------------------------
+def _get(rec: Dict, metric: str):
+    v = rec
+    for part in metric.split("."):
+        if not isinstance(v, dict):
+            return None
+        v = v.get(part)
+    return v
+
+def series(records: List[Dict], metric: str) -> List[Tuple[str, float]]:
+    """[(ts, valor)] de una métrica con punto ("dq.warn", "stages.dq", "rows.Historico")."""
+    out = []
+    for r in sorted(records, key=lambda r: r.get("ts", "")):
+        v = _get(r, metric)
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            out.append((r["ts"], float(v)))
+    return out
+
+def total_rows(records: List[Dict]) -> List[Tuple[str, float]]:
+    return [(r["ts"], float(sum((r.get("rows") or {}).values())))
+            for r in sorted(records, key=lambda r: r.get("ts", "")) if r.get("rows")]
+
+def downsample(points: List[Tuple[str, float]], max_points: int = MAX_POINTS) -> List[Tuple[str, float]]:
+    """Como mucho max_points: media de valores por tramos iguales; el último punto, intacto."""
+    if len(points) <= max_points or max_points < 2:
+        return list(points)
+    head, last = points[:-1], points[-1]
+    buckets = max_points - 1
+    out = []
+    for b in range(buckets):
+        lo, hi = b * len(head) // buckets, (b + 1) * len(head) // buckets
+        chunk = head[lo:hi]
+        if chunk:
+            out.append((chunk[-1][0], sum(v for _, v in chunk) / len(chunk)))
+    return out + [last]
+
+def trends(records: Optional[List[Dict]] = None, max_points: int = MAX_POINTS) -> Dict[str, List]:
+    """Series del panel ya reducidas: {nombre: [[ts, valor], ...]}."""
+    records = load() if records is None else records
+    stages = sorted({s for r in records for s in (r.get("stages") or {})})
+    out = {"dq.warn": series(records, "dq.warn"), "dq.fail": series(records, "dq.fail"),
+           "rows.total": total_rows(records)}
+    out.update({f"stages.{s}": series(records, f"stages.{s}") for s in stages})
+    return {k: [[t, round(v, 3)] for t, v in downsample(p, max_points)] for k, p in out.items() if p}
+
+def main():
+    ap = argparse.ArgumentParser(description="Serie histórica de ejecuciones")
+    ap.add_argument("--path", default=METRICS_PATH)
+    ap.add_argument("--compact", action="store_true", help=f"pliega por meses lo anterior a {RAW_DAYS} días")
+    ap.add_argument("--series", help="métricas separadas por comas (p. ej. dq.warn,stages.dq); defecto: las del panel")
+    ap.add_argument("--points", type=int, default=MAX_POINTS)
+    args = ap.parse_args()
+
+    if args.compact:
+        before, after = compact(args.path)
+        print(f"✓ {args.path}: {before} → {after} líneas")
+    records = load(args.path)
+    if args.series:
+        data = {m: downsample(series(records, m), args.points) for m in args.series.split(",")}
+    else:
+        data = trends(records, args.points)
+    for name, points in data.items():
+        tail = ", ".join(f"{v:g}" for _, v in list(points)[-5:])
+        print(f"{name:<22} {len(points):>4} puntos · últimos: {tail}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/run_pipeline.py
+"""
+Pipeline de Loterías en un solo proceso
+
+Antes cada etapa era un intérprete aparte: dq_loterias volvía a leer los CSV
+que normalize_loterias acababa de parsear, make_report recuperaba los
+contadores de DQ con regex sobre dq_report.txt y send_summary_email volvía a
+listar dist/. Aquí:
+
+- pandas se importa una vez y cada hoja se lee una sola vez (SheetCache)
+- normalize y dq trabajan sobre esos mismos DataFrames
+- entre etapas se pasan objetos (contadores de DQ, manifest, master, ZIPs)
+- los artefactos de dist/ y docs/ son los mismos que con los scripts sueltos
+  (siguen funcionando igual por separado)
+
+Etapas: normalize, dq, zip, report, email (por defecto todas menos email).
+La subida a Drive y la hoja de control siguen aparte (necesitan credenciales).
+
+Uso:
+  python ops/scripts/run_pipeline.py [--stages normalize,dq,zip,report] \
+      [--snapshots latest|all|STAMP|FROM..TO] [--workers N]
+"""
+
+import os, sys, time, argparse, subprocess
+from typing import Dict, List
+
+import pandas as pd
+
+from csv_reader import read_csv, save_cache as save_dialect_cache
+from snapshot_catalog import select_paths, DEFAULT_SELECT
+from run_manifest import load_manifest
+from profiling import profiled
+import normalize_loterias
+import dq_loterias
+import make_report
+import send_summary_email
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DATA_DIR = os.path.join(BASE_DIR, "loterias", "data")
+ZIP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "zip_all.sh")
+
+STAGES = ("normalize", "dq", "zip", "report", "email")
+DEFAULT_STAGES = "normalize,dq,zip,report"
+
+class SheetCache(dict):
+    """{ruta: DataFrame crudo}; cada CSV se lee la primera vez que alguien lo pide."""
+    def __missing__(self, path: str) -> pd.DataFrame:
+        df = read_csv(path)
+        self[path] = df
+        return df
+
+def zip_outputs() -> List[str]:
+    """ZIPs de la última ejecución de zip_all.sh según el manifest de etapas."""
+    entry = load_manifest().get("stages", {}).get("zip") or {}
+    return sorted(os.path.basename(p) for p in (entry.get("outputs") or {}) if p.endswith(".zip"))
+
+def run_zip() -> List[str]:
+    subprocess.run(["bash", ZIP_SCRIPT], cwd=BASE_DIR, check=False)
+    return zip_outputs()
+
+def parse_stages(spec: str) -> List[str]:
+    stages = [s.strip() for s in spec.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        raise SystemExit(f"Etapas desconocidas: {', '.join(unknown)} (válidas: {', '.join(STAGES)})")
+    return stages
+
+def run(stages: List[str], snapshots: str = DEFAULT_SELECT, workers: int = 1) -> Dict:
+    # make_report y send_summary_email usan rutas relativas a la raíz del repo
+    os.chdir(BASE_DIR)
+    state: Dict = {}
+    timings: Dict[str, float] = {}
+    t_all = time.perf_counter()
+
+    inputs = select_paths(DATA_DIR, snapshots)
+    print(f"Pipeline Loterías · etapas: {','.join(stages)} · snapshots: {snapshots} → {len(inputs)} ficheros")
+    sheets = SheetCache()
+    if "normalize" in stages or "dq" in stages:
+        t0 = time.perf_counter()
+        for p in inputs:
+            try:
+                sheets[p]
+            except Exception as e:
+                # normalize/dq registran el error del fichero como hasta ahora
+                print(f"⚠️  No se pudo leer {os.path.basename(p)}: {e}")
+        save_dialect_cache()
+        timings["read"] = time.perf_counter() - t0
+
+    def step(name, fn):
+        t0 = time.perf_counter()
+        state[name] = fn()
+        timings[name] = time.perf_counter() - t0
+
+    if "normalize" in stages:
+        # el pool de procesos no comparte memoria: con workers > 1 cada hijo lee su CSV
+        raw = sheets if workers <= 1 else None
+        step("normalize", lambda: normalize_loterias.run_normalize(inputs, workers, raw=raw))
+    if "dq" in stages:
+        step("dq", lambda: dq_loterias.run_dq(inputs, frames=sheets, label=snapshots))
+        print(state["dq"]["text"])
+    if "zip" in stages:
+        step("zip", run_zip)
+
+    norm = state.get("normalize") or {}
+    zips = state.get("zip")
+    if "report" in stages:
+        def report():
+            rpt = make_report.build_report_json(dq=state.get("dq"), manifest=norm.get("manifest"),
+                                                zips=zips)
+            make_report.build_html(rpt)
+            print(f"✓ JSON: {make_report.REPORT_JSON}")
+            print(f"✓ HTML: {make_report.DOCS_HTML}")
+            return rpt
+        step("report", report)
+    if "email" in stages:
+        def email():
+            master = norm.get("master")
+            body = send_summary_email.build_body(
+                zips=zips, manifest=norm.get("manifest"),
+                master=os.path.exists(master) if master else None,
+                dq_text=(state.get("dq") or {}).get("text"), report=state.get("report"))
+            print(body)
+            send_summary_email.send_email(body)
+        step("email", email)
+
+    timings["total"] = time.perf_counter() - t_all
+    print("Tiempos: " + " · ".join(f"{k} {v:.2f}s" for k, v in timings.items()))
+    state["timings"] = timings
+    return state
+
+def main():
+    ap = argparse.ArgumentParser(description="Pipeline de Loterías en un solo proceso")
+    ap.add_argument("--stages", default=DEFAULT_STAGES, help=f"lista separada por comas de: {', '.join(STAGES)}")
+    ap.add_argument("--snapshots", default=DEFAULT_SELECT,
+                    help="snapshots a procesar: latest | all | STAMP | FROM..TO (defecto LOT_SNAPSHOTS o latest)")
+    ap.add_argument("--workers", type=int, default=normalize_loterias._default_workers(),
+                    help="procesos para la normalización (0 = nº de CPUs; >1 no comparte las hojas leídas)")
+    args = ap.parse_args()
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    run(parse_stages(args.stages), args.snapshots, workers)
+
+if __name__ == "__main__":
+    with profiled("run_pipeline"):
+        main()
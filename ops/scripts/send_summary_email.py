@@ -15,7 +15,7 @@ def read_text(path):
         return ""
 
 def read_report_json():
-    # make_report.py deja report.json en dist/ y el workflow lo copia a docs/
+    # make_report.py deja report.json en dist/ y otra copia (minificada) en docs/ para el panel
     # Preferimos dist/report.json; si no está, probamos docs/report.json
     candidates = [os.path.join(DIST, "report.json"), os.path.join("docs", "report.json")]
     for p in candidates:
@@ -26,7 +26,11 @@ def read_report_json():
             pass
     return None
 
-def build_body():
+def build_body(zips=None, manifest=None, master=None, dq_text=None, report=None):
+    """
+    Sin argumentos lista dist/ y lee dq_report.txt/report.json.
+    run_pipeline pasa directamente lo que ya tiene en memoria.
+    """
     now = datetime.utcnow().strftime("%Y-%m-%d %H:%M")
     lines = []
     lines.append("=== RESUMEN ===")
@@ -34,40 +38,45 @@ def build_body():
     lines.append("")
 
     # Inventario de ZIPs
-    try:
-        items = sorted([f for f in os.listdir(DIST) if f.endswith(".zip")])
-    except FileNotFoundError:
-        items = []
+    if zips is not None:
+        items = sorted(os.path.basename(z) for z in zips)
+    else:
+        try:
+            items = sorted([f for f in os.listdir(DIST) if f.endswith(".zip")])
+        except FileNotFoundError:
+            items = []
     lines.append(f"ZIPs en dist/: {len(items)}")
     for z in items:
         lines.append(f"  - {z}")
     lines.append("")
 
     # Manifest y Master CSV si existen
-    manifest = ""
-    master   = ""
-    try:
-        manifest = sorted([f for f in os.listdir(DIST) if f.startswith("loterias_manifest_") and f.endswith(".csv")])[-1]
-    except:
-        pass
+    if manifest is None:
+        manifest = ""
+        try:
+            manifest = sorted([f for f in os.listdir(DIST) if f.startswith("loterias_manifest_") and f.endswith(".csv")])[-1]
+        except:
+            pass
+    manifest = os.path.basename(manifest) if manifest else ""
     if manifest:
         lines.append(f"Último manifest: {manifest}")
     else:
         lines.append("Último manifest: —")
-    master_path = os.path.join(DIST, "loterias_master.csv")
-    lines.append(f"Master CSV: {'sí' if os.path.exists(master_path) else 'no'}")
+    if master is None:
+        master = os.path.exists(os.path.join(DIST, "loterias_master.csv"))
+    lines.append(f"Master CSV: {'sí' if master else 'no'}")
     lines.append("")
 
     # Data Quality (texto plano si existe)
-    dq_path = os.path.join(DIST, "dq_report.txt")
-    dq_text = read_text(dq_path)
+    if dq_text is None:
+        dq_text = read_text(os.path.join(DIST, "dq_report.txt"))
     if dq_text:
         lines.append("--- DATA QUALITY ---")
         lines.append(dq_text)
         lines.append("")
 
     # Panel DQ (desde report.json)
-    rpt = read_report_json()
+    rpt = report if report is not None else read_report_json()
     if rpt:
         status = rpt.get("status", "UNKNOWN")
         url    = rpt.get("page_url", "") or rpt.get("panel_url", "")
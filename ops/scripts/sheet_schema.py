@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/sheet_schema.py
+"""
+Esquemas tipados por familia de hoja · Loterías
+
+Todo se lee con dtype=str; aquí se declara el tipo real de cada columna y se
+convierte con operaciones vectorizadas (sin apply por fila):
+
+  u8 / u32   -> enteros compactos nulables (UInt8 / UInt32); fuera de rango -> NA
+  count      -> recuento con separador de miles español ("1.234.567") -> UInt32
+  cents      -> importe en céntimos (Int64) con formato español:
+                "1.181.824,81" / "65.278.573,00€" / "6006341,6" / "12.00"
+                se añade como <nombre>_cents justo después de la original
+  prize_category -> etiqueta como category (mismo texto) + cat_rank/cat_hits/
+                cat_extra/cat_complementario/cat_reintegro (ver prize_parser.py)
+  date       -> datetime64 (dd/mm/aaaa, d/mm/aaaa o ISO; ver date_parse.py)
+  datetime   -> datetime64 con hora ("2025-09-06 11:39:05", "8/09/2025 10:05:00")
+  bool       -> boolean nulable ("Sí"/"Si"/"No", "TRUE"/"FALSE", 1/0)
+  category   -> category (Juego, Categoría, VOLATILITY...)
+  list       -> listas JSON ya parseadas (Bitacora.Apuestas)
+
+Los tipos sólo viven en memoria (DQ y quien use read_typed): normalize
+escribe los CSV con el texto original de cada columna y las columnas
+añadidas al lado (for_csv); loterias_db carga esos CSV como texto.
+
+Familias: Historico (+Bono/Gordo), HistoricoEuro, Pagos_*, Raw_Pagos_*,
+Bitacora, User_Strategies, Users. Hojas sin esquema se devuelven tal cual.
+
+Uso:
+  python ops/scripts/sheet_schema.py ops/loterias/data/*.csv   # memoria antes/después
+"""
+
+import os, re, sys, json
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from date_parse import parse_dates, parse_date_column
+from prize_parser import parse_cents, parse_count, parse_categories, game_for_sheet, CATEGORY_FIELDS
+
+# --- Registro ---------------------------------------------------------------------
+_HIST_NUMS = {f"N{i}": "u8" for i in range(1, 7)}
+
+SCHEMAS: Dict[str, Dict[str, str]] = {
+    "Historico": {"FECHA": "date", **_HIST_NUMS, "Complementario": "u8", "Reintegro": "u8"},
+    "HistoricoEuro": {"FECHA": "date", **{f"N{i}": "u8" for i in range(1, 6)}, "E1": "u8", "E2": "u8"},
+    "Pagos": {
+        "Fecha Sorteo": "date",
+        "Categoría": "prize_category",
+        "Nº Acertantes": "count",
+        "Premio por ganador (€)": "cents",
+    },
+    "Bitacora": {
+        "Fecha_Guardado": "datetime",
+        "Juego": "category",
+        "Apuestas": "list",
+        "Coste_Total": "cents",
+        "Joker": "bool",
+    },
+    "User_Strategies": {
+        "GAME": "category",
+        "BANKROLL_EUR": "cents",
+        "VOLATILITY": "category",
+        "K_NUMEROS": "u8",
+        "K_ESTRELLAS": "u8",
+        "MAX_BUDGET_PER_DRAW_EUR": "cents",
+        "IS_DEFAULT": "bool",
+        "UPDATED_AT": "datetime",
+        "CADENCE": "category",
+        "HORIZON": "category",
+        "PLAN_TYPE": "category",
+        "START_DATE": "date",
+        "END_DATE": "date",
+        "AUTO_REMIND": "bool",
+    },
+    "Users": {"CREATED_AT": "date", "ACTIVE": "bool"},
+}
+SCHEMAS["Raw_Pagos"] = dict(SCHEMAS["Pagos"])
+
+FAMILY_ALIASES = {"HistoricoBono": "Historico", "HistoricoGordo": "Historico"}
+
+# columnas que añade la normalización en cualquier hoja
+COMMON = {"fecha_estandar": "date"}
+
+def sheet_name(path_or_name: str) -> str:
+    """'Raw_Pagos_Gordo_20250921_1456.csv' -> 'Raw_Pagos_Gordo'."""
+    stem = os.path.splitext(os.path.basename(path_or_name))[0]
+    return re.sub(r"_\d{8}_\d{4}$", "", stem)
+
+def family_for(path_or_name: str) -> Optional[str]:
+    sheet = sheet_name(path_or_name)
+    if sheet in SCHEMAS:
+        return sheet
+    if sheet in FAMILY_ALIASES:
+        return FAMILY_ALIASES[sheet]
+    if sheet.startswith("Raw_Pagos_"):
+        return "Raw_Pagos"
+    if sheet.startswith("Pagos_"):
+        return "Pagos"
+    return None
+
+def schema_for(path_or_name: str) -> Dict[str, str]:
+    fam = family_for(path_or_name)
+    return {**COMMON, **(SCHEMAS.get(fam) or {})}
+
+def cents_column(col: str) -> str:
+    """'Premio por ganador (€)' -> 'premio_por_ganador_cents'."""
+    slug = re.sub(r"[^0-9a-z]+", "_", col.lower().replace("€", "")).strip("_")
+    return f"{slug}_cents"
+
+# --- Conversores vectorizados -------------------------------------------------------
+def _text(s: pd.Series) -> pd.Series:
+    return s.astype("string").str.strip().replace({"": pd.NA, "nan": pd.NA, "None": pd.NA})
+
+def to_uint(s: pd.Series, dtype: str = "UInt8") -> pd.Series:
+    num = pd.to_numeric(_text(s), errors="coerce")
+    info = np.iinfo(dtype.lower())
+    ok = num.notna() & (num >= info.min) & (num <= info.max) & (num == np.floor(num))
+    return num.where(ok).astype(dtype)
+
+def to_date(s: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s.dt.normalize()
+    return parse_date_column(s)
+
+def to_datetime(s: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    return parse_dates(s)
+
+_TRUE = {"sí", "si", "s", "true", "verdadero", "1", "yes", "y", "x"}
+_FALSE = {"no", "n", "false", "falso", "0"}
+
+def to_bool(s: pd.Series) -> pd.Series:
+    t = _text(s).str.lower()
+    out = pd.Series(pd.NA, index=s.index, dtype="boolean")
+    out[t.isin(_TRUE).fillna(False)] = True
+    out[t.isin(_FALSE).fillna(False)] = False
+    return out
+
+def to_category(s: pd.Series) -> pd.Series:
+    return _text(s).astype("category")
+
+def to_list(s: pd.Series) -> pd.Series:
+    """JSON por valor único (las apuestas se repiten mucho entre snapshots)."""
+    t = _text(s)
+    parsed = {}
+    for v in t.dropna().unique():
+        try:
+            parsed[v] = json.loads(v)
+        except ValueError:
+            parsed[v] = None
+    return t.astype(object).map(parsed)
+
+CONVERTERS = {
+    "u8": lambda s: to_uint(s, "UInt8"),
+    "u32": lambda s: to_uint(s, "UInt32"),
+    "count": parse_count,
+    "date": to_date,
+    "datetime": to_datetime,
+    "bool": to_bool,
+    "category": to_category,
+    "list": to_list,
+}
+
+# --- API --------------------------------------------------------------------------
+def apply_schema(df: pd.DataFrame, sheet: str) -> pd.DataFrame:
+    """Devuelve una copia tipada según la familia de 'sheet' (nombre de hoja o ruta)."""
+    schema = schema_for(sheet)
+    if not schema:
+        return df
+    df = df.copy()
+    for col, kind in schema.items():
+        if kind == "cents":
+            target = cents_column(col)
+            if col in df.columns:
+                # los céntimos van justo después del texto, que se conserva
+                cents = parse_cents(df[col])
+                if target in df.columns:
+                    df.pop(target)
+                df.insert(df.columns.get_loc(col) + 1, target, cents)
+            elif target in df.columns:
+                # CSV ya normalizado: no se vuelve a parsear texto
+                df[target] = pd.to_numeric(df[target], errors="coerce").astype("Int64")
+            continue
+        if kind == "prize_category":
+            if col in df.columns:
+                # cat_rank / cat_hits / cat_extra / ... justo después de la etiqueta
+                fields = parse_categories(df[col], game_for_sheet(sheet))
+                df[col] = to_category(df[col])
+                pos = df.columns.get_loc(col) + 1
+                for i, name in enumerate(CATEGORY_FIELDS):
+                    if name in df.columns:
+                        df.pop(name)
+                    df.insert(pos + i, name, fields[name])
+            continue
+        if col in df.columns:
+            df[col] = CONVERTERS[kind](df[col])
+    return df
+
+def for_csv(df: pd.DataFrame, sheet: str, text: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Frame tipado listo para escribir el CSV. Con 'text' (el frame antes de
+    apply_schema) las columnas originales se escriben con su texto tal cual
+    (fechas dd/mm/aaaa, "Sí"/"No", importes con coma...) y las que añade el
+    esquema van junto a ellas: el CSV no cambia de formato, sólo gana columnas.
+    Sin 'text', las columnas 'list' vuelven a JSON y el resto se serializa solo.
+    """
+    if text is not None:
+        df = df.copy()
+        for c in text.columns:
+            if c in df.columns:
+                df[c] = text[c]
+        return df
+    cols = [c for c, k in schema_for(sheet).items() if k == "list" and c in df.columns]
+    if not cols:
+        return df
+    df = df.copy()
+    for c in cols:
+        df[c] = df[c].map(lambda v: json.dumps(v, ensure_ascii=False) if isinstance(v, list) else v)
+    return df
+
+def read_typed(path: str) -> pd.DataFrame:
+    """Lee un CSV (crudo o normalizado) y lo devuelve ya tipado."""
+    from csv_reader import read_csv
+    return apply_schema(read_csv(path), path)
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    from csv_reader import read_csv
+    before_total = after_total = 0
+    for p in sys.argv[1:]:
+        raw = read_csv(p)
+        typed = apply_schema(raw, p)
+        b, a = memory_bytes(raw), memory_bytes(typed)
+        before_total += b
+        after_total += a
+        print(f"{os.path.basename(p):<44} {family_for(p) or '-':<16} {b:>10} → {a:>10} bytes")
+    if after_total:
+        print(f"Total: {before_total} → {after_total} bytes (×{before_total / after_total:.1f})")
+
+if __name__ == "__main__":
+    main()
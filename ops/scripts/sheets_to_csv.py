@@ -8,6 +8,9 @@ Reglas:
 Requiere:
 - GOOGLE_SA_JSON: ruta al JSON del Service Account (lo crea el workflow)
 - SHEETS_SPREADSHEET_ID: ID del Google Sheets
+Opcional:
+- SHEETS_DELTA=1: además registra cada hoja como snapshot delta por fila en
+  loterias/data/_delta (ver snapshot_delta.py) en lugar de acumular copias completas
 """
 
 import os, re, csv, sys
@@ -15,11 +18,16 @@ from datetime import datetime
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 
+from snapshot_delta import ingest as ingest_delta
+from stage_timing import span, note
+from profiling import profiled
+
 BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 OUT_DIR = os.path.join(BASE, "loterias", "data")
 
 SA_PATH  = os.getenv("GOOGLE_SA_JSON", "")
 SHEET_ID = os.getenv("SHEETS_SPREADSHEET_ID", "")
+DELTA    = os.getenv("SHEETS_DELTA", "").strip().lower() in ("1", "true", "yes")
 
 SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets.readonly",
@@ -44,6 +52,7 @@ def main():
         die("SHEETS_SPREADSHEET_ID vacío")
 
     os.makedirs(OUT_DIR, exist_ok=True)
+    run_stamp = datetime.now().strftime("%Y%m%d_%H%M")
 
     creds = service_account.Credentials.from_service_account_file(SA_PATH, scopes=SCOPES)
     svc   = build("sheets", "v4", credentials=creds)
@@ -72,7 +81,11 @@ def main():
                 writer.writerow(row)
 
         rows = len(values)
+        note(rows=rows, bytes=os.path.getsize(out_path))
         print(f"   · {title} → {out_name} ({rows} filas)")
+        if DELTA:
+            how = ingest_delta(out_path, sheet=os.path.splitext(out_name)[0], stamp=run_stamp)
+            print(f"     snapshot delta: {how}")
         total_csv += 1
 
     stamp = datetime.now().strftime("%Y-%m-%d %H:%M")
@@ -80,6 +93,7 @@ def main():
 
 if __name__ == "__main__":
     try:
-        main()
+        with span("sheets_to_csv"), profiled("sheets_to_csv"):
+            main()
     except Exception as e:
         die(f"Error inesperado: {e}")
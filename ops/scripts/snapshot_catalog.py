@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/snapshot_catalog.py
+"""
+Catálogo de snapshots de loterias/data
+
+Los ficheros se llaman <Hoja>_<YYYYMMDD>_<HHMM>.csv y cada exportación deja una
+copia nueva de cada hoja. Este módulo los agrupa por hoja y deja elegir qué
+snapshots procesa cada etapa:
+
+  latest                 -> el último de cada hoja (defecto)
+  all                    -> todos (comportamiento antiguo)
+  20250921_1425          -> por hoja, el último con marca <= esa (foto "a fecha")
+  20250921..20250922     -> todos los del rango (extremos opcionales:
+                            "20250921_1430..", "..20250921")
+
+Ficheros sin marca temporal cuentan como una hoja con un único snapshot.
+
+Índice: dist/.snapshot_index.json (LOT_SNAPSHOT_INDEX) guarda la lista de
+ficheros por directorio junto con el mtime del directorio; mientras no cambie
+(no se añaden/borran ficheros) no se vuelve a listar ni a hacer stat.
+
+Variables:
+  LOT_SNAPSHOTS  -> selección por defecto (latest)
+
+Uso:
+  python ops/scripts/snapshot_catalog.py [dir] [--select latest|all|STAMP|FROM..TO]
+"""
+
+import os, re, sys, json, argparse
+from typing import Dict, List, Optional
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DATA_DIR = os.path.join(BASE_DIR, "loterias", "data")
+DIST_DIR = os.environ.get("DIST_DIR", os.path.join(BASE_DIR, "dist"))
+INDEX_PATH = os.environ.get("LOT_SNAPSHOT_INDEX", os.path.join(DIST_DIR, ".snapshot_index.json"))
+DEFAULT_SELECT = os.environ.get("LOT_SNAPSHOTS", "latest").strip() or "latest"
+
+SNAPSHOT_RE = re.compile(r"^(?P<sheet>.+?)_(?P<stamp>\d{8}_\d{4})\.csv$", re.I)
+
+def parse_name(name: str) -> Dict[str, Optional[str]]:
+    """'Historico_20250921_1456.csv' -> {'sheet': 'Historico', 'stamp': '20250921_1456'}."""
+    m = SNAPSHOT_RE.match(name)
+    if m:
+        return {"sheet": m.group("sheet"), "stamp": m.group("stamp")}
+    return {"sheet": os.path.splitext(name)[0], "stamp": None}
+
+# --- Índice ---------------------------------------------------------------------
+def _load_index(path: str = INDEX_PATH) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _save_index(data: Dict, path: str = INDEX_PATH) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def scan(data_dir: str = DATA_DIR, index_path: str = INDEX_PATH) -> List[Dict]:
+    """Entradas {name, sheet, stamp, bytes} de data_dir (del índice si el directorio no ha cambiado)."""
+    data_dir = os.path.abspath(data_dir)
+    try:
+        mtime = os.stat(data_dir).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    index = _load_index(index_path) if index_path else {}
+    cached = index.get(data_dir)
+    if cached and cached.get("mtime_ns") == mtime:
+        return cached["files"]
+
+    files = []
+    with os.scandir(data_dir) as it:
+        for e in it:
+            if e.is_file() and e.name.lower().endswith(".csv"):
+                files.append({"name": e.name, **parse_name(e.name), "bytes": e.stat().st_size})
+    files.sort(key=lambda f: f["name"])
+    if index_path:
+        index[data_dir] = {"mtime_ns": mtime, "files": files}
+        _save_index(index, index_path)
+    return files
+
+def group_by_sheet(files: List[Dict]) -> Dict[str, List[Dict]]:
+    """{hoja: [snapshots ordenados por marca]}."""
+    out: Dict[str, List[Dict]] = {}
+    for f in files:
+        out.setdefault(f["sheet"], []).append(f)
+    for snaps in out.values():
+        snaps.sort(key=lambda f: (f["stamp"] or "", f["name"]))
+    return dict(sorted(out.items()))
+
+# --- Selección -------------------------------------------------------------------
+def _bound(stamp: str, upper: bool) -> str:
+    stamp = stamp.strip()
+    if re.fullmatch(r"\d{8}", stamp):
+        return stamp + ("_9999" if upper else "_0000")
+    return stamp
+
+def select(files: List[Dict], spec: str = DEFAULT_SELECT) -> List[Dict]:
+    spec = (spec or "latest").strip()
+    groups = group_by_sheet(files)
+    chosen: List[Dict] = []
+    if spec == "all":
+        return sorted(files, key=lambda f: f["name"])
+    if spec == "latest":
+        chosen = [snaps[-1] for snaps in groups.values()]
+    elif ".." in spec:
+        lo, hi = spec.split("..", 1)
+        lo = _bound(lo, False) if lo.strip() else ""
+        hi = _bound(hi, True) if hi.strip() else "~"
+        for snaps in groups.values():
+            chosen += [f for f in snaps if f["stamp"] is None or lo <= f["stamp"] <= hi]
+    elif re.fullmatch(r"\d{8}(_\d{4})?", spec):
+        upto = _bound(spec, True)
+        for snaps in groups.values():
+            ok = [f for f in snaps if f["stamp"] is None or f["stamp"] <= upto]
+            if ok:
+                chosen.append(ok[-1])
+    else:
+        raise ValueError(f"Selección de snapshots no válida: {spec!r} (latest|all|STAMP|FROM..TO)")
+    return sorted(chosen, key=lambda f: f["name"])
+
+def select_paths(data_dir: str = DATA_DIR, spec: str = DEFAULT_SELECT) -> List[str]:
+    """Rutas completas de los snapshots elegidos, ordenadas por nombre."""
+    return [os.path.join(data_dir, f["name"]) for f in select(scan(data_dir), spec)]
+
+def main():
+    ap = argparse.ArgumentParser(description="Catálogo de snapshots <Hoja>_<YYYYMMDD>_<HHMM>.csv")
+    ap.add_argument("data_dir", nargs="?", default=DATA_DIR)
+    ap.add_argument("--select", default=DEFAULT_SELECT, help="latest | all | STAMP | FROM..TO")
+    args = ap.parse_args()
+
+    files = scan(args.data_dir)
+    picked = {f["name"] for f in select(files, args.select)}
+    for sheet, snaps in group_by_sheet(files).items():
+        marks = " ".join(("*" if f["name"] in picked else "") + (f["stamp"] or "-") for f in snaps)
+        print(f"{sheet:<28} {marks}")
+    print(f"{len(picked)} de {len(files)} ficheros seleccionados ({args.select}; * = elegido)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/snapshot_delta.py
+"""
+Snapshots delta de loterias/data
+
+En vez de guardar una copia completa de cada hoja por ejecución
+(Historico_20250921_1425.csv, Historico_20250921_1456.csv, …) se guarda:
+
+  loterias/data/_delta/<Hoja>/
+    base_<YYYYMMDD_HHMM>.csv     copia completa (primer snapshot o tras compactar)
+    delta_<YYYYMMDD_HHMM>.json   inserts / updates / deletes por fila respecto al anterior
+    catalog.json                 clave de fila, base vigente y cadena de deltas
+
+Un cambio de cabecera abre una base nueva; la cadena anterior pasa a "history"
+({key, base, chain} por tramo) y sus snapshots se siguen pudiendo restaurar y
+compactar (restore/compact --stamp/--upto buscan el tramo que contiene el sello).
+
+Clave estable de fila:
+  - Historico*   -> FECHA
+  - resto        -> md5 de la fila completa (_rowhash); una fila modificada es delete + insert
+Claves repetidas (filas duplicadas) se desambiguan con '#<n>' por orden de aparición.
+
+La reconstrucción es byte a byte idéntica al CSV original (csv.writer, CRLF),
+incluido el orden de filas.
+
+Uso:
+  python ops/scripts/snapshot_delta.py ingest loterias/data/Historico_20250921_1456.csv [...]
+  python ops/scripts/snapshot_delta.py list [Hoja]
+  python ops/scripts/snapshot_delta.py restore Historico [--stamp 20250921_1425] [--out fichero.csv]
+  python ops/scripts/snapshot_delta.py compact Historico|--all [--upto 20250921_1456]
+"""
+
+import os, re, io, csv, sys, json, glob, hashlib, argparse
+from typing import Dict, List, Optional, Tuple
+
+BASE_DIR  = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DATA_DIR  = os.environ.get("LOT_DATA_DIR", os.path.join(BASE_DIR, "loterias", "data"))
+DELTA_DIR = os.environ.get("LOT_DELTA_DIR", os.path.join(DATA_DIR, "_delta"))
+
+SNAPSHOT_RE = re.compile(r"^(?P<sheet>.+?)_(?P<stamp>\d{8}_\d{4})\.csv$", re.I)
+
+Row = List[str]
+
+# --- Lectura / escritura CSV ------------------------------------------------------
+def read_rows(path: str) -> Tuple[Row, List[Row]]:
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    return (rows[0] if rows else []), rows[1:]
+
+def rows_to_bytes(header: Row, rows: List[Row]) -> bytes:
+    buf = io.StringIO()
+    w = csv.writer(buf)  # mismo dialecto que sheets_to_csv (CRLF)
+    if header:
+        w.writerow(header)
+    w.writerows(rows)
+    return buf.getvalue().encode("utf-8")
+
+def _write_json(path: str, obj) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+def _read_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+# --- Claves de fila ---------------------------------------------------------------
+def key_mode(sheet: str, header: Row) -> str:
+    return "FECHA" if sheet.lower().startswith("historico") and "FECHA" in header else "_rowhash"
+
+def row_keys(mode: str, header: Row, rows: List[Row]) -> List[str]:
+    if mode == "FECHA":
+        i = header.index("FECHA")
+        base = [r[i] if i < len(r) else "" for r in rows]
+    else:
+        base = [hashlib.md5("|".join(r).encode("utf-8")).hexdigest() for r in rows]
+    seen: Dict[str, int] = {}
+    out = []
+    for k in base:
+        n = seen.get(k, 0)
+        seen[k] = n + 1
+        out.append(k if n == 0 else f"{k}#{n}")
+    return out
+
+# --- Diff / patch -----------------------------------------------------------------
+def diff_rows(mode: str, header: Row, old: List[Row], new: List[Row]) -> Dict:
+    """Delta old -> new: deletes, updates (misma clave, distinto contenido) e inserts con su posición."""
+    ko, kn = row_keys(mode, header, old), row_keys(mode, header, new)
+    old_by_key = dict(zip(ko, old))
+    new_set = set(kn)
+    delete = [k for k in ko if k not in new_set]
+    update = [[k, r] for k, r in zip(kn, new) if k in old_by_key and old_by_key[k] != r]
+    insert = [[pos, r] for pos, (k, r) in enumerate(zip(kn, new)) if k not in old_by_key]
+    delta = {"delete": delete, "update": update, "insert": insert}
+    # Si las filas supervivientes cambian de orden relativo, se guarda el orden completo
+    survivors_old = [k for k in ko if k in new_set]
+    survivors_new = [k for k in kn if k in old_by_key]
+    if survivors_old != survivors_new:
+        delta["order"] = kn
+    return delta
+
+def apply_delta(mode: str, header: Row, rows: List[Row], delta: Dict) -> List[Row]:
+    keys = row_keys(mode, header, rows)
+    deleted = set(delta.get("delete", []))
+    updates = {k: r for k, r in delta.get("update", [])}
+    kept = [(k, updates.get(k, r)) for k, r in zip(keys, rows) if k not in deleted]
+    if "order" in delta:
+        pool = dict(kept)
+        inserted = {pos: r for pos, r in delta.get("insert", [])}
+        return [inserted[i] if i in inserted else pool[k] for i, k in enumerate(delta["order"])]
+    out = [r for _, r in kept]
+    for pos, r in sorted(delta.get("insert", []), key=lambda t: t[0]):
+        out.insert(pos, r)
+    return out
+
+# --- Catálogo por hoja ------------------------------------------------------------
+def sheet_dir(sheet: str, root: str = DELTA_DIR) -> str:
+    return os.path.join(root, sheet)
+
+def load_catalog(sheet: str, root: str = DELTA_DIR) -> Optional[Dict]:
+    p = os.path.join(sheet_dir(sheet, root), "catalog.json")
+    return _read_json(p) if os.path.exists(p) else None
+
+def save_catalog(sheet: str, cat: Dict, root: str = DELTA_DIR) -> None:
+    os.makedirs(sheet_dir(sheet, root), exist_ok=True)
+    _write_json(os.path.join(sheet_dir(sheet, root), "catalog.json"), cat)
+
+def stamps(cat: Dict) -> List[str]:
+    return [cat["base"]] + list(cat.get("chain", []))
+
+def segments(cat: Dict) -> List[Dict]:
+    """Tramos de la hoja: los anteriores a cada cambio de cabecera (history) y el vigente (cat)."""
+    out = []
+    for h in cat.get("history", []):
+        if isinstance(h, list):
+            # formato antiguo: sólo la lista de sellos (la clave se deduce de la cabecera de la base)
+            h = {"base": h[0], "chain": h[1:]}
+        out.append(h)
+    return out + [cat]
+
+def all_stamps(cat: Dict) -> List[str]:
+    return [s for seg in segments(cat) for s in stamps(seg)]
+
+def _segment_for(cat: Dict, stamp: str) -> Optional[Dict]:
+    return next((seg for seg in segments(cat) if stamp in stamps(seg)), None)
+
+def _replay(sheet: str, seg: Dict, stamp: str, root: str) -> Tuple[Row, List[Row]]:
+    d = sheet_dir(sheet, root)
+    header, rows = read_rows(os.path.join(d, f"base_{seg['base']}.csv"))
+    key = seg.get("key") or key_mode(sheet, header)
+    for s in seg.get("chain", []):
+        if s > stamp:
+            break
+        delta = _read_json(os.path.join(d, f"delta_{s}.json"))
+        rows = apply_delta(key, header, rows, delta)
+    return header, rows
+
+def reconstruct(sheet: str, stamp: Optional[str] = None, root: str = DELTA_DIR) -> Tuple[Row, List[Row]]:
+    """Reconstruye el snapshot 'stamp' (el último si None) aplicando la cadena de deltas de su tramo."""
+    cat = load_catalog(sheet, root)
+    if not cat:
+        raise FileNotFoundError(f"Sin snapshots delta para la hoja {sheet}")
+    stamp = stamp or stamps(cat)[-1]
+    seg = _segment_for(cat, stamp)
+    if seg is None:
+        raise KeyError(f"{sheet}: snapshot {stamp} no disponible (base {cat['base']}, compactado)")
+    return _replay(sheet, seg, stamp, root)
+
+def ingest(path: str, sheet: Optional[str] = None, stamp: Optional[str] = None, root: str = DELTA_DIR) -> str:
+    """Añade un CSV completo al almacén delta. Devuelve 'base', 'delta' o 'skip'."""
+    m = SNAPSHOT_RE.match(os.path.basename(path))
+    sheet = sheet or (m.group("sheet") if m else os.path.splitext(os.path.basename(path))[0])
+    stamp = stamp or (m.group("stamp") if m else None)
+    if not stamp:
+        raise ValueError(f"{path}: sin marca temporal (<Hoja>_<YYYYMMDD>_<HHMM>.csv) ni --stamp")
+
+    header, rows = read_rows(path)
+    cat = load_catalog(sheet, root)
+    d = sheet_dir(sheet, root)
+    os.makedirs(d, exist_ok=True)
+
+    if cat and stamp in all_stamps(cat):
+        return "skip"
+    if cat and stamp < stamps(cat)[-1]:
+        raise ValueError(f"{sheet}: {stamp} es anterior al último snapshot {stamps(cat)[-1]}")
+
+    if cat:
+        prev_header, prev_rows = reconstruct(sheet, root=root)
+        if prev_header == header:
+            delta = diff_rows(cat["key"], header, prev_rows, rows)
+            delta.update({"stamp": stamp, "parent": stamps(cat)[-1]})
+            _write_json(os.path.join(d, f"delta_{stamp}.json"), delta)
+            cat.setdefault("chain", []).append(stamp)
+            save_catalog(sheet, cat, root)
+            return "delta"
+
+    # Primer snapshot o cambio de cabecera: nueva base; la cadena anterior sigue restaurable
+    with open(os.path.join(d, f"base_{stamp}.csv"), "wb") as f:
+        f.write(rows_to_bytes(header, rows))
+    history = [{"key": seg.get("key"), "base": seg["base"], "chain": list(seg.get("chain", []))}
+               for seg in segments(cat)] if cat else []
+    save_catalog(sheet, {"sheet": sheet, "key": key_mode(sheet, header), "base": stamp,
+                         "chain": [], "history": history}, root)
+    return "base"
+
+def compact(sheet: str, upto: Optional[str] = None, root: str = DELTA_DIR) -> Dict:
+    """
+    Pliega la base y los deltas hasta 'upto' (por defecto el último) en una base nueva,
+    dentro del tramo que contiene 'upto' (el vigente o uno de history).
+    Los snapshots de ese tramo anteriores a 'upto' dejan de poder reconstruirse.
+    """
+    cat = load_catalog(sheet, root)
+    if not cat:
+        raise FileNotFoundError(f"Sin snapshots delta para la hoja {sheet}")
+    upto = upto or stamps(cat)[-1]
+    segs = segments(cat)
+    seg = next((g for g in segs if upto in stamps(g)), None)
+    if seg is None:
+        raise KeyError(f"{sheet}: snapshot {upto} no disponible (base {cat['base']}, compactado)")
+    header, rows = _replay(sheet, seg, upto, root)
+    d = sheet_dir(sheet, root)
+    with open(os.path.join(d, f"base_{upto}.csv"), "wb") as f:
+        f.write(rows_to_bytes(header, rows))
+
+    old = stamps(seg)
+    rest = [s for s in seg.get("chain", []) if s > upto]
+    for s in old:
+        if s == upto or s in rest:
+            continue
+        for p in (os.path.join(d, f"base_{s}.csv"), os.path.join(d, f"delta_{s}.json")):
+            if os.path.exists(p):
+                os.remove(p)
+    if os.path.exists(os.path.join(d, f"delta_{upto}.json")):
+        os.remove(os.path.join(d, f"delta_{upto}.json"))
+    # el primer delta restante apuntaba a 'upto' y sigue siendo válido sobre la base nueva
+    seg.update({"base": upto, "chain": rest, "key": seg.get("key") or key_mode(sheet, header)})
+    if len(segs) > 1:
+        cat["history"] = segs[:-1]
+    save_catalog(sheet, cat, root)
+    return cat
+
+def store_bytes(sheet: str, root: str = DELTA_DIR) -> int:
+    return sum(os.path.getsize(p) for p in glob.glob(os.path.join(sheet_dir(sheet, root), "*")))
+
+def list_sheets(root: str = DELTA_DIR) -> List[str]:
+    return sorted(n for n in os.listdir(root) if os.path.isfile(os.path.join(root, n, "catalog.json"))) \
+        if os.path.isdir(root) else []
+
+# --- CLI -----------------------------------------------------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Snapshots delta por fila para loterias/data")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("ingest");  p.add_argument("paths", nargs="+"); p.add_argument("--sheet"); p.add_argument("--stamp")
+    p = sub.add_parser("list");    p.add_argument("sheet", nargs="?")
+    p = sub.add_parser("restore"); p.add_argument("sheet"); p.add_argument("--stamp"); p.add_argument("--out")
+    p = sub.add_parser("compact"); p.add_argument("sheet", nargs="?"); p.add_argument("--all", action="store_true"); p.add_argument("--upto")
+    ap.add_argument("--root", default=DELTA_DIR)
+    args = ap.parse_args()
+
+    if args.cmd == "ingest":
+        for path in sorted(args.paths):
+            how = ingest(path, args.sheet, args.stamp, args.root)
+            print(f"   · {os.path.basename(path)} → {how}")
+    elif args.cmd == "list":
+        for sheet in ([args.sheet] if args.sheet else list_sheets(args.root)):
+            cat = load_catalog(sheet, args.root) or {}
+            print(f"{sheet}: clave={cat.get('key')} base={cat.get('base')} deltas={len(cat.get('chain', []))}"
+                  f" · tramos anteriores={len(cat.get('history', []))} · {store_bytes(sheet, args.root)} bytes")
+    elif args.cmd == "restore":
+        header, rows = reconstruct(args.sheet, args.stamp, args.root)
+        data = rows_to_bytes(header, rows)
+        if args.out:
+            with open(args.out, "wb") as f:
+                f.write(data)
+            print(f"✓ {args.sheet} → {args.out} ({len(rows)} filas)")
+        else:
+            sys.stdout.write(data.decode("utf-8"))
+    elif args.cmd == "compact":
+        sheets = list_sheets(args.root) if args.all else [args.sheet]
+        if not sheets or sheets == [None]:
+            ap.error("indica una hoja o --all")
+        for sheet in sheets:
+            cat = compact(sheet, args.upto, args.root)
+            print(f"✓ {sheet}: base {cat['base']} · deltas restantes {len(cat['chain'])}")
+
+if __name__ == "__main__":
+    main()
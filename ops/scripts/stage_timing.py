@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/stage_timing.py
+"""
+Tiempos y volumen por etapa (dist/stage_metrics.jsonl)
+
+Cada etapa abre un span y al cerrarlo se añade una línea JSON con:
+  stage, detail, started_utc, wall_s, cpu_s (proceso + hijos), rows, bytes,
+  ok, error, run y la memoria:
+    max_rss_mb      pico del proceso desde que arrancó (no de la etapa: las
+                    etapas tras normalize heredan su pico)
+    rss_growth_mb   cuánto subió ese pico durante la etapa (0 = no lo superó)
+    child_rss_mb    pico del mayor hijo terminado (pool de normalize,
+                    subprocesos) si la etapa lo subió; si no, null
+
+    from stage_timing import span, note
+    with span("normalize") as s:
+        ...
+        s.add(rows=len(df), bytes=os.path.getsize(out))
+
+'note(rows=, bytes=)' suma al span abierto más interno (no hace nada si no
+hay ninguno): así main() de un fetcher puede apuntar filas sin recibir el span.
+make_report lleva a report.json la última medida de cada etapa y
+update_control_sheet una columna por etapa (STAGES). En GitHub Actions el
+fichero muere con el job: run-latest-now versiona docs/report.json para que
+el job de Pages tenga las etapas.
+
+Variables:
+  STAGE_METRICS -> fichero JSONL (defecto dist/stage_metrics.jsonl)
+  RUN_ID / GITHUB_RUN_ID -> identificador de la ejecución en cada línea
+
+CLI (para scripts bash):
+  python stage_timing.py now                                    # marca de inicio
+  python stage_timing.py record zip --start T [--rows N] [--outputs f1 f2 ...] [--skipped]
+  python stage_timing.py show                                   # última medida por etapa
+"""
+
+import os, sys, json, time, argparse, platform
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import resource  # no existe en Windows
+except ImportError:
+    resource = None
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DIST_DIR = os.environ.get("DIST_DIR", os.path.join(BASE_DIR, "dist"))
+METRICS_PATH = os.environ.get("STAGE_METRICS", os.path.join(DIST_DIR, "stage_metrics.jsonl"))
+
+# Etapas con columna propia en la hoja de control (en orden de ejecución)
+STAGES = ("fetch", "sheets_to_csv", "normalize", "dq", "zip", "upload")
+
+_open: List["Span"] = []
+
+def run_id() -> str:
+    return os.environ.get("RUN_ID") or os.environ.get("GITHUB_RUN_ID") or ""
+
+def cpu_seconds() -> float:
+    """CPU de usuario + sistema del proceso y de sus hijos ya terminados."""
+    if resource is None:
+        return time.process_time()
+    me, kids = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    return me.ru_utime + me.ru_stime + kids.ru_utime + kids.ru_stime
+
+def _rss_mb(who) -> float:
+    rss = resource.getrusage(who).ru_maxrss
+    # Linux da KB; macOS, bytes
+    return round(rss / (1 << 20 if platform.system() == "Darwin" else 1 << 10), 1)
+
+def max_rss_mb() -> Optional[float]:
+    """Pico de RSS del proceso desde que arrancó (ru_maxrss no se reinicia por etapa)."""
+    return None if resource is None else _rss_mb(resource.RUSAGE_SELF)
+
+def child_rss_mb() -> Optional[float]:
+    """Pico de RSS del mayor hijo ya terminado y esperado (workers del pool)."""
+    return None if resource is None else _rss_mb(resource.RUSAGE_CHILDREN)
+
+def rss_fields(before: Dict) -> Dict:
+    """max_rss_mb / rss_growth_mb / child_rss_mb del span a partir de los picos al abrirlo."""
+    if resource is None:
+        return {"max_rss_mb": None, "rss_growth_mb": None, "child_rss_mb": None}
+    me, kids = max_rss_mb(), child_rss_mb()
+    return {"max_rss_mb": me, "rss_growth_mb": round(me - before["self"], 1),
+            "child_rss_mb": kids if kids > before["children"] else None}
+
+def file_bytes(paths: Iterable[str]) -> int:
+    return sum(os.path.getsize(p) for p in paths if p and os.path.isfile(p))
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+
+class Span:
+    def __init__(self, stage: str, detail: str = ""):
+        self.stage, self.detail = stage, detail
+        self.rows = 0
+        self.bytes = 0
+        self.skipped = False
+
+    def add(self, rows: int = 0, bytes: int = 0) -> None:
+        self.rows += int(rows or 0)
+        self.bytes += int(bytes or 0)
+
+def note(rows: int = 0, bytes: int = 0, skipped: Optional[bool] = None) -> None:
+    """Suma filas/bytes al span abierto más interno (si lo hay)."""
+    if _open:
+        _open[-1].add(rows, bytes)
+        if skipped is not None:
+            _open[-1].skipped = skipped
+
+def append(entry: Dict, path: str = METRICS_PATH) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+@contextmanager
+def span(stage: str, detail: str = "", path: Optional[str] = None):
+    """Mide el bloque y lo apunta aunque falle (ok=false + error); la excepción sigue su curso."""
+    s = Span(stage, detail)
+    started, t0, c0 = _utc_now(), time.perf_counter(), cpu_seconds()
+    rss0 = {"self": max_rss_mb(), "children": child_rss_mb()}
+    _open.append(s)
+    error = None
+    try:
+        yield s
+    except BaseException as e:
+        error = f"{e.__class__.__name__}: {e}"
+        raise
+    finally:
+        _open.remove(s)
+        entry = {"stage": stage, "detail": detail, "started_utc": started,
+                 "wall_s": round(time.perf_counter() - t0, 3), "cpu_s": round(cpu_seconds() - c0, 3),
+                 **rss_fields(rss0), "rows": s.rows, "bytes": s.bytes,
+                 "skipped": s.skipped, "ok": error is None, "error": error, "run": run_id()}
+        try:
+            append(entry, path or METRICS_PATH)
+        except OSError as e:
+            print(f"⚠️  No se pudo guardar la medida de {stage}: {e}")
+
+# --- Lectura ------------------------------------------------------------------------
+def load(path: str = METRICS_PATH) -> List[Dict]:
+    out = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    out.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return out
+
+def latest(path: str = METRICS_PATH) -> Dict[str, Dict]:
+    """{etapa: última medida} (una etapa que se repite en la ejecución se queda con la última)."""
+    out: Dict[str, Dict] = {}
+    for e in load(path):
+        if e.get("stage"):
+            out[e["stage"]] = e
+    return {s: out[s] for s in sorted(out, key=lambda s: (STAGES.index(s) if s in STAGES else len(STAGES), s))}
+
+def format_line(e: Dict) -> str:
+    parts = [f"{e['stage']:<14}", f"{e['wall_s']:>8.2f}s"]
+    if e.get("cpu_s") is not None:
+        parts.append(f"cpu {e['cpu_s']:.2f}s")
+    if e.get("max_rss_mb") is not None:
+        growth = f" (+{e['rss_growth_mb']:.0f})" if e.get("rss_growth_mb") else ""
+        parts.append(f"pico proceso {e['max_rss_mb']:.0f} MB{growth}")
+    if e.get("child_rss_mb") is not None:
+        parts.append(f"pico hijos {e['child_rss_mb']:.0f} MB")
+    if e.get("rows"):
+        parts.append(f"{e['rows']} filas")
+    if e.get("bytes"):
+        parts.append(f"{e['bytes'] / (1 << 20):.1f} MB")
+    if e.get("skipped"):
+        parts.append("sin cambios")
+    if not e.get("ok", True):
+        parts.append(f"ERROR {e.get('error')}")
+    return " · ".join(parts) + f"  ({e.get('started_utc', '')})"
+
+def main():
+    ap = argparse.ArgumentParser(description="Medidas por etapa (dist/stage_metrics.jsonl)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("now", help="imprime la hora actual (inicio para 'record')")
+    rec = sub.add_parser("record", help="apunta una etapa medida desde bash")
+    rec.add_argument("stage")
+    rec.add_argument("--start", type=float, required=True, help="salida de 'now' al empezar la etapa")
+    rec.add_argument("--detail", default="")
+    rec.add_argument("--rows", type=int, default=0)
+    rec.add_argument("--outputs", nargs="*", default=[], help="ficheros producidos (suman 'bytes')")
+    rec.add_argument("--skipped", action="store_true")
+    rec.add_argument("--failed", action="store_true")
+    sub.add_parser("show", help="última medida de cada etapa")
+    args = ap.parse_args()
+
+    if args.cmd == "now":
+        print(f"{time.time():.3f}")
+    elif args.cmd == "record":
+        # desde bash no hay CPU ni RSS propios de la etapa: sólo tiempo de reloj y volumen
+        started = datetime.fromtimestamp(args.start, timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+        append({"stage": args.stage, "detail": args.detail, "started_utc": started,
+                "wall_s": round(time.time() - args.start, 3), "cpu_s": None,
+                "max_rss_mb": None, "rss_growth_mb": None, "child_rss_mb": None,
+                "rows": args.rows, "bytes": file_bytes(args.outputs),
+                "skipped": args.skipped, "ok": not args.failed, "error": None, "run": run_id()})
+    else:
+        stages = latest()
+        if not stages:
+            print(f"Sin medidas en {METRICS_PATH}")
+        for e in stages.values():
+            print(format_line(e))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ops/scripts/svg_charts.py
+"""
+Gráficas SVG en línea para el panel (docs/index.html)
+
+El panel se genera en el servidor: nada de JS ni CDN, la página se ve igual
+sin red. Tres piezas, todas devuelven un <svg> como texto:
+
+  bars([(etiqueta, valor), ...])                 -> barras horizontales
+  lines({serie: [(ts, valor), ...]}, titulo)      -> líneas con eje x común
+  sparkline([(ts, valor), ...])                   -> minigráfica sin ejes
+
+Los colores salen de PALETTE por posición salvo que se pasen explícitos
+('colors'), p. ej. para que FAIL sea rojo y WARN ámbar en todas las gráficas.
+
+Las series llegan ya reducidas (run_metrics.trends), así que cada gráfica
+tiene como mucho unos cientos de puntos. Coordenadas con 1 decimal y sin
+atributos redundantes para que pesen poco.
+"""
+
+from html import escape
+from typing import Dict, List, Sequence, Tuple
+
+PALETTE = ("#2563eb", "#dc2626", "#16a34a", "#d97706", "#7c3aed", "#0891b2", "#db2777", "#4b5563")
+BLUE, RED, GREEN, AMBER = PALETTE[:4]
+TEXT = "font-size=\"11\" fill=\"#555\""
+
+def _num(v: float) -> str:
+    """Número corto para coordenadas y etiquetas (1 decimal, sin ceros sobrantes)."""
+    s = f"{v:.1f}"
+    return s[:-2] if s.endswith(".0") else s
+
+def _label(v: float) -> str:
+    if abs(v) >= 1e6:
+        return f"{v / 1e6:.1f}M"
+    if abs(v) >= 1e4:
+        return f"{v / 1e3:.0f}k"
+    return f"{v:g}" if v == int(v) else f"{v:.2f}"
+
+def _svg(width: int, height: int, body: str, title: str = "") -> str:
+    t = f"<title>{escape(title)}</title>" if title else ""
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" '
+            f'width="{width}" height="{height}" role="img">{t}{body}</svg>')
+
+def bars(items: Sequence[Tuple[str, float]], width: int = 360, bar_h: int = 18, title: str = "",
+         colors: Sequence[str] = ()) -> str:
+    """Barras horizontales con el valor al final de cada una; 'colors' por barra (o PALETTE)."""
+    if not items:
+        return ""
+    label_w, gap = 70, 6
+    top = max((v for _, v in items), default=0) or 1
+    plot_w = width - label_w - 50
+    body = []
+    for i, (name, v) in enumerate(items):
+        y = i * (bar_h + gap)
+        w = plot_w * float(v) / top
+        body.append(f'<text x="0" y="{y + bar_h - 5}" {TEXT}>{escape(str(name))}</text>'
+                    f'<rect x="{label_w}" y="{y}" width="{_num(w)}" height="{bar_h}" '
+                    f'fill="{colors[i] if i < len(colors) else PALETTE[i % len(PALETTE)]}"/>'
+                    f'<text x="{_num(label_w + w + 4)}" y="{y + bar_h - 5}" {TEXT}>{_label(float(v))}</text>')
+    height = len(items) * (bar_h + gap) - gap
+    return _svg(width, height, "".join(body), title)
+
+def _path(xs: List[float], ys: List[float]) -> str:
+    return "M" + "L".join(f"{_num(x)} {_num(y)}" for x, y in zip(xs, ys))
+
+def lines(series: Dict[str, List[Tuple[str, float]]], title: str = "", width: int = 600,
+          height: int = 150, colors: Dict[str, str] = None) -> str:
+    """
+    Varias series sobre un eje x común (las marcas de tiempo de todas, en orden);
+    eje y desde 0 hasta el máximo. Leyenda con el último valor de cada serie.
+    'colors' = {serie: color}; las que falten toman PALETTE por posición.
+    """
+    series = {k: v for k, v in series.items() if v}
+    if not series:
+        return ""
+    stamps = sorted({t for pts in series.values() for t, _ in pts})
+    pos = {t: i for i, t in enumerate(stamps)}
+    top = max(v for pts in series.values() for _, v in pts) or 1
+    left, right, head, foot = 40, 8, 18, 18
+    pw, ph = width - left - right, height - head - foot
+    step = pw / max(len(stamps) - 1, 1)
+
+    body = [f'<text x="0" y="12" font-size="12" fill="#111">{escape(title)}</text>' if title else "",
+            f'<path d="M{left} {head}V{head + ph}H{left + pw}" stroke="#ccc" fill="none"/>',
+            f'<text x="{left - 4}" y="{head + 8}" text-anchor="end" {TEXT}>{_label(top)}</text>',
+            f'<text x="{left - 4}" y="{head + ph}" text-anchor="end" {TEXT}>0</text>',
+            f'<text x="{left}" y="{height - 4}" {TEXT}>{escape(stamps[0][:10])}</text>',
+            f'<text x="{left + pw}" y="{height - 4}" text-anchor="end" {TEXT}>{escape(stamps[-1][:10])}</text>']
+    legend_x = left + 120
+    for i, (name, pts) in enumerate(series.items()):
+        color = (colors or {}).get(name) or PALETTE[i % len(PALETTE)]
+        xs = [left + pos[t] * step for t, _ in pts]
+        ys = [head + ph - ph * v / top for _, v in pts]
+        if len(pts) == 1:
+            body.append(f'<circle cx="{_num(xs[0])}" cy="{_num(ys[0])}" r="2.5" fill="{color}"/>')
+        else:
+            body.append(f'<path d="{_path(xs, ys)}" stroke="{color}" stroke-width="1.5" fill="none"/>')
+        body.append(f'<text x="{legend_x}" y="12" font-size="11" fill="{color}">'
+                    f'{escape(name)} {_label(pts[-1][1])}</text>')
+        legend_x += 12 + 7 * (len(name) + len(_label(pts[-1][1])))
+    return _svg(width, height, "".join(body), title)
+
+def sparkline(points: List[Tuple[str, float]], width: int = 120, height: int = 22,
+              color: str = PALETTE[0]) -> str:
+    """Minigráfica sin ejes (escala min-max) con el último punto marcado."""
+    if not points:
+        return ""
+    vals = [v for _, v in points]
+    lo, hi = min(vals), max(vals)
+    span = (hi - lo) or 1
+    step = (width - 4) / max(len(vals) - 1, 1)
+    xs = [2 + i * step for i in range(len(vals))]
+    ys = [height - 2 - (height - 4) * (v - lo) / span for v in vals]
+    body = (f'<path d="{_path(xs, ys)}" stroke="{color}" stroke-width="1.2" fill="none"/>' if len(vals) > 1 else "") \
+        + f'<circle cx="{_num(xs[-1])}" cy="{_num(ys[-1])}" r="2" fill="{color}"/>'
+    return _svg(width, height, body)
@@ -5,6 +5,9 @@ import os, json, base64, datetime
 import gspread
 from google.oauth2 import service_account
 
+from stage_timing import STAGES
+from profiling import profiled
+
 # -------- Config de entorno --------
 SHEET_ID  = os.environ["CONTROL_SHEET_ID"]
 TAB_NAME  = os.environ.get("CONTROL_SHEET_TAB", "Control_Pipeline")
@@ -85,7 +88,7 @@ HEADER = [
     "zip_marketing",
     "zip_legales",
     "panel_url",
-]
+] + [f"t_{s}_s" for s in STAGES]  # segundos de reloj por etapa (report.json → stages)
 
 def ensure_header(ws):
     try:
@@ -145,9 +148,12 @@ def main():
         flat(zip_legales),
         flat(PANEL_URL),
     ]
+    stages = report.get("stages", {}) or {}
+    row += [flat((stages.get(s) or {}).get("wall_s")) for s in STAGES]
 
     ws.append_row(row, value_input_option="USER_ENTERED")
     print("✅ Control_Pipeline actualizado.")
 
 if __name__ == "__main__":
-    main()
+    with profiled("update_control_sheet"):
+        main()
@@ -23,6 +23,10 @@ from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 from googleapiclient.errors import HttpError
 
+from run_manifest import stage_unchanged, record_stage
+from stage_timing import span, note, file_bytes
+from profiling import profiled
+
 
 # -------------------------------
 #  Helpers OAuth + Drive service
@@ -176,12 +180,22 @@ def main():
         print("❌ Falta GDRIVE_FOLDER_ID en entorno")
         sys.exit(0)
 
+    # Mismos ZIPs (por contenido) que en la última subida -> no se toca Drive
+    zips = [str(p) for p in sorted(dist_dir.glob("*.zip"))]
+    if zips and stage_unchanged("upload", zips):
+        print("= ZIPs sin cambios desde la última subida; Drive no se modifica")
+        note(skipped=True)
+        return
+
     service = build_service()
     ensure_folder(service, folder_id)
 
     # Subir ZIPs que existan en ./dist
     print(f"→ Subiendo ZIPs desde {dist_dir} a Drive folder …")
-    upload_all_from_dist(service, folder_id, dist_dir)
+    links = upload_all_from_dist(service, folder_id, dist_dir)
+    note(rows=len(links), bytes=file_bytes(str(dist_dir / name) for name, _ in links))
+    if links and len(links) == len(zips):
+        record_stage("upload", zips, [str(dist_dir / "drive_links.txt")])
 
     # --- NUEVO: limpieza automática tras la subida
     try:
@@ -195,4 +209,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with span("upload"), profiled("upload_to_gdrive"):
+        main()
@@ -5,9 +5,27 @@ BASE="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
 DIST="$BASE/dist"
 
 timestamp="$(date +%Y%m%d_%H%M)"
+MANIFEST=(python3 "$BASE/ops/scripts/run_manifest.py")
+TIMING=(python3 "$BASE/ops/scripts/stage_timing.py")
+ZIP_T0="$("${TIMING[@]}" now)"
 
 # Loterías: si existe carpeta normalized/YYYY-MM-DD, zipeamos desde ahí
 LOT_NORM_DIR="$(find "$DIST/loterias/normalized" -mindepth 1 -maxdepth 1 -type d 2>/dev/null | sort | tail -n1 || true)"
+
+# Entradas de la etapa: todo lo que acabaría dentro de algún ZIP (+ este script)
+ZIP_INPUTS=()
+while IFS= read -r f; do ZIP_INPUTS+=("$f"); done < <(
+  find "${LOT_NORM_DIR:-$BASE/loterias/data}" "$BASE/hb_docs" "$BASE/legales" "$BASE/marketing" \
+       -type f 2>/dev/null | sort
+  ls "$DIST/loterias.sqlite" 2>/dev/null || true
+)
+ZIP_INPUTS+=("${BASH_SOURCE[0]}")
+if "${MANIFEST[@]}" check zip --inputs "${ZIP_INPUTS[@]}"; then
+  echo "ZIPs sin cambios; se reutilizan los existentes en $DIST"
+  "${TIMING[@]}" record zip --start "$ZIP_T0" --skipped || true
+  ls -lh "$DIST"/*.zip || true
+  exit 0
+fi
 if [[ -n "${LOT_NORM_DIR:-}" ]]; then
   (cd "$LOT_NORM_DIR" && zip -qr "$DIST/loterias_${timestamp}.zip" .)
 else
@@ -17,6 +35,11 @@ else
   fi
 fi
 
+# Almacén SQLite (normalize_loterias.py) dentro del ZIP de loterías
+if [[ -f "$DIST/loterias.sqlite" && -f "$DIST/loterias_${timestamp}.zip" ]]; then
+  (cd "$DIST" && zip -q "$DIST/loterias_${timestamp}.zip" loterias.sqlite)
+fi
+
 # hb_docs, legales, marketing (fallbacks; ajusta a tus carpetas reales si hace falta)
 if [[ -d "$BASE/hb_docs" ]]; then
   (cd "$BASE" && zip -qr "$DIST/hb_docs_${timestamp}.zip" hb_docs)
@@ -28,5 +51,11 @@ if [[ -d "$BASE/marketing" ]]; then
   (cd "$BASE" && zip -qr "$DIST/marketing_${timestamp}.zip" marketing)
 fi
 
+shopt -s nullglob
+ZIP_OUTPUTS=("$DIST"/*_"${timestamp}".zip)
+"${MANIFEST[@]}" record zip --inputs "${ZIP_INPUTS[@]}" --outputs "${ZIP_OUTPUTS[@]}"
+"${TIMING[@]}" record zip --start "$ZIP_T0" --outputs "${ZIP_OUTPUTS[@]}" || true
+shopt -u nullglob
+
 echo "Listo en $DIST"
 ls -lh "$DIST"/*.zip || true